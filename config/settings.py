@@ -27,7 +27,17 @@ BACKUP_CONFIG = {
     "max_concurrent_uploads": int(os.getenv("MAX_CONCURRENT_UPLOADS", "3")),
     "chunk_size_mb": int(os.getenv("CHUNK_SIZE_MB", "8")),
     "retry_attempts": int(os.getenv("RETRY_ATTEMPTS", "3")),
-    "timeout_seconds": int(os.getenv("TIMEOUT_SECONDS", "300"))
+    "timeout_seconds": int(os.getenv("TIMEOUT_SECONDS", "300")),
+    "restore_concurrency_per_account": int(os.getenv("RESTORE_CONCURRENCY_PER_ACCOUNT", "2")),
+    "restore_differential": os.getenv("RESTORE_DIFFERENTIAL", "true").lower() == "true"
+}
+
+# Database Configuration
+DATABASE_CONFIG = {
+    # Tracking DB EnhancedBackupManager (dibaca FileRecoveryManager)
+    "db_file": os.getenv("DATABASE_FILE", str(PROJECT_ROOT / "config" / "backup_tracking.db")),
+    # BackupManager lama punya schema backed_files/backup_logs sendiri
+    "legacy_db_file": os.getenv("LEGACY_DATABASE_FILE", str(PROJECT_ROOT / "config" / "backup_legacy.db"))
 }
 
 # Telegram Configuration
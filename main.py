@@ -4,7 +4,8 @@
 📱 Optimized for Android Termux with Telegram Bot Interface
 
 Usage:
-    python main.py              # Start Telegram bot
+    python main.py                  # Start Telegram bot
+    python main.py rebuild-catalog  # Rebuild backup catalog from Drive manifests
 """
 
 import sys
@@ -16,8 +17,25 @@ PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 sys.path.insert(0, str(PROJECT_ROOT))  # Add root for config import
 
+def rebuild_catalog():
+    """Rebuild tracking DB dari run manifest di Drive (device baru)"""
+    import asyncio
+    import logging
+    from src.enhanced_backup_manager import EnhancedBackupManager
+    
+    logging.basicConfig(level=logging.INFO)
+    print("🔄 Rebuilding backup catalog from Drive manifests...")
+    manager = EnhancedBackupManager()
+    summary = asyncio.run(manager.rebuild_catalog_from_manifests())
+    print(f"✅ Applied {summary['manifests_applied']}/{summary['manifests_found']} manifests, "
+          f"{summary['file_entries']} file entries")
+
 def main():
     """Main entry point - Start the Telegram bot"""
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-catalog":
+        rebuild_catalog()
+        return
+    
     try:
         # Import and start the Termux Telegram bot
         from src.telegram_bot.termux_telegram_bot import main as start_bot
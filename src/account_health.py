@@ -0,0 +1,209 @@
+"""
+Account Health untuk routing upload antar akun Google Drive
+- Error rate dan latency (EWMA) per akun
+- Status auth dan quota
+- Circuit breaker: closed -> open -> half-open probe -> closed
+"""
+
+import time
+import threading
+import logging
+from typing import Dict, List
+
+from googleapiclient.errors import HttpError
+
+try:
+    from google.auth.exceptions import RefreshError
+except ImportError:
+    RefreshError = None
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+def classify_error(error: Exception) -> str:
+    """
+    Klasifikasi error Drive
+
+    Returns:
+        str: 'auth', 'quota', 'transient' atau 'client'
+    """
+    if RefreshError is not None and isinstance(error, RefreshError):
+        return 'auth'
+
+    if isinstance(error, HttpError):
+        status = getattr(error.resp, 'status', None)
+        message = str(error)
+        if status == 401:
+            return 'auth'
+        if status == 403 and 'storageQuotaExceeded' in message:
+            return 'quota'
+        if status in (403, 429) or (status and status >= 500):
+            return 'transient'
+        return 'client'
+
+    if 'credentials' in str(error).lower():
+        return 'auth'
+    return 'transient'
+
+class AccountHealth:
+    """Health score dan circuit breaker satu akun"""
+
+    def __init__(self, account_index: int, failure_threshold: int = 5,
+                 error_rate_threshold: float = 0.5, open_seconds: int = 60,
+                 max_open_seconds: int = 1800, alpha: float = 0.2):
+        self.account_index = account_index
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.alpha = alpha
+
+        self.state = CLOSED
+        self.error_rate = 0.0
+        self.latency = None  # seconds (EWMA)
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.auth_ok = True
+        self.last_error = None
+        self.open_seconds = open_seconds
+        self.opened_at = None
+        self.probe_started_at = None
+        self._lock = threading.Lock()
+
+    def _cooldown_elapsed(self) -> bool:
+        return time.monotonic() - self.opened_at >= self.open_seconds
+
+    def is_available(self) -> bool:
+        """True jika akun boleh menerima traffic (tanpa mengubah state)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._cooldown_elapsed()
+            return not self._probe_in_flight()
+
+    def _probe_in_flight(self) -> bool:
+        # Probe yang tidak pernah melapor dianggap selesai setelah satu cooldown
+        return (self.probe_started_at is not None and
+                time.monotonic() - self.probe_started_at < self.base_open_seconds)
+
+    def allow_request(self) -> bool:
+        """Minta izin routing; pada half-open hanya satu probe yang lolos"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if not self._cooldown_elapsed():
+                    return False
+                self.state = HALF_OPEN
+            if self._probe_in_flight():
+                return False
+            self.probe_started_at = time.monotonic()
+            return True
+
+    def record_success(self, latency: float = None):
+        with self._lock:
+            self.samples += 1
+            self.error_rate = (1 - self.alpha) * self.error_rate
+            if latency is not None:
+                self.latency = latency if self.latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * self.latency
+                )
+            self.consecutive_failures = 0
+            self.auth_ok = True
+
+            if self.state != CLOSED:
+                logging.getLogger(__name__).info(f"Account {self.account_index} recovered, closing circuit")
+                self.samples = 0  # Error rate lama tidak langsung men-trip ulang
+            self.state = CLOSED
+            self.open_seconds = self.base_open_seconds
+            self.probe_started_at = None
+
+    def record_failure(self, error: Exception) -> str:
+        """
+        Catat kegagalan request
+
+        Returns:
+            str: Klasifikasi error (lihat classify_error)
+        """
+        kind = classify_error(error)
+        if kind == 'client':
+            # Request yang salah (404, 400) bukan masalah kesehatan akun
+            return kind
+
+        with self._lock:
+            self.samples += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if kind == 'auth':
+                self.auth_ok = False
+
+            if self.state == HALF_OPEN:
+                # Probe gagal: buka lagi dengan cooldown lebih panjang
+                self._trip(min(self.open_seconds * 2, self.max_open_seconds))
+            elif kind in ('auth', 'quota'):
+                # Token revoked / quota habis tidak akan pulih dalam hitungan detik
+                self._trip(self.max_open_seconds)
+            elif (self.consecutive_failures >= self.failure_threshold or
+                  (self.samples >= self.failure_threshold and
+                   self.error_rate >= self.error_rate_threshold)):
+                self._trip(self.open_seconds)
+
+        return kind
+
+    def _trip(self, open_seconds: int):
+        if self.state != OPEN:
+            logging.getLogger(__name__).warning(
+                f"Opening circuit for account {self.account_index} for {open_seconds}s: {self.last_error}"
+            )
+        self.state = OPEN
+        self.open_seconds = open_seconds
+        self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+    def score(self) -> float:
+        """Health score 0..1 (0 = circuit open)"""
+        if self.state == OPEN:
+            return 0.0
+        score = 1.0 - self.error_rate
+        if self.latency:
+            score /= 1.0 + self.latency / 10.0
+        return score
+
+    def snapshot(self) -> Dict:
+        return {
+            'account_index': self.account_index,
+            'state': self.state,
+            'score': round(self.score(), 3),
+            'error_rate': round(self.error_rate, 3),
+            'latency_seconds': round(self.latency, 3) if self.latency is not None else None,
+            'auth_ok': self.auth_ok,
+            'last_error': self.last_error
+        }
+
+class AccountHealthMonitor:
+    """Registry AccountHealth per account_index"""
+
+    def __init__(self, **health_options):
+        self.health_options = health_options
+        self._health: Dict[int, AccountHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, account_index: int) -> AccountHealth:
+        with self._lock:
+            if account_index not in self._health:
+                self._health[account_index] = AccountHealth(account_index, **self.health_options)
+            return self._health[account_index]
+
+    def is_available(self, account_index: int) -> bool:
+        return self.get(account_index).is_available()
+
+    def allow_request(self, account_index: int) -> bool:
+        return self.get(account_index).allow_request()
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            health = list(self._health.values())
+        return [h.snapshot() for h in health]
@@ -0,0 +1,122 @@
+"""
+Account Pool untuk inisialisasi akun Google Drive secara lazy dan paralel
+- Akun baru di-authenticate saat pertama kali dipakai
+- Warm-up paralel di background thread
+- Refresh token proaktif sebelum expired
+"""
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+class LazyAccount:
+    """
+    Proxy akun Google Drive yang authenticate saat pertama dipakai
+
+    account_index dan account_name tersedia tanpa authenticate; atribut
+    lain diteruskan ke manager asli yang dibuat oleh factory.
+    """
+
+    def __init__(self, factory: Callable[[], Any], account_index: int, account_name: str = None):
+        self.account_index = account_index
+        self.account_name = account_name or f"Account {account_index}"
+        self.last_error = None
+        self._factory = factory
+        self._account = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        """True jika akun sudah ter-authenticate"""
+        return self._account is not None
+
+    def get(self):
+        """Return manager asli, authenticate dulu jika belum"""
+        if self._account is None:
+            with self._lock:
+                if self._account is None:
+                    try:
+                        self._account = self._factory()
+                        self.last_error = None
+                    except Exception as e:
+                        # Tidak di-cache: akun dicoba lagi pada pemakaian berikutnya
+                        self.last_error = e
+                        raise
+        return self._account
+
+    def __getattr__(self, name):
+        # Dipanggil hanya untuk atribut yang tidak ada di proxy
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+class AccountPool:
+    """Warm-up paralel dan token refresher untuk sekumpulan LazyAccount"""
+
+    def __init__(self, accounts: List[LazyAccount], max_workers: int = 4,
+                 refresh_interval: int = 300, refresh_margin: int = 600):
+        self.accounts = accounts
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval  # seconds
+        self.refresh_margin = refresh_margin  # refresh token yang expired dalam N detik
+        self.logger = logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._refresher_thread = None
+
+    def warm_up(self, wait: bool = False):
+        """
+        Authenticate semua akun secara paralel
+
+        Args:
+            wait: False = jalan di background thread dan langsung return
+        """
+        if wait:
+            self._warm_up_all()
+            return
+
+        thread = threading.Thread(target=self._warm_up_all, daemon=True, name="account-warmup")
+        thread.start()
+
+    def _warm_up_all(self):
+        if not self.accounts:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.accounts))) as executor:
+            list(executor.map(self._warm_up_one, self.accounts))
+
+    def _warm_up_one(self, account: LazyAccount):
+        try:
+            account.get()
+            self.logger.info(f"Loaded Google account: {account.account_name}")
+        except Exception as e:
+            self.logger.error(f"Failed to load account {account.account_name}: {e}")
+
+    def start_token_refresher(self):
+        """Jalankan background thread yang refresh token sebelum expired"""
+        if self._refresher_thread and self._refresher_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._refresher_thread = threading.Thread(
+            target=self._refresh_loop, daemon=True, name="token-refresher"
+        )
+        self._refresher_thread.start()
+
+    def stop(self):
+        """Stop token refresher"""
+        self._stop_event.set()
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            for account in self.accounts:
+                if not account.is_ready:
+                    continue
+                try:
+                    account.refresh_credentials_if_expiring(self.refresh_margin)
+                except Exception as e:
+                    self.logger.warning(f"Token refresh failed for {account.account_name}: {e}")
+
+    def ready_accounts(self) -> List[LazyAccount]:
+        """Akun yang sudah ter-authenticate"""
+        return [account for account in self.accounts if account.is_ready]
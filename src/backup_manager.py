@@ -20,7 +20,7 @@ class BackupManager:
         self.logger = logging.getLogger(__name__)
         self.google_accounts: List[GoogleDriveManager] = []
         self.current_account_index = 0
-        self.db_path = DATABASE_CONFIG["db_file"]
+        self.db_path = DATABASE_CONFIG["legacy_db_file"]
         self._init_database()
         self._load_google_accounts()
         
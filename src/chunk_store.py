@@ -0,0 +1,431 @@
+"""
+Chunk Store backend untuk file besar yang berubah sebagian
+- Content-defined chunking (gear rolling hash, normalized FastCDC-style),
+  vectorized dengan numpy jika tersedia
+- Hanya chunk dengan hash baru yang di-upload
+- Manifest chunk per versi file disimpan di tracking DB
+- Restore menyusun ulang file dari chunk secara streaming
+"""
+
+import os
+import random
+import shutil
+import asyncio
+import sqlite3
+import hashlib
+import tempfile
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CHUNK_FOLDER = '_chunks'
+
+class ContentDefinedChunker:
+    """
+    Potong stream menjadi chunk berdasarkan isi
+
+    Batas chunk ditentukan oleh gear hash dari ~64 byte terakhir, sehingga
+    sisipan atau perubahan di tengah file hanya mengubah chunk di sekitarnya;
+    chunk lain tetap identik dan tidak perlu di-upload ulang.
+    """
+
+    READ_SIZE = 4 * 1024 * 1024
+    SCAN_BLOCK = 64 * 1024  # Posisi per langkah scan vectorized
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, min_size: int = 512 * 1024, avg_size: int = 2 * 1024 * 1024,
+                 max_size: int = 8 * 1024 * 1024):
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+
+        # Tabel gear harus deterministik: chunk boundary wajib sama antar run
+        rng = random.Random(0x6368756e6b)
+        self._gear = [rng.getrandbits(64) for _ in range(256)]
+        self._gear_np = np.array(self._gear, dtype=np.uint64) if NUMPY_AVAILABLE else None
+
+        # Normalized chunking: mask lebih ketat sebelum avg_size, lebih longgar sesudahnya
+        bits = max(1, avg_size.bit_length() - 1)
+        self._mask_small = ((1 << (bits + 2)) - 1) << (64 - bits - 2)
+        self._mask_large = ((1 << (bits - 2)) - 1) << (64 - bits + 2)
+
+    def _find_cut(self, buf: bytearray, length: int) -> int:
+        """Posisi cut (exclusive) di buf[:length]"""
+        if length <= self.min_size:
+            return length
+        if self._gear_np is not None:
+            return self._find_cut_vectorized(buf, length)
+
+        gear = self._gear
+        mask64 = self._MASK64
+        h = 0
+        i = self.min_size
+        normal = min(self.avg_size, length)
+
+        mask = self._mask_small
+        while i < normal:
+            h = ((h << 1) + gear[buf[i]]) & mask64
+            i += 1
+            if not h & mask:
+                return i
+
+        mask = self._mask_large
+        while i < length:
+            h = ((h << 1) + gear[buf[i]]) & mask64
+            i += 1
+            if not h & mask:
+                return i
+
+        return length
+
+    def _find_cut_vectorized(self, buf: bytearray, length: int) -> int:
+        """Sama dengan loop _find_cut (cut identik), tapi hash dihitung per blok dengan numpy"""
+        data = np.frombuffer(buf, dtype=np.uint8, count=length)
+        normal = min(self.avg_size, length)
+
+        for low, high, mask in ((self.min_size, normal, self._mask_small),
+                                (max(self.min_size, normal), length, self._mask_large)):
+            mask = np.uint64(mask)
+            for block_low in range(low, high, self.SCAN_BLOCK):
+                block_high = min(block_low + self.SCAN_BLOCK, high)
+                hits = np.flatnonzero((self._gear_hashes(data, block_low, block_high) & mask) == 0)
+                if hits.size:
+                    return block_low + int(hits[0]) + 1
+
+        return length
+
+    def _gear_hashes(self, data: 'np.ndarray', low: int, high: int) -> 'np.ndarray':
+        """
+        Gear hash setelah setiap byte di data[low:high]
+
+        Hash dimulai dari nol di min_size dan setiap byte di-shift 1 bit per
+        langkah, jadi h(p) = sum(gear[data[p - k]] << k) untuk k < 64 dan
+        p - k >= min_size. Jumlah itu dihitung dengan 6 langkah doubling.
+        """
+        base = low - 63
+        start = max(self.min_size, base)
+        h = np.zeros(high - base, dtype=np.uint64)
+        h[start - base:] = self._gear_np[data[start:high]]
+        shift = 1
+        while shift < 64:
+            h[shift:] += h[:-shift] << np.uint64(shift)
+            shift *= 2
+        return h[63:]
+
+    def iter_chunks(self, file_path: Path) -> Iterator[bytes]:
+        """Stream chunk dari file tanpa memuat seluruh file ke memory"""
+        buf = bytearray()
+        eof = False
+
+        with open(file_path, 'rb') as f:
+            while True:
+                while not eof and len(buf) < self.max_size:
+                    data = f.read(self.READ_SIZE)
+                    if not data:
+                        eof = True
+                    buf.extend(data)
+
+                if not buf:
+                    return
+
+                cut = self._find_cut(buf, min(len(buf), self.max_size))
+                yield bytes(buf[:cut])
+                del buf[:cut]
+
+class ChunkStore:
+    """Chunk-level dedup backend di atas EnhancedGoogleDriveManager"""
+
+    def __init__(self, db_path: str, chunker: ContentDefinedChunker = None,
+                 temp_dir: str = "temp/chunks"):
+        self.db_path = db_path
+        self.chunker = chunker or ContentDefinedChunker()
+        self.temp_dir = Path(temp_dir)
+        self.logger = logging.getLogger(__name__)
+        self._known_chunks: Dict[int, Set[str]] = {}  # account_index -> chunk hashes
+        self._init_tables()
+
+    def _init_tables(self):
+        """Buat tabel chunk store dan manifest"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chunk_store (
+                account_index INTEGER,
+                chunk_hash TEXT,
+                google_file_id TEXT,
+                chunk_size INTEGER,
+                created_at TIMESTAMP,
+                PRIMARY KEY (account_index, chunk_hash)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chunk_manifests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT,
+                account_index INTEGER,
+                file_hash TEXT,
+                file_size INTEGER,
+                chunk_count INTEGER,
+                created_at TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chunk_manifest_entries (
+                manifest_id INTEGER,
+                seq INTEGER,
+                chunk_hash TEXT,
+                chunk_size INTEGER,
+                PRIMARY KEY (manifest_id, seq)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def _load_known_chunks(self, account_index: int) -> Set[str]:
+        if account_index not in self._known_chunks:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT chunk_hash FROM chunk_store WHERE account_index = ?", (account_index,))
+            self._known_chunks[account_index] = {row[0] for row in cursor.fetchall()}
+            conn.close()
+        return self._known_chunks[account_index]
+
+    def last_account_index(self, file_path: Path) -> Optional[int]:
+        """Akun yang menyimpan versi terakhir file (chunk-nya bisa di-reuse)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT account_index FROM chunk_manifests WHERE file_path = ? ORDER BY id DESC LIMIT 1",
+            (str(file_path),)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    @staticmethod
+    def _chunk_folder_path(chunk_hash: str) -> str:
+        # Shard per 2 hex pertama supaya listing folder tetap kecil
+        return f"{CHUNK_FOLDER}/{chunk_hash[:2]}"
+
+    async def backup_file(self, account, file_path: Path, token=None) -> Optional[Dict]:
+        """
+        Backup file sebagai rangkaian chunk
+
+        Chunking dan hashing berjalan di worker thread, event loop tetap bebas.
+
+        Args:
+            token: CancellationToken (opsional), dicek sebelum setiap chunk baru
+
+        Returns:
+            dict: manifest_id, file_hash (md5), chunk_count, new_chunks,
+                  uploaded_bytes; None jika ada chunk yang gagal atau md5-nya
+                  tidak cocok dengan response Drive
+        """
+        known = self._load_known_chunks(account.account_index)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+        file_md5 = hashlib.md5()
+        entries = []
+        new_chunks = []
+        uploaded_bytes = 0
+
+        chunks = self.chunker.iter_chunks(file_path)
+        while True:
+            hashed = await asyncio.to_thread(self._next_hashed_chunk, chunks, file_md5)
+            if hashed is None:
+                break
+            chunk, chunk_hash, chunk_md5 = hashed
+            entries.append((chunk_hash, len(chunk)))
+
+            if chunk_hash in known:
+                continue
+
+            if token is not None and not await token.checkpoint():
+                # Cancel: chunk yang sudah masuk dipakai ulang saat run berikutnya
+                self.logger.info(f"Chunked backup of {file_path.name} cancelled")
+                self._save_chunks(new_chunks)
+                return None
+
+            uploaded = await self._upload_chunk(account, chunk_hash, chunk)
+            if not uploaded or uploaded.get('md5Checksum') != chunk_md5:
+                # Chunk yang sudah masuk tetap disimpan, retry hanya upload sisanya
+                self.logger.error(f"Failed to upload chunk {chunk_hash[:12]} of {file_path}")
+                self._save_chunks(new_chunks)
+                return None
+
+            known.add(chunk_hash)
+            new_chunks.append((account.account_index, chunk_hash, uploaded['id'], len(chunk), datetime.now()))
+            uploaded_bytes += len(chunk)
+
+        self._save_chunks(new_chunks)
+
+        file_size = sum(size for _, size in entries)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO chunk_manifests
+            (file_path, account_index, file_hash, file_size, chunk_count, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (str(file_path), account.account_index, file_md5.hexdigest(), file_size,
+              len(entries), datetime.now()))
+        manifest_id = cursor.lastrowid
+        cursor.executemany('''
+            INSERT INTO chunk_manifest_entries (manifest_id, seq, chunk_hash, chunk_size)
+            VALUES (?, ?, ?, ?)
+        ''', [(manifest_id, seq, chunk_hash, size) for seq, (chunk_hash, size) in enumerate(entries)])
+        conn.commit()
+        conn.close()
+
+        self.logger.info(f"Chunked backup {file_path.name}: {len(new_chunks)}/{len(entries)} new chunks, "
+                         f"{uploaded_bytes / (1024 * 1024):.1f}MB uploaded")
+        return {
+            'manifest_id': manifest_id,
+            'file_hash': file_md5.hexdigest(),
+            'chunk_count': len(entries),
+            'new_chunks': len(new_chunks),
+            'uploaded_bytes': uploaded_bytes
+        }
+
+    @staticmethod
+    def _next_hashed_chunk(chunks: Iterator[bytes], file_md5) -> Optional[Tuple[bytes, str, str]]:
+        """Chunk berikutnya beserta sha256 dan md5-nya (update md5 seluruh file)"""
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        file_md5.update(chunk)
+        return chunk, hashlib.sha256(chunk).hexdigest(), hashlib.md5(chunk).hexdigest()
+
+    def _save_chunks(self, chunks: List[tuple]):
+        """Simpan chunk yang sudah ter-upload ke chunk_store"""
+        if not chunks:
+            return
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO chunk_store
+            (account_index, chunk_hash, google_file_id, chunk_size, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', chunks)
+        conn.commit()
+        conn.close()
+
+    async def _upload_chunk(self, account, chunk_hash: str, chunk: bytes) -> Optional[dict]:
+        """Upload satu chunk ke _chunks/<hh>/<sha256>"""
+        folder_path = self._chunk_folder_path(chunk_hash)
+        folder_id = await account.ensure_folder_structure(folder_path)
+        if not folder_id:
+            return None
+
+        # Nama unik: upload worker lain bisa meng-upload chunk yang sama bersamaan
+        temp_path = await asyncio.to_thread(self._write_temp, chunk_hash, chunk)
+        try:
+            return await account.upload_file_with_metadata(
+                str(temp_path), folder_id, chunk_hash, folder_path
+            )
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def _write_temp(self, chunk_hash: str, chunk: bytes) -> Path:
+        with tempfile.NamedTemporaryFile(dir=self.temp_dir, prefix=f"{chunk_hash[:16]}.",
+                                         delete=False) as temp_file:
+            temp_file.write(chunk)
+        return Path(temp_file.name)
+
+    def get_manifest(self, manifest_id: int) -> Optional[Dict]:
+        """Manifest beserta daftar chunk (urut) dan Drive file ID-nya"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT file_path, account_index, file_hash, file_size FROM chunk_manifests WHERE id = ?",
+            (manifest_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return None
+
+        file_path, account_index, file_hash, file_size = row
+        cursor.execute('''
+            SELECT e.chunk_hash, e.chunk_size, s.google_file_id
+            FROM chunk_manifest_entries e
+            LEFT JOIN chunk_store s
+                ON s.chunk_hash = e.chunk_hash AND s.account_index = ?
+            WHERE e.manifest_id = ?
+            ORDER BY e.seq
+        ''', (account_index, manifest_id))
+        chunks: List[tuple] = cursor.fetchall()
+        conn.close()
+
+        return {
+            'file_path': file_path,
+            'account_index': account_index,
+            'file_hash': file_hash,
+            'file_size': file_size,
+            'chunks': chunks
+        }
+
+    def restore_file(self, account, manifest_id: int, restore_path: str) -> bool:
+        """
+        Susun ulang file dari chunk
+
+        Chunk di-download satu per satu, diverifikasi sha256-nya lalu
+        di-append ke file sementara; file tujuan baru diganti setelah
+        semua chunk dan md5 file lengkap cocok.
+        """
+        manifest = self.get_manifest(manifest_id)
+        if not manifest:
+            self.logger.error(f"Chunk manifest {manifest_id} not found")
+            return False
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        partial_path = f"{restore_path}.download"
+        chunk_path = None
+        file_md5 = hashlib.md5()
+
+        try:
+            with open(partial_path, 'wb') as output:
+                for chunk_hash, chunk_size, google_file_id in manifest['chunks']:
+                    # Nama per hash: partial download chunk yang sama bisa di-resume
+                    chunk_path = str(self.temp_dir / f"restore_{chunk_hash}")
+                    if not google_file_id or not account.download_file(google_file_id, chunk_path):
+                        self.logger.error(f"Missing chunk {chunk_hash[:12]} for manifest {manifest_id}")
+                        return False
+
+                    chunk_sha = hashlib.sha256()
+                    with open(chunk_path, 'rb') as chunk_file:
+                        while True:
+                            data = chunk_file.read(1024 * 1024)
+                            if not data:
+                                break
+                            chunk_sha.update(data)
+                            file_md5.update(data)
+                            output.write(data)
+
+                    os.remove(chunk_path)
+                    if chunk_sha.hexdigest() != chunk_hash:
+                        self.logger.error(f"Corrupted chunk {chunk_hash[:12]} for manifest {manifest_id}")
+                        return False
+
+            if file_md5.hexdigest() != manifest['file_hash']:
+                self.logger.error(f"Checksum mismatch after reassembling manifest {manifest_id}")
+                return False
+
+            shutil.move(partial_path, restore_path)
+            return True
+
+        finally:
+            for path in (partial_path, chunk_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
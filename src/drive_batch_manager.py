@@ -0,0 +1,111 @@
+"""
+Drive Batch Manager untuk menggabungkan metadata request Google Drive
+- Sampai 100 operasi per batch call (batas BatchHttpRequest Drive)
+- Error handling per item
+- Retry dengan exponential backoff untuk item yang kena rate limit / 5xx
+"""
+
+import time
+import logging
+from typing import Any, Dict, Hashable
+from googleapiclient.errors import HttpError
+
+class DriveBatchManager:
+    """Coalesce Drive metadata requests ke BatchHttpRequest"""
+
+    MAX_BATCH_SIZE = 100
+    RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+    RETRYABLE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'backendError')
+
+    def __init__(self, service, max_retries: int = 3, base_delay: float = 1.0,
+                 transport_pool=None):
+        self.service = service
+        self.transport_pool = transport_pool
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.logger = logging.getLogger(__name__)
+
+    def execute(self, requests: Dict[Hashable, Any]) -> Dict[Hashable, Dict]:
+        """
+        Jalankan banyak request dalam batch
+
+        Args:
+            requests: Mapping key -> HttpRequest (belum di-execute)
+
+        Returns:
+            dict: key -> {'result': response atau None, 'error': exception atau None}
+        """
+        results: Dict[Hashable, Dict] = {}
+        pending = dict(requests)
+        attempt = 0
+
+        while pending:
+            retry = {}
+            keys = list(pending.keys())
+
+            for start in range(0, len(keys), self.MAX_BATCH_SIZE):
+                chunk = keys[start:start + self.MAX_BATCH_SIZE]
+                chunk_results = self._execute_chunk({key: pending[key] for key in chunk})
+
+                for key, outcome in chunk_results.items():
+                    error = outcome['error']
+                    if error is not None and attempt < self.max_retries and self._is_retryable(error):
+                        retry[key] = pending[key]
+                    else:
+                        results[key] = outcome
+
+            if not retry:
+                break
+
+            attempt += 1
+            delay = self.base_delay * (2 ** (attempt - 1))
+            self.logger.warning(f"Retrying {len(retry)} batched Drive requests in {delay:.1f}s "
+                                f"(attempt {attempt}/{self.max_retries})")
+            time.sleep(delay)
+            pending = retry
+
+        return results
+
+    def _execute_chunk(self, chunk: Dict[Hashable, Any]) -> Dict[Hashable, Dict]:
+        """Execute satu batch (maksimal MAX_BATCH_SIZE request)"""
+        outcomes: Dict[Hashable, Dict] = {}
+        request_ids = {}
+
+        def callback(request_id, response, exception):
+            key = request_ids[request_id]
+            outcomes[key] = {'result': response, 'error': exception}
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for i, (key, request) in enumerate(chunk.items()):
+            request_id = str(i)
+            request_ids[request_id] = key
+            batch.add(request, request_id=request_id)
+
+        try:
+            if self.transport_pool:
+                with self.transport_pool.connection() as http:
+                    batch.execute(http=http)
+            else:
+                batch.execute()
+        except Exception as error:
+            # Seluruh batch gagal (misalnya network), tandai semua item dengan error yang sama
+            self.logger.error(f"Batch request failed: {error}")
+            for key in chunk:
+                outcomes.setdefault(key, {'result': None, 'error': error})
+
+        return outcomes
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Cek apakah error layak di-retry"""
+        if not isinstance(error, HttpError):
+            # Network-level error pada seluruh batch
+            return isinstance(error, (OSError, TimeoutError))
+
+        status = getattr(error.resp, 'status', None)
+        if status in self.RETRYABLE_STATUS:
+            return True
+
+        if status == 403:
+            return any(reason in str(error) for reason in self.RETRYABLE_REASONS)
+
+        return False
@@ -0,0 +1,175 @@
+"""
+Drive Download - streaming media download langsung ke disk
+- Chunk ditulis ke file sementara (<path>.part), bukan ke memory
+- Identitas remote (file ID, revision, size, md5) disimpan di <path>.part.json;
+  .part milik file/revision lain dibuang, tidak disambung
+- Resume dari .part yang sudah ada lewat HTTP Range
+- fsync, cek size dan md5, lalu rename atomik ke path tujuan
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+
+from googleapiclient.errors import HttpError
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+
+# Field Drive yang dibutuhkan remote_state()
+FILE_FIELDS = 'id, size, md5Checksum, headRevisionId'
+REVISION_FIELDS = 'id, size, md5Checksum'
+
+logger = logging.getLogger(__name__)
+
+class DownloadIntegrityError(OSError):
+    """Isi download tidak cocok dengan size/md5 yang dilaporkan Drive"""
+
+def remote_state(file_id: str, metadata: Dict, revision_id: Optional[str] = None) -> Dict:
+    """
+    Identitas remote sebuah download dari metadata files().get / revisions().get
+
+    Google Docs native tidak punya size/md5, keduanya None dan tidak dicek.
+    """
+    size = metadata.get('size')
+    return {
+        'file_id': file_id,
+        'revision_id': revision_id or metadata.get('headRevisionId'),
+        'size': int(size) if size is not None else None,
+        'md5': metadata.get('md5Checksum'),
+    }
+
+def download_to_file(request, local_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     resume: bool = True, remote: Optional[Dict] = None) -> str:
+    """
+    Download media request ke local_path dengan memory konstan
+
+    Args:
+        request: HttpRequest dari files().get_media / revisions().get_media
+        local_path: Path tujuan
+        chunk_size: Ukuran satu Range request
+        resume: Lanjutkan dari <local_path>.part jika milik remote yang sama
+        remote: Hasil remote_state(); tanpa ini .part lama tidak pernah disambung
+
+    Returns:
+        str: local_path
+
+    Raises:
+        HttpError: Jika download gagal (file .part dibiarkan untuk resume)
+        DownloadIntegrityError: Size/md5 tidak cocok (file .part dibuang)
+    """
+    directory = os.path.dirname(local_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    partial_path = local_path + PARTIAL_SUFFIX
+    state_path = local_path + STATE_SUFFIX
+    expected_size = remote.get('size') if remote else None
+
+    start = 0
+    if resume and remote and os.path.exists(partial_path):
+        if _load_state(state_path) != remote:
+            logger.warning(f"Discarding partial download of a different file/revision: {partial_path}")
+        elif expected_size is not None and os.path.getsize(partial_path) > expected_size:
+            logger.warning(f"Discarding oversized partial download: {partial_path}")
+        else:
+            start = os.path.getsize(partial_path)
+
+    if not start:
+        _save_state(state_path, remote)
+
+    try:
+        digest = _stream(request, partial_path, chunk_size, start, expected_size)
+    except HttpError as error:
+        # 416: .part sudah sepanjang (atau lebih dari) file remote, mulai ulang
+        if start and getattr(error.resp, 'status', None) == 416:
+            logger.warning(f"Discarding stale partial download: {partial_path}")
+            digest = _stream(request, partial_path, chunk_size, 0, expected_size)
+        else:
+            raise
+
+    _verify(partial_path, state_path, remote, digest)
+
+    os.replace(partial_path, local_path)
+    _remove(state_path)
+    return local_path
+
+def _stream(request, partial_path: str, chunk_size: int, start: int,
+            total: Optional[int] = None):
+    """Range request per chunk ke .part; return md5 dari seluruh isi .part"""
+    digest = hashlib.md5()
+    if start:
+        logger.info(f"Resuming download at {start / (1024 * 1024):.1f}MB: {partial_path}")
+        with open(partial_path, 'rb') as fd:
+            for block in iter(lambda: fd.read(1024 * 1024), b''):
+                digest.update(block)
+
+    headers = dict(request.headers or {})
+    offset = start
+    with open(partial_path, 'ab' if start else 'wb') as fd:
+        while total is None or offset < total:
+            headers['range'] = f"bytes={offset}-{offset + chunk_size - 1}"
+            resp, content = request.http.request(request.uri, method='GET', headers=headers)
+            if resp.status not in (200, 206):
+                raise HttpError(resp, content, uri=request.uri)
+
+            if resp.status == 200 and offset:
+                # Server mengabaikan Range: isi lengkap, tulis ulang dari awal
+                fd.seek(0)
+                fd.truncate()
+                digest, offset = hashlib.md5(), 0
+
+            fd.write(content)
+            digest.update(content)
+            offset += len(content)
+
+            content_range = resp.get('content-range', '')
+            if '/' in content_range and not content_range.endswith('/*'):
+                total = int(content_range.rsplit('/', 1)[1])
+            elif resp.status == 200 or not content:
+                total = offset
+
+        fd.flush()
+        os.fsync(fd.fileno())
+
+    return digest
+
+def _verify(partial_path: str, state_path: str, remote: Optional[Dict], digest):
+    """Buang .part dan raise jika size/md5 tidak cocok dengan remote"""
+    if not remote:
+        return
+
+    problem = None
+    size = os.path.getsize(partial_path)
+    if remote.get('size') is not None and size != remote['size']:
+        problem = f"size {size} != {remote['size']}"
+    elif remote.get('md5') and digest.hexdigest() != remote['md5']:
+        problem = f"md5 {digest.hexdigest()} != {remote['md5']}"
+
+    if problem:
+        _remove(partial_path)
+        _remove(state_path)
+        raise DownloadIntegrityError(f"Corrupt download of {remote.get('file_id')}: {problem}")
+
+def _load_state(state_path: str) -> Optional[Dict]:
+    try:
+        with open(state_path) as fd:
+            return json.load(fd)
+    except (OSError, ValueError):
+        return None
+
+def _save_state(state_path: str, remote: Optional[Dict]):
+    if not remote:
+        _remove(state_path)
+        return
+    with open(state_path, 'w') as fd:
+        json.dump(remote, fd)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,284 @@
+"""
+Drive Metadata Mirror - salinan lokal metadata Drive per akun di SQLite
+- Full crawl sekali (semua halaman files.list), lalu incremental lewat changes.list
+- Start page token disimpan per akun, jadi sync berikutnya hanya mengambil perubahan
+- Listing dan search dilayani dari SQLite tanpa batas halaman
+"""
+
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+FILE_FIELDS = 'id, name, mimeType, size, md5Checksum, parents, createdTime, modifiedTime, trashed'
+PAGE_SIZE = 1000
+
+class DriveMetadataMirror:
+    """Mirror metadata file Drive (scope drive.file: file buatan aplikasi ini)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._init_database()
+
+    def _init_database(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS drive_metadata (
+                account_index INTEGER,
+                file_id TEXT,
+                name TEXT,
+                mime_type TEXT,
+                size INTEGER,
+                md5_checksum TEXT,
+                parent_id TEXT,
+                created_time TEXT,
+                modified_time TEXT,
+                PRIMARY KEY (account_index, file_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_drive_metadata_parent
+            ON drive_metadata (account_index, parent_id)
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS drive_sync_state (
+                account_index INTEGER PRIMARY KEY,
+                start_page_token TEXT,
+                root_folder_id TEXT,
+                synced_at TIMESTAMP
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def sync(self, drive) -> bool:
+        """
+        Sinkronkan mirror satu akun
+
+        Args:
+            drive: EnhancedGoogleDriveManager yang sudah authenticated
+
+        Returns:
+            bool: True jika mirror up to date
+        """
+        state = self.get_sync_state(drive.account_index)
+        try:
+            if state and state['start_page_token']:
+                try:
+                    token = self._apply_changes(drive, state['start_page_token'])
+                except HttpError as error:
+                    # Token expired/invalid: crawl ulang dari awal
+                    if getattr(error.resp, 'status', None) not in (400, 404, 410):
+                        raise
+                    self.logger.warning(f"Change token rejected for account {drive.account_index}, resyncing")
+                    token = self._full_sync(drive)
+            else:
+                token = self._full_sync(drive)
+        except HttpError as error:
+            self.logger.error(f"Error syncing Drive metadata for account {drive.account_index}: {error}")
+            return False
+
+        self._save_sync_state(drive.account_index, token, drive.backup_root_folder_id)
+        return True
+
+    def _full_sync(self, drive) -> str:
+        """Crawl semua file (semua halaman) dan ganti isi mirror akun ini"""
+        # Ambil token dulu supaya perubahan selama crawl ikut di sync berikutnya
+        token = drive._execute(drive.service.changes().getStartPageToken())['startPageToken']
+
+        files = []
+        page_token = None
+        while True:
+            response = drive._execute(drive.service.files().list(
+                q='trashed=false',
+                fields=f'nextPageToken, files({FILE_FIELDS})',
+                pageSize=PAGE_SIZE,
+                pageToken=page_token
+            ))
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM drive_metadata WHERE account_index = ?", (drive.account_index,))
+        cursor.executemany(self._UPSERT, [self._row(drive.account_index, item) for item in files])
+        conn.commit()
+        conn.close()
+
+        self.logger.info(f"Mirrored {len(files)} Drive items for account {drive.account_index}")
+        return token
+
+    def _apply_changes(self, drive, page_token: str) -> str:
+        """Terapkan changes.list sejak page_token, return start page token baru"""
+        upserts, removals = [], []
+        while True:
+            response = drive._execute(drive.service.changes().list(
+                pageToken=page_token,
+                spaces='drive',
+                fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))',
+                pageSize=PAGE_SIZE
+            ))
+            for change in response.get('changes', []):
+                item = change.get('file')
+                if change.get('removed') or not item or item.get('trashed'):
+                    removals.append((drive.account_index, change['fileId']))
+                else:
+                    upserts.append(self._row(drive.account_index, item))
+
+            if 'newStartPageToken' in response:
+                page_token = response['newStartPageToken']
+                break
+            page_token = response['nextPageToken']
+
+        if upserts or removals:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany(
+                "DELETE FROM drive_metadata WHERE account_index = ? AND file_id = ?", removals
+            )
+            cursor.executemany(self._UPSERT, upserts)
+            conn.commit()
+            conn.close()
+            self.logger.debug(
+                f"Applied {len(upserts)} updates, {len(removals)} removals for account {drive.account_index}"
+            )
+        return page_token
+
+    _UPSERT = '''
+        INSERT OR REPLACE INTO drive_metadata
+        (account_index, file_id, name, mime_type, size, md5_checksum, parent_id,
+         created_time, modified_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+    @staticmethod
+    def _row(account_index: int, item: Dict) -> tuple:
+        parents = item.get('parents') or [None]
+        size = item.get('size')
+        return (
+            account_index, item['id'], item.get('name'), item.get('mimeType'),
+            int(size) if size is not None else None, item.get('md5Checksum'), parents[0],
+            item.get('createdTime'), item.get('modifiedTime')
+        )
+
+    def _save_sync_state(self, account_index: int, token: str, root_folder_id: Optional[str]):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO drive_sync_state
+            (account_index, start_page_token, root_folder_id, synced_at)
+            VALUES (?, ?, ?, ?)
+        ''', (account_index, token, root_folder_id, datetime.now()))
+        conn.commit()
+        conn.close()
+
+    def get_sync_state(self, account_index: int) -> Optional[Dict]:
+        """State sync akun (None jika belum pernah sync)"""
+        rows = self._query(
+            "SELECT * FROM drive_sync_state WHERE account_index = ?", (account_index,)
+        )
+        return rows[0] if rows else None
+
+    def synced_accounts(self) -> List[Dict]:
+        """Semua akun yang punya mirror"""
+        return self._query("SELECT * FROM drive_sync_state ORDER BY account_index")
+
+    def _query(self, query: str, params: tuple = ()) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_drive_file(row: Dict) -> Dict:
+        """Row mirror -> dict dengan key seperti response files.list"""
+        item = {
+            'id': row['file_id'],
+            'name': row['name'],
+            'mimeType': row['mime_type'],
+            'parents': [row['parent_id']] if row['parent_id'] else [],
+            'createdTime': row['created_time'],
+            'modifiedTime': row['modified_time'],
+        }
+        if row['size'] is not None:
+            item['size'] = str(row['size'])  # Drive mengirim size sebagai string
+        if row['md5_checksum']:
+            item['md5Checksum'] = row['md5_checksum']
+        return item
+
+    def list_children(self, account_index: int, parent_id: str, folders_only: bool = False,
+                      order_by: str = 'name') -> List[Dict]:
+        """
+        Semua isi folder
+
+        Args:
+            order_by: 'name' atau 'created_desc'
+        """
+        query = "SELECT * FROM drive_metadata WHERE account_index = ? AND parent_id = ?"
+        params = [account_index, parent_id]
+        if folders_only:
+            query += " AND mime_type = ?"
+            params.append(FOLDER_MIME_TYPE)
+        query += " ORDER BY created_time DESC" if order_by == 'created_desc' else " ORDER BY name"
+        return [self._to_drive_file(row) for row in self._query(query, tuple(params))]
+
+    def search(self, account_index: int, text: str, root_id: str,
+               limit: Optional[int] = None) -> List[Dict]:
+        """Cari file (bukan folder) berdasarkan nama di seluruh subtree root_id"""
+        query = '''
+            WITH RECURSIVE subtree(file_id) AS (
+                SELECT ?
+                UNION
+                SELECT m.file_id FROM drive_metadata m
+                JOIN subtree s ON m.parent_id = s.file_id
+                WHERE m.account_index = ? AND m.mime_type = ?
+            )
+            SELECT * FROM drive_metadata
+            WHERE account_index = ? AND mime_type != ?
+              AND parent_id IN (SELECT file_id FROM subtree)
+              AND name LIKE ? ESCAPE '\\'
+            ORDER BY modified_time DESC
+        '''
+        pattern = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params = [root_id, account_index, FOLDER_MIME_TYPE,
+                  account_index, FOLDER_MIME_TYPE, f"%{pattern}%"]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._to_drive_file(row) for row in self._query(query, tuple(params))]
+
+    def recent_files(self, account_index: int, limit: int = 10) -> List[Dict]:
+        """File terbaru (bukan folder) milik akun"""
+        rows = self._query('''
+            SELECT * FROM drive_metadata
+            WHERE account_index = ? AND mime_type != ?
+            ORDER BY modified_time DESC LIMIT ?
+        ''', (account_index, FOLDER_MIME_TYPE, limit))
+        return [self._to_drive_file(row) for row in rows]
+
+    def get_summary(self, account_index: int) -> Dict:
+        """Jumlah file, folder dan total size di mirror akun"""
+        row = self._query('''
+            SELECT
+                SUM(CASE WHEN mime_type = ? THEN 0 ELSE 1 END) AS file_count,
+                SUM(CASE WHEN mime_type = ? THEN 1 ELSE 0 END) AS folder_count,
+                COALESCE(SUM(size), 0) AS total_bytes
+            FROM drive_metadata WHERE account_index = ?
+        ''', (FOLDER_MIME_TYPE, FOLDER_MIME_TYPE, account_index))[0]
+        return {
+            'file_count': row['file_count'] or 0,
+            'folder_count': row['folder_count'] or 0,
+            'total_bytes': row['total_bytes']
+        }
@@ -0,0 +1,86 @@
+"""
+Drive Service Factory - satu discovery document per proses
+- Discovery document Drive v3 di-load dan di-parse sekali
+- Sumber: bundled static document, cache lokal, baru terakhir network
+- Client per akun dibuat dari document yang sama (murah, offline-safe)
+"""
+
+import json
+import threading
+import logging
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from googleapiclient.discovery import build_from_document
+
+try:
+    from googleapiclient.discovery_cache import get_static_doc
+    STATIC_DISCOVERY_AVAILABLE = True
+except ImportError:
+    STATIC_DISCOVERY_AVAILABLE = False
+
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/drive/v3/rest"
+DISCOVERY_CACHE_FILE = Path("config/drive_v3_discovery.json")
+
+class DriveServiceFactory:
+    """Factory untuk Drive v3 service object"""
+
+    def __init__(self, cache_file: Path = DISCOVERY_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self.logger = logging.getLogger(__name__)
+        self._document: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def get_discovery_document(self) -> dict:
+        """Parsed discovery document (di-load sekali per proses)"""
+        if self._document is None:
+            with self._lock:
+                if self._document is None:
+                    self._document = self._load_discovery_document()
+        return self._document
+
+    def _load_discovery_document(self) -> dict:
+        """Load dari bundled document, lalu cache file, lalu network"""
+        if STATIC_DISCOVERY_AVAILABLE:
+            content = get_static_doc('drive', 'v3')
+            if content:
+                self.logger.debug("Using bundled Drive discovery document")
+                return json.loads(content)
+
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    self.logger.debug(f"Using cached Drive discovery document: {self.cache_file}")
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable discovery cache {self.cache_file}: {e}")
+
+        self.logger.info("Fetching Drive discovery document")
+        with urllib.request.urlopen(DISCOVERY_URL, timeout=30) as response:
+            content = response.read().decode('utf-8')
+        document = json.loads(content)
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'w') as f:
+                f.write(content)
+        except OSError as e:
+            self.logger.warning(f"Failed to cache discovery document: {e}")
+
+        return document
+
+    def build_service(self, credentials=None, http=None):
+        """
+        Buat Drive v3 service untuk satu akun
+
+        Args:
+            credentials: google.auth credentials (jika http tidak diberikan)
+            http: Authorized transport (mutually exclusive dengan credentials)
+        """
+        return build_from_document(
+            self.get_discovery_document(), credentials=credentials, http=http
+        )
+
+# Global instance
+drive_service_factory = DriveServiceFactory()
@@ -0,0 +1,97 @@
+"""
+Drive Transport Pool untuk koneksi HTTP keep-alive per akun
+- Satu pool authorized httplib2 connection per akun
+- Ukuran pool mengikuti jumlah upload paralel
+- Timeout terpisah untuk metadata request dan upload
+"""
+
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+
+import httplib2
+import google_auth_httplib2
+
+class DriveTransportPool:
+    """
+    Pool AuthorizedHttp per akun
+
+    httplib2.Http tidak thread-safe, tapi menyimpan koneksi TLS yang sudah
+    terbuka antar request. Setiap worker meminjam satu transport selama
+    request berjalan lalu mengembalikannya, sehingga handshake TLS hanya
+    terjadi sekali per transport selama run berlangsung.
+    """
+
+    def __init__(self, credentials, size: int = 3, connection_timeout: int = 30,
+                 upload_timeout: int = 300):
+        self.credentials = credentials
+        self.size = max(1, size)
+        self.connection_timeout = connection_timeout
+        self.upload_timeout = upload_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._pools = {False: queue.LifoQueue(), True: queue.LifoQueue()}
+        self._created = {False: 0, True: 0}
+        self._lock = threading.Lock()
+
+        # Transport default untuk service object (dipakai jika request tidak diberi http)
+        self.default_http = self._new_http(self.connection_timeout)
+
+    def _new_http(self, timeout: int) -> google_auth_httplib2.AuthorizedHttp:
+        """Buat authorized transport baru dengan socket timeout"""
+        return google_auth_httplib2.AuthorizedHttp(
+            self.credentials, http=httplib2.Http(timeout=timeout)
+        )
+
+    @contextmanager
+    def connection(self, upload: bool = False):
+        """
+        Pinjam transport dari pool
+
+        Args:
+            upload: True untuk media upload/download (pakai upload_timeout)
+        """
+        http = self._acquire(upload)
+        try:
+            yield http
+        finally:
+            self._pools[upload].put(http)
+
+    def _acquire(self, upload: bool) -> google_auth_httplib2.AuthorizedHttp:
+        """Ambil transport idle, buat baru jika pool belum penuh, atau tunggu"""
+        pool = self._pools[upload]
+        try:
+            return pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created[upload] < self.size:
+                self._created[upload] += 1
+                timeout = self.upload_timeout if upload else self.connection_timeout
+                return self._new_http(timeout)
+
+        return pool.get()
+
+    def execute(self, request, upload: bool = False, **kwargs):
+        """Execute HttpRequest googleapiclient dengan transport dari pool"""
+        with self.connection(upload) as http:
+            return request.execute(http=http, **kwargs)
+
+    def close(self):
+        """Tutup semua koneksi yang idle"""
+        for pool in self._pools.values():
+            while True:
+                try:
+                    http = pool.get_nowait()
+                except queue.Empty:
+                    break
+                self._close_http(http)
+        self._close_http(self.default_http)
+
+    def _close_http(self, http):
+        try:
+            http.http.close()
+        except Exception as e:
+            self.logger.debug(f"Failed to close transport: {e}")
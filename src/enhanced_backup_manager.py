@@ -12,16 +12,29 @@ import sqlite3
 import hashlib
 import time
 import asyncio
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 
 from src.enhanced_google_drive_manager import EnhancedGoogleDriveManager
+from src.account_pool import LazyAccount, AccountPool
+from src.quota_tracker import quota_tracker as shared_quota_tracker
+from src.placement_planner import PlacementPlanner, PlacementPlan
+from src.account_health import AccountHealthMonitor, OPEN
+from src.retry_scheduler import RetryScheduler
+from src.chunk_store import ChunkStore
+from src.run_manifest import ManifestCatalog, app_property
+from src.snapshot_index import SnapshotIndex, BACKUP_FOLDER_SQL
+from src.run_controller import RunController, CancellationToken
 from src.utils.network_manager import NetworkManager
 from src.utils.folder_manager import FolderManager  
 from src.utils.enhanced_settings import EnhancedSettings
 from src.utils.file_organizer import FileOrganizer
+from src.utils.compression_manager import CompressionManager
+from src.utils.upload_ordering import UploadCandidate, order_candidates, PRIORITY_USER, PRIORITY_OFFLINE, PRIORITY_RETRY
+from src.utils.offline_spool import OfflineSpool
 
 class EnhancedBackupManager:
     """Enhanced Backup Manager dengan fitur lengkap"""
@@ -29,14 +42,41 @@ class EnhancedBackupManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.settings = EnhancedSettings()
-        self.network_manager = NetworkManager()
+        self.network_manager = NetworkManager(
+            timeout=self.settings.get('network.connection_timeout', 30),
+            probe_interval=self.settings.get('network.probe_interval', 30)
+        )
         self.folder_manager = FolderManager()
         self.file_organizer = FileOrganizer()
-        
-        self.google_accounts: List[EnhancedGoogleDriveManager] = []
+        self.compression_manager = CompressionManager(folder_manager=self.folder_manager)
+        
+        self.google_accounts: List[LazyAccount] = []  # Proxy ke EnhancedGoogleDriveManager
+        self.account_pool: Optional[AccountPool] = None
+        # Dipakai bersama MultipleAccountManager, jadi upload run ini terlihat saat restore
+        self.quota_tracker = shared_quota_tracker
+        self.quota_tracker.ttl_seconds = self.settings.get('storage.quota_refresh_seconds', 300)
+        self.placement_planner = PlacementPlanner()
+        self.health_monitor = AccountHealthMonitor()
         self.db_path = self.settings.get('database_path', 'config/backup_tracking.db')
         
         self._init_database()
+        self.chunk_store = ChunkStore(self.db_path)
+        self.manifest_catalog = ManifestCatalog(self.db_path)
+        self.snapshot_index = SnapshotIndex(self.db_path)
+        self._run_seq: Optional[int] = None  # Run yang sedang berjalan (snapshot index)
+        self._scanned_paths: set = set()  # File yang ada di source folders saat scan
+        self.offline_spool = OfflineSpool(
+            self.db_path,
+            max_bytes=self.settings.get('backup.spool_max_mb', 512) * 1024 * 1024,
+            volatile_patterns=self.settings.get('backup.volatile_patterns')
+        )
+        self._drain_armed = False  # Drain queue terjadwal saat koneksi kembali
+        self._run_token: Optional[CancellationToken] = None  # Token run yang sedang berjalan
+        # Semua run (manual, jadwal, drain offline) lewat sini supaya tidak overlap
+        self.run_controller = RunController(
+            self._run_controlled,
+            lock_path=str(Path(self.db_path).parent / 'backup.lock')
+        )
         self._load_google_accounts()
         
     def _init_database(self):
@@ -65,6 +105,23 @@ class EnhancedBackupManager:
             )
         ''')
         
+        # Compression codec (NULL = uploaded as-is), added after the initial schema
+        self._ensure_column(cursor, 'backed_files', 'compression', 'TEXT')
+        
+        # Upload verification (md5 of the uploaded bytes as reported by Drive)
+        self._ensure_column(cursor, 'backed_files', 'remote_md5', 'TEXT')
+        self._ensure_column(cursor, 'backed_files', 'verification_status', "TEXT DEFAULT 'unverified'")
+        self._ensure_column(cursor, 'backed_files', 'verified_at', 'TIMESTAMP')
+        
+        # Chunk manifest for files stored through the chunk store (NULL = whole file)
+        self._ensure_column(cursor, 'backed_files', 'chunk_manifest_id', 'INTEGER')
+        
+        # Source mtime, ikut di run manifest untuk rebuild katalog
+        self._ensure_column(cursor, 'backed_files', 'file_mtime', 'REAL')
+        
+        # Date folder run tempat file di-upload (retention expire per folder, bukan per backup_date)
+        self._ensure_column(cursor, 'backed_files', 'backup_folder', 'TEXT')
+        
         # Enhanced backup logs table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS backup_logs (
@@ -112,28 +169,81 @@ class EnhancedBackupManager:
         conn.commit()
         conn.close()
         
+    def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """Add column ke table lama yang dibuat sebelum column tersebut ada"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing_columns = [row[1] for row in cursor.fetchall()]
+        
+        if column not in existing_columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        
     def _load_google_accounts(self):
         """Load semua akun Google Drive"""
         accounts_config = self.settings.get('google_accounts', [])
         
         for account_info in accounts_config:
             try:
-                account = EnhancedGoogleDriveManager(
-                    account_index=account_info['index'],
-                    account_name=account_info.get('name', f"Account {account_info['index']}")
+                account_index = account_info['index']
+                account_name = account_info.get('name', f"Account {account_index}")
+                # Authenticate saat pertama dipakai (atau saat warm-up di background)
+                account = LazyAccount(
+                    lambda index=account_index, name=account_name: self._create_account(index, name),
+                    account_index, account_name
                 )
                 self.google_accounts.append(account)
-                self.logger.info(f"Loaded Google account: {account.account_name}")
             except Exception as e:
                 self.logger.error(f"Failed to load account {account_info}: {e}")
+        
+        self.account_pool = AccountPool(
+            self.google_accounts,
+            max_workers=self.settings.get('network.max_concurrent_uploads', 3)
+        )
+        self.account_pool.warm_up()
+        self.account_pool.start_token_refresher()
+        
+    def _create_account(self, account_index: int, account_name: str) -> EnhancedGoogleDriveManager:
+        """Buat dan authenticate EnhancedGoogleDriveManager untuk satu akun"""
+        health = self.health_monitor.get(account_index)
+        try:
+            return EnhancedGoogleDriveManager(
+                account_index=account_index,
+                account_name=account_name,
+                db_path=self.db_path,
+                pool_size=self.settings.get('network.max_concurrent_uploads', 3),
+                connection_timeout=self.settings.get('network.connection_timeout', 30),
+                upload_timeout=self.settings.get('network.upload_timeout', 300),
+                health=health,
+                download_chunk_size=self.settings.get('network.download_chunk_mb', 8) * 1024 * 1024,
+                upload_chunk_size=self.settings.get('network.upload_chunk_mb', 8) * 1024 * 1024,
+                metadata_sync_interval=self.settings.get('storage.metadata_sync_seconds', 60)
+            )
+        except Exception as e:
+            health.record_failure(e)
+            raise
                 
-    async def run_backup_with_progress(self, progress_callback=None) -> Dict:
-        """Jalankan backup dengan progress reporting"""
+    async def _run_controlled(self, token: CancellationToken, folders: Optional[List[str]],
+                              progress_callback, force: bool) -> Dict:
+        """Runner untuk RunController"""
+        return await self.run_backup_with_progress(
+            progress_callback, force=force, folders=folders, token=token
+        )
+        
+    async def run_backup_with_progress(self, progress_callback=None, force: bool = False,
+                                       folders: Optional[List[str]] = None,
+                                       token: Optional[CancellationToken] = None) -> Dict:
+        """
+        Jalankan backup dengan progress reporting
+        
+        Args:
+            force: Jalan walaupun backup hari ini sudah selesai (drain offline queue, jadwal)
+            folders: Hanya source folder ini (None = semua)
+            token: Pause/cancel dari RunController, dicek di antara file dan chunk
+        """
         start_time = datetime.now()
         today = start_time.date()
         
         # Check if backup already completed today
-        if self._is_backup_completed_today():
+        if not force and self._is_backup_completed_today():
             return {
                 'status': 'already_completed',
                 'message': 'Backup already completed today',
@@ -149,30 +259,27 @@ class EnhancedBackupManager:
         
         self.logger.info("Starting enhanced backup process...")
         
-        # Check network connectivity
+        # Offline: scan and queue now, upload as soon as the link is back
+        await self.network_manager.start()
         if not self.network_manager.check_network()['connected']:
-            self._schedule_retry()
-            return {
-                'status': 'network_error',
-                'message': 'No network connection. Backup scheduled for retry.',
-                'total_files': 0,
-                'successful_files': 0,
-                'failed_files': 0,
-                'uploaded_files': 0,
-                'deleted_files': 0,
-                'folders_created': 0,
-                'total_size_mb': 0,
-                'duration_seconds': 0
-            }
+            return await self._run_offline(progress_callback, folders)
+        
+        # Folder listings are fetched at most once per run
+        for account in self.google_accounts:
+            if account.is_ready:
+                account.reset_run_caches()
         
-        # Get files to backup
-        files_to_backup = self._get_files_to_backup()
+        # Get files to backup, most valuable first (scan + hash di worker thread)
+        files_to_backup = await asyncio.to_thread(self._scan_files, folders)
         total_files = len(files_to_backup)
+        run_id = start_time.strftime('%Y-%m-%d_%H%M%S')
+        self._run_seq = self.snapshot_index.begin_run(run_id, start_time)
         
         if progress_callback:
             await progress_callback(f"Found {total_files} files to backup")
         
         if total_files == 0:
+            self._finish_snapshot_run(folders)
             self._mark_backup_completed(today, 0, 0)
             return {
                 'status': 'no_files',
@@ -203,41 +310,137 @@ class EnhancedBackupManager:
         if progress_callback:
             await progress_callback(f"Creating folder: {date_folder_name}")
         
-        # Process files
-        for i, file_path in enumerate(files_to_backup):
+        # Assign files to accounts up front, then create each account's folder tree
+        placement = await asyncio.to_thread(self._plan_placement, files_to_backup, date_folder_name)
+        folder_ids, folders_created = await self._materialize_run_folders(
+            files_to_backup, date_folder_name, placement
+        )
+        
+        # Failed files go to a delayed queue; other files keep uploading meanwhile
+        max_retries = self.settings.get('max_retry_attempts', 3)
+        scheduler = RetryScheduler(self.settings.get('retry_delay_minutes', 5) * 60)
+        
+        for file_path in files_to_backup:
             try:
-                if progress_callback:
-                    progress = (i + 1) / total_files * 100
-                    await progress_callback(f"Processing file {i+1}/{total_files} ({progress:.1f}%)")
+                total_size += file_path.stat().st_size
+            except OSError:
+                pass
+            
+            account_index = placement.account_for(file_path)
+            if account_index is None:
+                # Admission control: never start an upload that cannot fit
+                failed_files += 1
+                self._add_to_retry_queue(str(file_path), 'Insufficient storage on all accounts')
+                continue
+            scheduler.add((file_path, account_index, 0))
+        
+        completed = failed_files
+        started = failed_files
+        
+        # Process files: beberapa worker upload paralel dari RetryScheduler yang sama
+        outage_wait = self.settings.get('network.outage_wait_seconds', 600)
+        token = token or CancellationToken()
+        self._run_token = token
+        
+        async def upload_worker():
+            nonlocal completed, started, successful_files, failed_files, uploaded_files
+            nonlocal deleted_files, retry_attempts, network_issues
+            while True:
+                # Worker berhenti jika tidak ada item siap/tertunda; retry yang
+                # dijadwalkan worker lain tetap diproses oleh worker tersebut
+                item = await token.until_cancelled(scheduler.next())
+                if item is None:
+                    break
+                # Pause/cancel dicek di antara file (dan di antara chunk saat upload)
+                if not await token.checkpoint():
+                    scheduler.add(item)
+                    break
+                file_path, account_index, attempt = item
                 
-                file_size = file_path.stat().st_size
-                total_size += file_size
+                # Pause while the connectivity monitor reports the network down
+                if not self.network_manager.is_connected():
+                    network_issues += 1
+                    self.logger.warning("Network down, pausing uploads")
+                    if progress_callback:
+                        await progress_callback("Network down, waiting for connection...")
+                    restored = await token.until_cancelled(
+                        self.network_manager.wait_for_connectivity(outage_wait)
+                    )
+                    if token.cancelled:
+                        scheduler.add(item)
+                        break
+                    if not restored:
+                        # Outage too long: queue the rest and upload it when the link is back
+                        remaining = [item] + scheduler.drain()
+                        await asyncio.to_thread(
+                            self._queue_files_offline, [pending_path for pending_path, _, _ in remaining]
+                        )
+                        self._arm_offline_drain()
+                        failed_files += len(remaining)
+                        completed += len(remaining)
+                        break
+                    self.logger.info("Network restored, resuming uploads")
                 
-                # Attempt to backup file with retry
-                backup_result = await self._backup_file_with_retry(
-                    file_path, date_folder_name, progress_callback
-                )
+                try:
+                    if progress_callback:
+                        if attempt == 0:
+                            started += 1
+                            progress = started / total_files * 100
+                            await progress_callback(f"Processing file {started}/{total_files} ({progress:.1f}%)")
+                        else:
+                            await progress_callback(f"Retry attempt {attempt} for {file_path.name}")
+                    
+                    backup_result = await self._backup_file_attempt(
+                        file_path, date_folder_name, folder_ids, account_index, attempt
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error processing {file_path}: {e}")
+                    backup_result = {'success': False, 'error': str(e), 'retry': True}
+                
+                if backup_result.get('cancelled'):
+                    # Upload berhenti di batas chunk: file ikut sisa run (tidak dihitung gagal)
+                    scheduler.add(item)
+                    continue
+                
+                if not backup_result['success']:
+                    # Re-probe now so an outage pauses the workers before the next file
+                    self.network_manager.report_failure()
                 
                 if backup_result['success']:
+                    completed += 1
                     successful_files += 1
+                    self._remove_from_retry_queue(str(file_path))
                     if backup_result['uploaded']:
                         uploaded_files += 1
                     if backup_result['deleted']:
                         deleted_files += 1
-                    if backup_result['folder_created']:
-                        folders_created += 1
+                elif backup_result.get('retry') and attempt < max_retries:
+                    # Planned account only applies to the first attempt
+                    retry_attempts += 1
+                    delay = scheduler.defer(
+                        (file_path, None, attempt + 1), attempt + 1,
+                        immediate=backup_result.get('failover', False)
+                    )
+                    self.logger.info(f"Retry {attempt + 1}/{max_retries} for {file_path.name} in {delay:.0f}s")
                 else:
+                    completed += 1
                     failed_files += 1
-                    if 'network' in backup_result.get('error', '').lower():
+                    error = backup_result.get('error', 'Unknown error')
+                    if 'network' in error.lower():
                         network_issues += 1
                     
                     # Add to retry queue
-                    self._add_to_retry_queue(str(file_path), backup_result.get('error', 'Unknown error'))
-                    
-            except Exception as e:
-                self.logger.error(f"Error processing {file_path}: {e}")
-                failed_files += 1
-                self._add_to_retry_queue(str(file_path), str(e))
+                    self._add_to_retry_queue(str(file_path), error)
+        
+        workers = max(1, min(self.settings.get('network.max_concurrent_uploads', 3), len(scheduler)))
+        await asyncio.gather(*(upload_worker() for _ in range(workers)))
+        
+        self._run_token = None
+        cancelled = token.cancelled
+        if cancelled:
+            # Sisa file tidak dihitung gagal: run berikutnya mengambilnya lagi
+            remaining = scheduler.drain()
+            self.logger.info(f"Backup cancelled, {len(remaining)} files left for the next run")
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -251,10 +454,25 @@ class EnhancedBackupManager:
         )
         
         # Mark daily backup status
-        self._mark_backup_completed(today, successful_files, total_size_mb)
+        self._finish_snapshot_run(folders)
+        if not cancelled:
+            self._mark_backup_completed(today, successful_files, total_size_mb)
+            
+            # Remove expired date folders (batched deletes per account)
+            await asyncio.to_thread(self.apply_retention_policy)
+        
+        # Katalog run ini ikut disimpan di Drive untuk rebuild di device baru
+        if self.settings.get('backup.publish_manifests', True):
+            try:
+                await self.manifest_catalog.publish_run(self.google_accounts, run_id, start_time)
+            except Exception as e:
+                self.logger.error(f"Failed to publish run manifest: {e}")
+        
+        # Refresh metadata mirror supaya listing (bot/restore) melihat run ini
+        await asyncio.to_thread(self.sync_metadata_mirrors)
         
         summary = {
-            'status': 'completed',
+            'status': 'cancelled' if cancelled else 'completed',
             'total_files': total_files,
             'successful_files': successful_files,
             'failed_files': failed_files,
@@ -270,121 +488,411 @@ class EnhancedBackupManager:
         self.logger.info(f"Backup completed: {summary}")
         return summary
         
-    async def _backup_file_with_retry(self, file_path: Path, date_folder: str, 
-                                    progress_callback=None) -> Dict:
-        """Backup file dengan retry mechanism"""
-        max_retries = self.settings.get('max_retry_attempts', 3)
-        retry_delay = self.settings.get('retry_delay_minutes', 5) * 60
+    def _get_folder_path(self, file_path: Path, date_folder: str) -> Tuple[str, str]:
+        """Remote folder (Date/Category) untuk sebuah file"""
+        file_type = self.folder_manager.get_file_category(file_path)
+        return f"{date_folder}/{file_type}", file_type
         
-        for attempt in range(max_retries + 1):
+    def _plan_placement(self, files_to_backup: List[Path], date_folder: str) -> PlacementPlan:
+        """Bin-pack file run ini ke akun berdasarkan quota model"""
+        items = []
+        for file_path in files_to_backup:
             try:
-                if attempt > 0:
-                    if progress_callback:
-                        await progress_callback(f"Retry attempt {attempt} for {file_path.name}")
-                    
-                    # Wait before retry
-                    await asyncio.sleep(retry_delay)
-                    
-                    # Check network again
-                    if not self.network_manager.check_network()['connected']:
+                size = file_path.stat().st_size
+            except OSError:
+                size = 0
+            items.append((file_path, self._get_folder_path(file_path, date_folder)[0], size))
+        
+        # Akun dengan circuit open tidak mendapat file di plan ini
+        capacities = {
+            account.account_index: self.quota_tracker.available_bytes(account)
+            for account in self.google_accounts
+            if self.health_monitor.is_available(account.account_index)
+        }
+        
+        plan = self.placement_planner.plan(items, capacities)
+        self.logger.info(f"Placement plan: {plan.summary()}")
+        return plan
+        
+    async def _materialize_run_folders(self, files_to_backup: List[Path], date_folder: str,
+                                       placement: PlacementPlan = None) -> Tuple[Dict[int, Dict[str, str]], int]:
+        """
+        Buat seluruh folder tree untuk run ini sebelum upload
+        
+        Semua (date, category) yang dibutuhkan dihitung dari daftar file per
+        akun tujuan, folder yang belum ada dibuat dalam batch per level, dan
+        listing folder-folder tersebut di-prefetch sekaligus. Upload worker
+        lalu hanya butuh satu API call per file.
+        
+        Returns:
+            tuple: ({account_index: {folder_path: folder_id}}, jumlah folder baru)
+        """
+        paths_by_account: Dict[int, set] = {}
+        if placement:
+            for file_path in files_to_backup:
+                account_index = placement.account_for(file_path)
+                if account_index is not None:
+                    paths_by_account.setdefault(account_index, set()).add(
+                        self._get_folder_path(file_path, date_folder)[0]
+                    )
+        else:
+            account = await asyncio.to_thread(self._get_best_account)
+            if account:
+                paths_by_account[account.account_index] = {
+                    self._get_folder_path(f, date_folder)[0] for f in files_to_backup
+                }
+        
+        folder_ids: Dict[int, Dict[str, str]] = {}
+        folders_created = 0
+        accounts = {account.account_index: account for account in self.google_accounts}
+        
+        for account_index, paths in paths_by_account.items():
+            account = accounts.get(account_index)
+            if not account:
+                continue
+            folder_paths = sorted(paths)
+            try:
+                if not account.is_ready:
+                    # Authenticate (atau tunggu warm-up) di luar event loop
+                    await asyncio.to_thread(account.get)
+                created_before = account.created_folder_count
+                ids = await account.ensure_folder_structures(folder_paths)
+                await asyncio.to_thread(account.prefetch_folder_listings, list(ids.values()))
+            except Exception as e:
+                self.logger.error(f"Failed to materialize folders on {account.account_name}: {e}")
+                continue
+            
+            folder_ids[account.account_index] = ids
+            folders_created += account.created_folder_count - created_before
+            self.logger.info(f"Prepared {len(ids)}/{len(folder_paths)} folders on {account.account_name}")
+        
+        return folder_ids, folders_created
+        
+    async def _backup_file_attempt(self, file_path: Path, date_folder: str,
+                                   folder_ids: Dict[int, Dict[str, str]] = None,
+                                   account_index: int = None, attempt: int = 0) -> Dict:
+        """
+        Satu percobaan backup sebuah file
+        
+        Tidak pernah menunggu: kegagalan yang layak di-retry ditandai
+        'retry' dan dijadwalkan ulang oleh RetryScheduler di run loop.
+        'failover' berarti circuit akun barusan terbuka sehingga retry
+        boleh langsung jalan di akun lain.
+        """
+        account = None
+        try:
+            # Original gone (rotated/volatile file): upload the copy staged while offline
+            source_path = file_path if file_path.exists() else self.offline_spool.staged_path(str(file_path))
+            if source_path is None:
+                self._remove_from_retry_queue(str(file_path))
+                return {
+                    'success': False,
+                    'error': 'Source file no longer exists',
+                    'uploaded': False,
+                    'deleted': False,
+                    'folder_created': False
+                }
+            
+            # Chunked files go back to the account already holding their chunks
+            use_chunk_store = source_path == file_path and self._use_chunk_store(file_path)
+            if use_chunk_store:
+                chunk_account_index = self.chunk_store.last_account_index(file_path)
+                if chunk_account_index is not None:
+                    account_index = chunk_account_index
+            
+            # versioning_mode revisions: versi baru jadi revision dari Drive file yang sudah ada
+            revision_target = None
+            if not use_chunk_store and self.settings.get('backup.versioning_mode', 'revisions') == 'revisions':
+                revision_target = await asyncio.to_thread(self._revision_target, str(file_path))
+                if revision_target:
+                    account_index = revision_target['google_account_index']
+            
+            # Planned account on the first attempt, best available on retries
+            if ((attempt == 0 or use_chunk_store or revision_target) and account_index is not None and
+                    self.health_monitor.allow_request(account_index)):
+                account = next((a for a in self.google_accounts if a.account_index == account_index), None)
+            if not account:
+                account = await asyncio.to_thread(self._get_best_account, source_path.stat().st_size)
+            if revision_target and account and account.account_index != revision_target['google_account_index']:
+                # Akun pemilik file tidak tersedia: simpan sebagai object baru di akun lain
+                revision_target = None
+            if not account:
+                return {
+                    'success': False,
+                    'error': 'No available Google accounts',
+                    'uploaded': False,
+                    'deleted': False,
+                    'folder_created': False
+                }
+            if not account.is_ready:
+                # Authenticate (atau tunggu warm-up) di luar event loop
+                await asyncio.to_thread(account.get)
+            
+            if use_chunk_store:
+                return await self._backup_file_chunked(account, file_path, date_folder)
+            
+            # Organize file by type: Date/FileType/
+            folder_path, file_type = self._get_folder_path(file_path, date_folder)
+            
+            # Folder IDs come from the run plan; fall back for accounts outside it
+            folder_id = (folder_ids or {}).get(account.account_index, {}).get(folder_path)
+            if not folder_id:
+                folder_id = await account.ensure_folder_structure(folder_path)
+            
+            if not folder_id:
+                return {
+                    'success': False,
+                    'error': 'Failed to create folder structure',
+                    'uploaded': False,
+                    'deleted': False,
+                    'folder_created': False
+                }
+            
+            # Compress text-heavy files before upload
+            upload_path = source_path
+            remote_name = file_path.name
+            compression = None
+            if (self.settings.get('backup.compress_files', False) and
+                    self.compression_manager.should_compress(source_path)):
+                compressed = await asyncio.to_thread(self.compression_manager.compress_file, source_path)
+                if compressed:
+                    upload_path = compressed['path']
+                    remote_name = file_path.name + compressed['remote_suffix']
+                    compression = compressed['codec']
+            
+            # Upload file
+            keep_forever = self.settings.get('backup.keep_revision_forever', False)
+            try:
+                upload_start = time.monotonic()
+                uploaded = await account.upload_file_with_metadata(
+                    str(upload_path), folder_id, remote_name, folder_path,
+                    app_properties=self._source_app_properties(file_path, source_path),
+                    token=self._run_token,
+                    file_id=revision_target['google_file_id'] if revision_target else None,
+                    keep_revision_forever=keep_forever
+                )
+                google_file_id = uploaded.get('id') if uploaded else None
+                if google_file_id:
+                    self.compression_manager.record_link_speed(
+                        upload_path.stat().st_size, time.monotonic() - upload_start
+                    )
+                    # Hash the bytes that were actually sent (compressed or not)
+                    local_md5 = await asyncio.to_thread(self._calculate_file_hash, upload_path)
+                    local_size = upload_path.stat().st_size
+                    self.quota_tracker.record_upload(account.account_index, local_size)
+            finally:
+                if compression:
+                    self.compression_manager.cleanup(upload_path)
+            
+            if google_file_id:
+                # Update in-place: object tetap di folder asalnya (fallback 404 = object baru hari ini)
+                backup_folder = date_folder
+                if revision_target and google_file_id == revision_target['google_file_id']:
+                    folder_id = revision_target['google_folder_id']
+                    backup_folder = revision_target['backup_folder']
+                
+                verification_status = 'unverified'
+                if self.settings.get('backup.verify_uploads', True):
+                    verification_status = self._verify_upload(uploaded, local_md5, local_size)
+                    if verification_status == 'mismatch':
+                        self.logger.error(f"Checksum mismatch after upload: {file_path}")
                         return {
                             'success': False,
-                            'error': 'Network connection lost',
-                            'uploaded': False,
+                            'error': 'Checksum mismatch after upload',
+                            'retry': True,
+                            'uploaded': True,
                             'deleted': False,
                             'folder_created': False
                         }
                 
-                # Get best available account
-                account = self._get_best_account()
-                if not account:
-                    return {
-                        'success': False,
-                        'error': 'No available Google accounts',
-                        'uploaded': False,
-                        'deleted': False,
-                        'folder_created': False
-                    }
-                
-                # Organize file by type
-                file_type = self.file_organizer.get_file_type(file_path)
-                
-                # Create folder structure: Date/FileType/
-                folder_path = f"{date_folder}/{file_type}"
-                folder_id = await account.ensure_folder_structure(folder_path)
-                
-                if not folder_id:
-                    return {
-                        'success': False,
-                        'error': 'Failed to create folder structure',
-                        'uploaded': False,
-                        'deleted': False,
-                        'folder_created': False
-                    }
+                # Versi sebelumnya kini revision lama dari file yang sama: pin supaya tetap bisa di-restore
+                if not keep_forever:
+                    await self._pin_superseded_revision(
+                        account, str(file_path), google_file_id, uploaded.get('headRevisionId')
+                    )
                 
-                # Upload file
-                google_file_id = await account.upload_file_to_folder(
-                    str(file_path), folder_id, file_path.name
+                # Record successful backup (hash file asli dihitung ulang jika dikompres)
+                await asyncio.to_thread(
+                    self._record_backup,
+                    str(file_path), source_path, account.account_index,
+                    google_file_id, folder_id, file_type, compression,
+                    file_hash=None if compression else local_md5,
+                    remote_md5=uploaded.get('md5Checksum'),
+                    verification_status=verification_status,
+                    revision_id=uploaded.get('headRevisionId'),
+                    backup_folder=backup_folder,
+                    pinned=keep_forever
                 )
+                self.offline_spool.release(str(file_path))
                 
-                if google_file_id:
-                    # Record successful backup
-                    self._record_backup(
-                        str(file_path), file_path, account.account_index,
-                        google_file_id, folder_id, file_type
-                    )
-                    
-                    # Delete original file if setting enabled
-                    deleted = False
-                    if self.settings.get('auto_delete_after_upload', True):
-                        try:
-                            file_path.unlink()
-                            deleted = True
-                            self.logger.info(f"Deleted original file: {file_path}")
-                        except Exception as e:
-                            self.logger.warning(f"Failed to delete {file_path}: {e}")
+                # Delete original file only after a verified checksum match
+                deleted = False
+                if (self.settings.get('auto_delete_after_upload', True) and
+                        verification_status == 'verified' and source_path == file_path):
+                    try:
+                        file_path.unlink()
+                        deleted = True
+                        self.snapshot_index.mark_deleted_locally(str(file_path))
+                        self.logger.info(f"Deleted original file: {file_path}")
+                    except Exception as e:
+                        self.logger.warning(f"Failed to delete {file_path}: {e}")
+                
+                return {
+                    'success': True,
+                    'uploaded': True,
+                    'deleted': deleted,
+                    'folder_created': True,
+                    'account': account.account_name,
+                    'folder': folder_path
+                }
+            elif self._run_token and self._run_token.cancelled:
+                return {
+                    'success': False,
+                    'cancelled': True,
+                    'uploaded': False,
+                    'deleted': False,
+                    'folder_created': False
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Upload failed',
+                    'retry': True,
+                    'failover': self._circuit_opened(account),
+                    'uploaded': False,
+                    'deleted': False,
+                    'folder_created': False
+                }
                     
-                    return {
-                        'success': True,
-                        'uploaded': True,
-                        'deleted': deleted,
-                        'folder_created': True,
-                        'account': account.account_name,
-                        'folder': folder_path
-                    }
-                else:
-                    if attempt == max_retries:
-                        return {
-                            'success': False,
-                            'error': f'Upload failed after {max_retries + 1} attempts',
-                            'uploaded': False,
-                            'deleted': False,
-                            'folder_created': False
-                        }
-                        
+        except Exception as e:
+            self.logger.error(f"Backup attempt {attempt + 1} failed for {file_path}: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry': True,
+                'failover': self._circuit_opened(account),
+                'uploaded': False,
+                'deleted': False,
+                'folder_created': False
+            }
+    
+    async def _pin_superseded_revision(self, account, file_path: str, google_file_id: str,
+                                       head_revision_id: Optional[str]):
+        """
+        Pin revision versi live sebelumnya yang baru ditimpa update in-place
+        
+        Hanya revision yang masih dirujuk snapshot index yang di-pin (batas
+        Drive 200 per file); retention melepasnya lagi saat versinya expired.
+        """
+        previous = await asyncio.to_thread(self.snapshot_index.live_revision, file_path, google_file_id)
+        if not previous or previous['pinned'] or previous['revision_id'] == head_revision_id:
+            return
+        
+        revision = (google_file_id, previous['revision_id'])
+        results = await asyncio.to_thread(account.set_revisions_keep_forever, [revision], True)
+        if results.get(revision):
+            await asyncio.to_thread(self.snapshot_index.mark_pinned, [previous['id']])
+        else:
+            self.logger.warning(f"Failed to pin previous revision of {file_path}, Drive may purge it")
+        
+    def _use_chunk_store(self, file_path: Path) -> bool:
+        """Cek apakah file di-backup lewat chunk store"""
+        if not self.settings.get('backup.chunked_backend', False):
+            return False
+        min_size = self.settings.get('backup.chunked_min_size_mb', 64) * 1024 * 1024
+        try:
+            return file_path.stat().st_size >= min_size
+        except OSError:
+            return False
+        
+    async def _backup_file_chunked(self, account, file_path: Path, date_folder: str) -> Dict:
+        """Backup file besar sebagai chunk; hanya chunk yang berubah di-upload"""
+        _, file_type = self._get_folder_path(file_path, date_folder)
+        
+        result = await self.chunk_store.backup_file(account, file_path, token=self._run_token)
+        if not result and self._run_token and self._run_token.cancelled:
+            return {
+                'success': False,
+                'cancelled': True,
+                'uploaded': False,
+                'deleted': False,
+                'folder_created': False
+            }
+        if not result:
+            return {
+                'success': False,
+                'error': 'Chunk upload failed',
+                'retry': True,
+                'failover': self._circuit_opened(account),
+                'uploaded': False,
+                'deleted': False,
+                'folder_created': False
+            }
+        
+        # Every new chunk was checked against Drive's md5Checksum before it was stored
+        self.quota_tracker.record_upload(account.account_index, result['uploaded_bytes'])
+        verification_status = 'verified'
+        await asyncio.to_thread(
+            self._record_backup,
+            str(file_path), file_path, account.account_index,
+            None, None, file_type,
+            file_hash=result['file_hash'],
+            verification_status=verification_status,
+            chunk_manifest_id=result['manifest_id']
+        )
+        
+        deleted = False
+        if (self.settings.get('auto_delete_after_upload', True) and
+                verification_status == 'verified'):
+            try:
+                file_path.unlink()
+                deleted = True
+                self.snapshot_index.mark_deleted_locally(str(file_path))
+                self.logger.info(f"Deleted original file: {file_path}")
             except Exception as e:
-                self.logger.error(f"Backup attempt {attempt + 1} failed for {file_path}: {e}")
-                if attempt == max_retries:
-                    return {
-                        'success': False,
-                        'error': str(e),
-                        'uploaded': False,
-                        'deleted': False,
-                        'folder_created': False
-                    }
+                self.logger.warning(f"Failed to delete {file_path}: {e}")
         
         return {
-            'success': False,
-            'error': 'Max retries exceeded',
-            'uploaded': False,
-            'deleted': False,
-            'folder_created': False
+            'success': True,
+            'uploaded': True,
+            'deleted': deleted,
+            'folder_created': False,
+            'account': account.account_name,
+            'folder': None
         }
         
-    def _get_files_to_backup(self) -> List[Path]:
-        """Get files yang perlu di-backup"""
+    def _circuit_opened(self, account) -> bool:
+        """True jika kegagalan barusan membuka circuit akun tersebut"""
+        if account is None:
+            return False
+        return self.health_monitor.get(account.account_index).state == OPEN
+        
+    def _verify_upload(self, uploaded: Dict, local_md5: str, local_size: int) -> str:
+        """
+        Bandingkan md5Checksum dan size dari response upload dengan file lokal
+        
+        Returns:
+            str: 'verified', 'mismatch' atau 'unverified' (Drive tidak memberi checksum)
+        """
+        remote_md5 = uploaded.get('md5Checksum')
+        remote_size = uploaded.get('size')
+        
+        if not remote_md5 or not local_md5:
+            return 'unverified'
+        
+        if remote_md5 != local_md5:
+            return 'mismatch'
+        
+        if remote_size is not None and int(remote_size) != local_size:
+            return 'mismatch'
+        
+        return 'verified'
+        
+    def _get_files_to_backup(self, folders: Optional[List[str]] = None) -> List[Path]:
+        """Get files yang perlu di-backup (folders = subset source folder, None = semua)"""
         files_to_backup = []
-        source_folders = self.settings.get('source_folders', [])
+        self._scanned_paths = set()
+        source_folders = folders or self.settings.get('source_folders', [])
         allowed_extensions = self.settings.get('allowed_extensions', [])
         max_file_size = self.settings.get('max_file_size_mb', 100) * 1024 * 1024
         
@@ -399,18 +907,61 @@ class EnhancedBackupManager:
                     if file_path.suffix.lower() not in allowed_extensions:
                         continue
                     
-                    # Check size
-                    if file_path.stat().st_size > max_file_size:
+                    # Check size (the chunk store only uploads changed chunks)
+                    if file_path.stat().st_size > max_file_size and not self._use_chunk_store(file_path):
                         continue
                     
+                    self._scanned_paths.add(str(file_path))
+                    
                     # Check if already backed up
                     if not self._should_backup_file(file_path):
                         continue
                     
                     files_to_backup.append(file_path)
         
+        # Copies staged while offline whose original has since been rotated away
+        files_to_backup.extend(Path(source) for source in self.offline_spool.orphaned_sources())
+        
         return files_to_backup
         
+    def _scan_files(self, folders: Optional[List[str]] = None) -> List[Path]:
+        """File yang perlu di-backup, sudah diurutkan (blocking: jalankan di worker thread)"""
+        return self._order_files(self._get_files_to_backup(folders))
+        
+    def _order_files(self, files: List[Path]) -> List[Path]:
+        """Urutkan file sesuai backup.upload_order"""
+        queue_priorities = self._get_queue_priorities()
+        # Request "backup folder ini sekarang" berlaku untuk semua file di bawahnya
+        queue_folders = {path: priority for path, priority in queue_priorities.items() if Path(path).is_dir()}
+        folder_priorities = self.settings.get('backup.folder_priorities', {}) or {}
+        candidates = [
+            UploadCandidate.from_path(f, queue_priorities, folder_priorities, queue_folders) for f in files
+        ]
+        ordered = order_candidates(candidates, self.settings.get('backup.upload_order', 'user_first'))
+        for folder in queue_folders:
+            self._remove_from_retry_queue(folder)
+        return [candidate.path for candidate in ordered]
+        
+    def _get_queue_priorities(self) -> Dict[str, int]:
+        """Priority tertinggi per file dari backup_queue"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT file_path, MAX(priority) FROM backup_queue GROUP BY file_path")
+        priorities = {row[0]: row[1] or 0 for row in cursor.fetchall()}
+        conn.close()
+        return priorities
+        
+    def request_priority_backup(self, file_path: str, priority: int = PRIORITY_USER):
+        """Tandai file (atau semua file dalam folder) agar di-upload lebih dulu pada run berikutnya"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO backup_queue (file_path, retry_count, priority)
+            VALUES (?, 0, ?)
+        ''', (str(file_path), priority))
+        conn.commit()
+        conn.close()
+        
     def _should_backup_file(self, file_path: Path) -> bool:
         """Check apakah file perlu di-backup"""
         conn = sqlite3.connect(self.db_path)
@@ -435,6 +986,24 @@ class EnhancedBackupManager:
         conn.close()
         return True
         
+    def _revision_target(self, file_path: str) -> Optional[Dict]:
+        """Drive file (bukan chunked) yang menyimpan versi terakhir file ini"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT google_account_index, google_file_id, google_folder_id,
+                   {BACKUP_FOLDER_SQL} AS backup_folder
+            FROM backed_files
+            WHERE file_path = ? AND upload_status = 'completed'
+              AND google_file_id IS NOT NULL AND chunk_manifest_id IS NULL
+        ''', (file_path,))
+        result = cursor.fetchone()
+        conn.close()
+        
+        return dict(result) if result else None
+        
     def _calculate_file_hash(self, file_path: Path) -> str:
         """Calculate MD5 hash of file"""
         hash_md5 = hashlib.md5()
@@ -446,44 +1015,68 @@ class EnhancedBackupManager:
         except Exception:
             return ""
             
-    def _get_best_account(self) -> Optional[EnhancedGoogleDriveManager]:
-        """Get akun dengan storage terbanyak"""
-        best_account = None
-        max_available = 0
-        
-        for account in self.google_accounts:
-            try:
-                storage_info = account.get_storage_usage()
-                if storage_info and storage_info['available_gb'] > max_available:
-                    max_available = storage_info['available_gb']
-                    best_account = account
-            except Exception as e:
-                self.logger.error(f"Error checking storage for {account.account_name}: {e}")
+    def _get_best_account(self, required_bytes: int = 0) -> Optional[EnhancedGoogleDriveManager]:
+        """Get akun sehat dengan storage terbanyak (dari quota model, bukan API call per file)"""
+        return self.quota_tracker.best_account(
+            self.google_accounts, required_bytes, self.health_monitor.allow_request
+        )
         
-        return best_account
+    def get_account_health(self) -> List[Dict]:
+        """Health score dan status circuit breaker per akun"""
+        return self.health_monitor.snapshot()
         
     def _record_backup(self, file_path: str, original_path: Path, account_index: int,
-                      google_file_id: str, folder_id: str, file_type: str):
+                      google_file_id: str, folder_id: str, file_type: str,
+                      compression: str = None, file_hash: str = None,
+                      remote_md5: str = None, verification_status: str = 'unverified',
+                      chunk_manifest_id: int = None, revision_id: str = None,
+                      backup_folder: str = None, pinned: bool = False):
         """Record backup success to database"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        file_hash = self._calculate_file_hash(original_path)
-        file_size = original_path.stat().st_size
+        if not file_hash:
+            file_hash = self._calculate_file_hash(original_path)
+        stat = original_path.stat()
+        file_size = stat.st_size
+        verified_at = datetime.now() if verification_status == 'verified' else None
         
         cursor.execute('''
             INSERT OR REPLACE INTO backed_files 
-            (file_path, original_path, file_hash, file_size, file_type, backup_date, 
-             google_account_index, google_file_id, google_folder_id, upload_status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (file_path, original_path, file_hash, file_size, file_mtime, file_type, backup_date, 
+             google_account_index, google_file_id, google_folder_id, upload_status,
+             compression, remote_md5, verification_status, verified_at, chunk_manifest_id,
+             backup_folder)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            file_path, str(original_path), file_hash, file_size, file_type,
-            datetime.now(), account_index, google_file_id, folder_id, 'completed'
+            file_path, file_path, file_hash, file_size, stat.st_mtime, file_type,
+            datetime.now(), account_index, google_file_id, folder_id, 'completed',
+            compression, remote_md5, verification_status, verified_at, chunk_manifest_id,
+            backup_folder
         ))
         
         conn.commit()
         conn.close()
         
+        if self._run_seq is not None:
+            self.snapshot_index.record_version(
+                self._run_seq, file_path, file_hash, file_size, stat.st_mtime, datetime.now(),
+                account_index, google_file_id, folder_id, compression, chunk_manifest_id,
+                revision_id, backup_folder, pinned
+            )
+            
+    def _finish_snapshot_run(self, folders: Optional[List[str]] = None):
+        """Tutup run di snapshot index (file yang hilang dari source berakhir di run ini)"""
+        if self._run_seq is None:
+            return
+        # Hanya folder yang di-scan run ini; folder lain tidak boleh dianggap hilang
+        source_folders = [
+            str(Path(folder)) for folder in (folders or self.settings.get('source_folders', []))
+            if Path(folder).exists()
+        ]
+        self.snapshot_index.finish_run(self._run_seq, source_folders, self._scanned_paths)
+        self._run_seq = None
+        
     def _is_backup_completed_today(self) -> bool:
         """Check apakah backup hari ini sudah selesai"""
         today = datetime.now().date()
@@ -514,31 +1107,93 @@ class EnhancedBackupManager:
         conn.commit()
         conn.close()
         
-    def _schedule_retry(self):
-        """Schedule backup retry untuk besok"""
-        tomorrow = datetime.now() + timedelta(days=1)
-        retry_time = tomorrow.replace(
-            hour=int(self.settings.get('backup_time', '00:00').split(':')[0]),
-            minute=int(self.settings.get('backup_time', '00:00').split(':')[1]),
-            second=0,
-            microsecond=0
-        )
+    async def _run_offline(self, progress_callback=None, folders: Optional[List[str]] = None) -> Dict:
+        """
+        Offline: scan dan queue semua file, copy file volatile ke spool
         
-        today = datetime.now().date()
+        Queue di-upload otomatis saat connectivity monitor melaporkan up,
+        jadi outage hanya menunda upload.
+        """
+        self.logger.warning("No network connection, queuing files until it returns")
+        files_to_backup = await asyncio.to_thread(self._scan_files, folders)
+        spooled_files = await asyncio.to_thread(self._queue_files_offline, files_to_backup)
+        
+        self._arm_offline_drain()
+        
+        if progress_callback:
+            await progress_callback(
+                f"Offline: {len(files_to_backup)} files queued, upload starts when the network is back"
+            )
         
+        return {
+            'status': 'offline_queued',
+            'message': 'No network connection. Files queued for upload when connectivity returns.',
+            'total_files': len(files_to_backup),
+            'queued_files': len(files_to_backup),
+            'spooled_files': spooled_files,
+            'successful_files': 0,
+            'failed_files': 0,
+            'uploaded_files': 0,
+            'deleted_files': 0,
+            'folders_created': 0,
+            'total_size_mb': 0,
+            'duration_seconds': 0
+        }
+        
+    def _queue_files_offline(self, files: List[Path]) -> int:
+        """Queue file untuk drain offline, copy file volatile ke spool; return jumlah yang di-spool"""
+        spooled_files = 0
+        for file_path in files:
+            self._queue_offline(file_path)
+            if file_path.exists() and self.offline_spool.is_volatile(file_path):
+                if self.offline_spool.stage(file_path):
+                    spooled_files += 1
+        return spooled_files
+        
+    def _queue_offline(self, file_path: Path):
+        """Masukkan file ke backup_queue (sekali per path)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
         cursor.execute('''
-            INSERT OR REPLACE INTO daily_status 
-            (date, backup_completed, issues_encountered, next_retry_time)
-            VALUES (?, ?, ?, ?)
-        ''', (today, False, "Network connection failed", retry_time))
-        
+            INSERT INTO backup_queue (file_path, retry_count, last_attempt, error_message, priority)
+            SELECT ?, 0, ?, 'Offline: waiting for network', ?
+            WHERE NOT EXISTS (SELECT 1 FROM backup_queue WHERE file_path = ?)
+        ''', (str(file_path), datetime.now(), PRIORITY_OFFLINE, str(file_path)))
         conn.commit()
         conn.close()
         
-        self.logger.info(f"Backup rescheduled for {retry_time}")
+    def _arm_offline_drain(self):
+        """Jalankan backup sekali lagi begitu connectivity monitor melaporkan up"""
+        if self._drain_armed:
+            return
+        
+        loop = asyncio.get_running_loop()
+        monitor = self.network_manager.monitor
+        
+        once = threading.Lock()
+        
+        def schedule_drain():
+            # Event monitor dan cek is_up() di bawah bisa sama-sama terjadi, drain sekali saja
+            if once.acquire(blocking=False):
+                monitor.unsubscribe(on_change)
+                loop.call_soon_threadsafe(lambda: loop.create_task(self._drain_offline_queue()))
+        
+        def on_change(is_up: bool):
+            if is_up:
+                schedule_drain()
+        
+        self._drain_armed = True
+        monitor.subscribe(on_change)
+        # Link bisa sudah kembali sebelum subscribe: tidak akan ada event lagi
+        if monitor.is_up():
+            schedule_drain()
+        
+    async def _drain_offline_queue(self):
+        """Upload semua yang di-queue selama offline"""
+        self._drain_armed = False
+        self.logger.info("Network restored, draining offline backup queue")
+        run, _ = self.run_controller.start(source='offline_drain', force=True, join_active=False)
+        await run.wait()
         
     def _add_to_retry_queue(self, file_path: str, error_message: str):
         """Add file to retry queue"""
@@ -547,10 +1202,18 @@ class EnhancedBackupManager:
         
         cursor.execute('''
             INSERT INTO backup_queue 
-            (file_path, retry_count, last_attempt, error_message)
-            VALUES (?, 0, ?, ?)
-        ''', (file_path, datetime.now(), error_message))
+            (file_path, retry_count, last_attempt, error_message, priority)
+            VALUES (?, 0, ?, ?, ?)
+        ''', (file_path, datetime.now(), error_message, PRIORITY_RETRY))
+        
+        conn.commit()
+        conn.close()
         
+    def _remove_from_retry_queue(self, file_path: str):
+        """Hapus entry backup_queue file yang sudah berhasil di-backup"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM backup_queue WHERE file_path = ?", (file_path,))
         conn.commit()
         conn.close()
         
@@ -577,6 +1240,199 @@ class EnhancedBackupManager:
         conn.commit()
         conn.close()
         
+    async def run_verification_audit(self, sample_size: int = None,
+                                     min_age_days: int = None) -> Dict:
+        """
+        Re-verify sampel acak backup lama lewat metadata Drive (tanpa download)
+        
+        Sampel dikelompokkan per akun dan folder, lalu setiap folder di-list
+        dengan batched files.list dan checksum-nya dibandingkan dengan yang
+        tercatat di database.
+        
+        Returns:
+            dict: Jumlah file yang dicek, cocok, mismatch dan hilang
+        """
+        sample_size = sample_size or self.settings.get('backup.audit_sample_size', 50)
+        min_age_days = min_age_days if min_age_days is not None else \
+            self.settings.get('backup.audit_min_age_days', 1)
+        cutoff = datetime.now() - timedelta(days=min_age_days)
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, google_account_index, google_file_id, google_folder_id,
+                   file_hash, remote_md5, compression
+            FROM backed_files
+            WHERE upload_status = 'completed' AND backup_date < ?
+              AND chunk_manifest_id IS NULL
+            ORDER BY RANDOM()
+            LIMIT ?
+        ''', (cutoff, sample_size))
+        sample = cursor.fetchall()
+        conn.close()
+        
+        summary = {'checked': 0, 'verified': 0, 'mismatch': 0, 'missing': 0}
+        if not sample:
+            return summary
+        
+        accounts = {account.account_index: account for account in self.google_accounts}
+        by_account: Dict[int, List[tuple]] = {}
+        for row in sample:
+            by_account.setdefault(row[1], []).append(row)
+        
+        updates = []
+        for account_index, rows in by_account.items():
+            account = accounts.get(account_index)
+            if not account:
+                continue
+            
+            folder_ids = sorted({row[3] for row in rows if row[3]})
+            try:
+                listings = await asyncio.to_thread(account.list_folders_metadata, folder_ids)
+            except Exception as e:
+                self.logger.error(f"Audit listing failed for {account.account_name}: {e}")
+                continue
+            
+            for row_id, _, google_file_id, folder_id, file_hash, remote_md5, compression in rows:
+                if folder_id not in listings:
+                    continue  # Listing gagal, coba lagi di audit berikutnya
+                
+                remote = next((item for item in listings[folder_id] if item['id'] == google_file_id), None)
+                expected_md5 = remote_md5 or (None if compression else file_hash)
+                
+                if remote is None:
+                    status = 'missing'
+                elif expected_md5 and remote.get('md5Checksum') == expected_md5:
+                    status = 'verified'
+                else:
+                    status = 'mismatch'
+                
+                summary['checked'] += 1
+                summary[status] += 1
+                updates.append((status, datetime.now(), row_id))
+        
+        if updates:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE backed_files SET verification_status = ?, verified_at = ? WHERE id = ?",
+                updates
+            )
+            conn.commit()
+            conn.close()
+        
+        if summary['mismatch'] or summary['missing']:
+            self.logger.warning(f"Verification audit found problems: {summary}")
+        else:
+            self.logger.info(f"Verification audit passed: {summary}")
+        return summary
+        
+    async def run_verification_audit_loop(self):
+        """Background job: jalankan audit secara berkala"""
+        interval = self.settings.get('backup.audit_interval_hours', 24) * 3600
+        if not interval:
+            return  # audit_interval_hours = 0: audit dimatikan
+        while True:
+            try:
+                await self.run_verification_audit()
+            except Exception as e:
+                self.logger.error(f"Verification audit failed: {e}")
+            await asyncio.sleep(interval)
+        
+    def _source_app_properties(self, file_path: Path, source_path: Path = None) -> Dict[str, str]:
+        """appProperties untuk file backup (path dan mtime sumber)"""
+        properties = {'src_path': app_property('src_path', str(file_path))}
+        try:
+            properties['src_mtime'] = str(int((source_path or file_path).stat().st_mtime))
+        except OSError:
+            pass
+        return properties
+        
+    async def rebuild_catalog_from_manifests(self) -> Dict:
+        """Rebuild tracking DB dari run manifest di Drive (device baru / DB hilang)"""
+        summary = await self.manifest_catalog.rebuild(self.google_accounts)
+        self.quota_tracker.invalidate()
+        return summary
+        
+    def sync_metadata_mirrors(self):
+        """Incremental sync mirror metadata Drive untuk akun yang sudah authenticated"""
+        for account in self.google_accounts:
+            if not account.is_ready:
+                continue
+            try:
+                account.sync_metadata(force=True)
+            except Exception as e:
+                self.logger.error(f"Metadata sync failed for {account.account_name}: {e}")
+                
+    def apply_retention_policy(self) -> int:
+        """
+        Hapus folder backup yang lebih tua dari storage.retention_days
+        
+        Folder yang masih menyimpan versi live sebuah file tidak dihapus,
+        hanya folder yang isinya sudah digantikan versi yang lebih baru.
+        Revision lama dari file yang di-update in-place expired (dan di-unpin)
+        retention_days setelah digantikan.
+        """
+        retention_days = self.settings.get('storage.retention_days')
+        if not retention_days:
+            return 0
+        if self.settings.get('auto_delete_after_upload', True):
+            # Original sudah dihapus setelah upload: Drive copy adalah satu-satunya copy
+            self.logger.warning("Retention skipped: auto_delete_after_upload is on, Drive holds the only copies")
+            return 0
+        
+        deleted_folders = 0
+        before = datetime.now() - timedelta(days=int(retention_days))
+        for account in self.google_accounts:
+            self._expire_superseded_revisions(account, before)
+            try:
+                protected = self.snapshot_index.live_backup_folders(account.account_index)
+                deleted = account.cleanup_old_backups(int(retention_days), protected)
+            except Exception as e:
+                self.logger.error(f"Retention cleanup failed for {account.account_name}: {e}")
+                continue
+            
+            if not deleted:
+                continue
+            deleted_folders += len(deleted)
+            self.quota_tracker.invalidate(account.account_index)
+            
+            # Row dicocokkan lewat date folder run-nya (run bisa melewati tengah malam)
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany(f'''
+                UPDATE backed_files SET upload_status = 'expired'
+                WHERE google_account_index = ? AND {BACKUP_FOLDER_SQL} = ?
+            ''', [(account.account_index, folder['name']) for folder in deleted])
+            conn.commit()
+            conn.close()
+            
+            self.snapshot_index.expire_versions(account.account_index, [folder['name'] for folder in deleted])
+            
+            # Manifest run dari tanggal yang sama sudah tidak bisa di-restore
+            try:
+                self.manifest_catalog.expire_manifests(account, [folder['name'] for folder in deleted])
+            except Exception as e:
+                self.logger.warning(f"Failed to expire manifests for {account.account_name}: {e}")
+        
+        return deleted_folders
+        
+    def _expire_superseded_revisions(self, account, before: datetime):
+        """Versi lama dari file yang di-update in-place lewat retention: unpin revision-nya"""
+        try:
+            pinned = self.snapshot_index.expire_superseded_revisions(account.account_index, before)
+            if not pinned:
+                return
+            results = account.set_revisions_keep_forever(
+                [(row['google_file_id'], row['revision_id']) for row in pinned], False
+            )
+            self.snapshot_index.mark_pinned(
+                [row['id'] for row in pinned if results.get((row['google_file_id'], row['revision_id']))],
+                False
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to expire old revisions for {account.account_name}: {e}")
+
     def get_backup_history(self, limit: int = 20) -> List[Dict]:
         """Get backup history"""
         conn = sqlite3.connect(self.db_path)
@@ -7,28 +7,67 @@ Enhanced Google Drive Manager dengan fitur:
 
 import os
 import io
+import asyncio
 import json
+import sqlite3
+import time
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 import logging
 
+from src.drive_batch_manager import DriveBatchManager
+from src.drive_transport_pool import DriveTransportPool
+from src.drive_service_factory import drive_service_factory
+from src.drive_download import (
+    download_to_file, remote_state, DownloadIntegrityError, DEFAULT_CHUNK_SIZE, FILE_FIELDS
+)
+from src.drive_metadata_mirror import DriveMetadataMirror
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+ROOT_FOLDER_NAME = 'AutoBackup'
+
 class EnhancedGoogleDriveManager:
     """Enhanced Google Drive Manager"""
     
-    def __init__(self, account_index: int = 0, account_name: str = None):
+    def __init__(self, account_index: int = 0, account_name: str = None, db_path: str = None,
+                 pool_size: int = 3, connection_timeout: int = 30, upload_timeout: int = 300,
+                 health=None, download_chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 metadata_sync_interval: int = 60, upload_chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.account_index = account_index
         self.account_name = account_name or f"Account {account_index}"
+        self.db_path = db_path  # Tracking DB untuk persistent folder cache (optional)
+        self.pool_size = pool_size  # Sama dengan jumlah upload paralel
+        self.connection_timeout = connection_timeout
+        self.upload_timeout = upload_timeout
+        self.health = health  # AccountHealth (optional), di-update oleh setiap API call
+        self.download_chunk_size = download_chunk_size
+        self.upload_chunk_size = upload_chunk_size  # Per request resumable upload (kelipatan 256KB)
+        # Mirror metadata lokal untuk listing/search (butuh tracking DB)
+        self.metadata_mirror = DriveMetadataMirror(db_path) if db_path else None
+        self.metadata_sync_interval = metadata_sync_interval  # seconds
+        self._mirror_synced_at = 0.0
+        self._mirror_generation = 0  # Naik setiap mark_metadata_stale
+        self._mirror_syncing = False
+        self._mirror_lock = threading.Lock()
         self.service = None
+        self.credentials = None
+        self.transport_pool = None
+        self.batch_manager = None
         self.backup_root_folder_id = None
         self.folder_cache = {}  # Cache untuk folder IDs
+        self.folder_listing_cache: Dict[str, Dict[str, dict]] = {}  # folder ID -> {name: file}
+        self.created_folder_count = 0
+        self._inflight_folders: Dict[str, threading.Event] = {}  # Single-flight folder creation
+        self._inflight_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
+        self._load_persistent_folder_cache()
         self._authenticate()
         
     def _authenticate(self):
@@ -53,17 +92,181 @@ class EnhancedGoogleDriveManager:
             with open(token_file, 'w') as token:
                 token.write(creds.to_json())
         
-        self.service = build('drive', 'v3', credentials=creds)
+        self.credentials = creds
+        self.transport_pool = DriveTransportPool(
+            creds, size=self.pool_size,
+            connection_timeout=self.connection_timeout,
+            upload_timeout=self.upload_timeout
+        )
+        self.service = drive_service_factory.build_service(http=self.transport_pool.default_http)
+        self.batch_manager = DriveBatchManager(self.service, transport_pool=self.transport_pool)
         self._ensure_backup_root_folder()
         
+    def refresh_credentials_if_expiring(self, margin_seconds: int = 600) -> bool:
+        """
+        Refresh access token sebelum expired, supaya upload tidak kena 401
+        
+        Returns:
+            bool: True jika token di-refresh
+        """
+        creds = self.credentials
+        if not creds or not creds.refresh_token:
+            return False
+        
+        # google-auth menyimpan expiry sebagai naive UTC datetime
+        if creds.expiry and creds.expiry - datetime.utcnow() > timedelta(seconds=margin_seconds):
+            return False
+        
+        creds.refresh(Request())
+        with open(f"credentials/token_account_{self.account_index}.json", 'w') as token:
+            token.write(creds.to_json())
+        self.logger.debug(f"Refreshed token for {self.account_name}")
+        return True
+        
+    def _load_persistent_folder_cache(self):
+        """Load folder path -> ID dari tracking DB (shared antar run dan proses)"""
+        if not self.db_path:
+            return
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS drive_folder_cache (
+                    account_index INTEGER,
+                    folder_path TEXT,
+                    folder_id TEXT,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (account_index, folder_path)
+                )
+            ''')
+            cursor.execute(
+                "SELECT folder_path, folder_id FROM drive_folder_cache WHERE account_index = ?",
+                (self.account_index,)
+            )
+            for folder_path, folder_id in cursor.fetchall():
+                self.folder_cache[folder_path] = folder_id
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to load persistent folder cache: {e}")
+            
+    def _lookup_persistent_folders(self, folder_paths: List[str]):
+        """Ambil folder yang mungkin sudah dibuat proses lain sejak cache di-load"""
+        if not self.db_path or not folder_paths:
+            return
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            placeholders = ','.join('?' * len(folder_paths))
+            cursor.execute(
+                f"SELECT folder_path, folder_id FROM drive_folder_cache "
+                f"WHERE account_index = ? AND folder_path IN ({placeholders})",
+                [self.account_index] + list(folder_paths)
+            )
+            for folder_path, folder_id in cursor.fetchall():
+                self.folder_cache[folder_path] = folder_id
+            conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to read persistent folder cache: {e}")
+            
+    def _cache_folder(self, folder_path: str, folder_id: str):
+        """Simpan folder ID di memory dan tracking DB"""
+        self.folder_cache[folder_path] = folder_id
+        
+        if not self.db_path:
+            return
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO drive_folder_cache
+                (account_index, folder_path, folder_id, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (self.account_index, folder_path, folder_id, datetime.now()))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to persist folder {folder_path}: {e}")
+            
+    def invalidate_folder_id(self, folder_id: str) -> List[str]:
+        """
+        Buang folder ID yang ternyata sudah tidak ada (404) beserta semua subfolder-nya
+        
+        Returns:
+            list: Folder path yang di-invalidate
+        """
+        stale_paths = [path for path, cached_id in self.folder_cache.items() if cached_id == folder_id]
+        if folder_id == self.backup_root_folder_id:
+            # Root hilang: semua path di bawahnya ikut tidak valid
+            stale_paths = list(self.folder_cache.keys())
+            self.backup_root_folder_id = None
+        else:
+            for path in list(stale_paths):
+                stale_paths.extend(p for p in self.folder_cache if p.startswith(f"{path}/"))
+        
+        for path in stale_paths:
+            stale_id = self.folder_cache.pop(path, None)
+            self.folder_listing_cache.pop(stale_id, None)
+        
+        if self.db_path and stale_paths:
+            try:
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "DELETE FROM drive_folder_cache WHERE account_index = ? AND folder_path = ?",
+                    [(self.account_index, path) for path in stale_paths]
+                )
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Failed to invalidate persistent folder cache: {e}")
+        
+        if stale_paths:
+            self.logger.info(f"Invalidated {len(stale_paths)} stale cached folders")
+        return stale_paths
+        
+    def _execute(self, request, upload: bool = False):
+        """Execute request lewat pooled keep-alive transport"""
+        if not self.health:
+            return self.transport_pool.execute(request, upload=upload)
+        
+        start = time.monotonic()
+        try:
+            response = self.transport_pool.execute(request, upload=upload)
+        except Exception as error:
+            self.health.record_failure(error)
+            raise
+        # Latency upload didominasi ukuran file, hanya metadata call yang dihitung
+        self.health.record_success(None if upload else time.monotonic() - start)
+        return response
+        
+    def close(self):
+        """Tutup koneksi HTTP akun ini"""
+        if self.transport_pool:
+            self.transport_pool.close()
+        
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        """Cek apakah error adalah 404 dari Drive"""
+        return isinstance(error, HttpError) and getattr(error.resp, 'status', None) == 404
+        
     def _ensure_backup_root_folder(self):
         """Pastikan root folder backup ada"""
+        folder_name = ROOT_FOLDER_NAME
+        
+        # Root ID dari persistent cache, divalidasi lazily saat terjadi 404
+        if folder_name in self.folder_cache:
+            self.backup_root_folder_id = self.folder_cache[folder_name]
+            self.logger.debug(f"Using cached backup root folder: {self.backup_root_folder_id}")
+            return
+        
         try:
-            folder_name = "AutoBackup"
-            
             # Cari folder yang sudah ada
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(q=query, fields='files(id, name)').execute()
+            query = f"name='{folder_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+            results = self._execute(self.service.files().list(q=query, fields='files(id, name)'))
             items = results.get('files', [])
             
             if items:
@@ -73,136 +276,566 @@ class EnhancedGoogleDriveManager:
                 # Buat folder baru
                 folder_metadata = {
                     'name': folder_name,
-                    'mimeType': 'application/vnd.google-apps.folder'
+                    'mimeType': FOLDER_MIME_TYPE
                 }
-                folder = self.service.files().create(body=folder_metadata, fields='id').execute()
+                folder = self._execute(self.service.files().create(body=folder_metadata, fields='id'))
                 self.backup_root_folder_id = folder.get('id')
                 self.logger.info(f"Created new backup root folder with ID: {self.backup_root_folder_id}")
                 
             # Cache root folder
-            self.folder_cache[folder_name] = self.backup_root_folder_id
+            self._cache_folder(folder_name, self.backup_root_folder_id)
                 
         except HttpError as error:
             self.logger.error(f"Error ensuring backup root folder: {error}")
             raise
             
+    @staticmethod
+    def _escape_query_value(value: str) -> str:
+        """Escape nilai string untuk Drive query (q parameter)"""
+        return value.replace('\\', '\\\\').replace("'", "\\'")
+        
     async def ensure_folder_structure(self, folder_path: str) -> str:
         """
         Pastikan struktur folder ada dan return folder ID
         folder_path format: "2024-08-20/Images" atau "2024-08-20/Documents"
         """
-        try:
-            # Split path menjadi components
-            path_parts = folder_path.split('/')
-            current_parent_id = self.backup_root_folder_id
-            current_path = ""
-            
-            for part in path_parts:
-                current_path = f"{current_path}/{part}" if current_path else part
-                
-                # Check cache first
-                if current_path in self.folder_cache:
-                    current_parent_id = self.folder_cache[current_path]
+        folder_ids = await self.ensure_folder_structures([folder_path])
+        return folder_ids.get(folder_path)
+        
+    async def ensure_folder_structures(self, folder_paths: List[str]) -> Dict[str, str]:
+        """
+        Pastikan banyak struktur folder ada sekaligus
+        
+        Folder diproses per level kedalaman: semua lookup pada satu level
+        dikirim dalam satu batch, lalu semua folder yang belum ada dibuat
+        dalam satu batch berikutnya. Path yang sedang dibuat oleh worker
+        lain ditunggu (single-flight), bukan dibuat dua kali.
+        
+        Returns:
+            dict: folder_path -> folder ID (path yang gagal tidak ada di hasil)
+        """
+        # Semua lookup/create berjalan di worker thread, event loop tetap bebas
+        return await asyncio.to_thread(self._ensure_folder_structures, folder_paths)
+        
+    def _ensure_folder_structures(self, folder_paths: List[str]) -> Dict[str, str]:
+        if not self.backup_root_folder_id:
+            self._ensure_backup_root_folder()
+        
+        result, stale_parent = self._materialize_folders(folder_paths)
+        
+        if stale_parent:
+            # Cached parent sudah dihapus di Drive: invalidate lalu coba sekali lagi
+            self.invalidate_folder_id(stale_parent)
+            if not self.backup_root_folder_id:
+                self._ensure_backup_root_folder()
+            result, _ = self._materialize_folders(folder_paths)
+        
+        return result
+        
+    def _materialize_folders(self, folder_paths: List[str]) -> Tuple[Dict[str, str], Optional[str]]:
+        """Lookup/create folder per level; return (hasil, parent ID yang 404 jika ada)"""
+        # Kumpulkan semua prefix path yang dibutuhkan, dikelompokkan per level
+        levels: Dict[int, List[str]] = {}
+        for folder_path in folder_paths:
+            parts = folder_path.split('/')
+            for depth in range(1, len(parts) + 1):
+                prefix = '/'.join(parts[:depth])
+                if prefix not in levels.setdefault(depth, []):
+                    levels[depth].append(prefix)
+        
+        failed = set()
+        stale_parent = None
+        
+        for depth in sorted(levels):
+            candidates = []
+            for path in levels[depth]:
+                parent_path = path.rsplit('/', 1)[0] if '/' in path else None
+                if parent_path in failed:
+                    failed.add(path)
+                elif path not in self.folder_cache:
+                    candidates.append(path)
+            
+            # Folder mungkin sudah dibuat proses lain
+            self._lookup_persistent_folders(candidates)
+            
+            claimed, waiting = self._claim_folders(candidates)
+            try:
+                stale_parent = self._create_missing_folders(claimed, failed) or stale_parent
+            finally:
+                self._release_folders(claimed)
+            
+            for path, event in waiting:
+                event.wait(timeout=120)
+                if path not in self.folder_cache:
+                    failed.add(path)
+        
+        result = {path: self.folder_cache[path] for path in folder_paths if path in self.folder_cache}
+        return result, stale_parent
+        
+    def _claim_folders(self, folder_paths: List[str]) -> Tuple[List[str], List[Tuple[str, threading.Event]]]:
+        """Claim path untuk dibuat; path yang sedang in-flight di worker lain ditunggu"""
+        claimed = []
+        waiting = []
+        with self._inflight_lock:
+            for path in folder_paths:
+                if path in self.folder_cache:
                     continue
-                
-                # Search for folder
-                query = (f"name='{part}' and "
-                        f"parents in '{current_parent_id}' and "
-                        f"mimeType='application/vnd.google-apps.folder' and "
-                        f"trashed=false")
-                
-                results = self.service.files().list(q=query, fields='files(id, name)').execute()
-                items = results.get('files', [])
-                
-                if items:
-                    # Folder exists
-                    current_parent_id = items[0]['id']
-                    self.logger.debug(f"Found existing folder: {part}")
+                if path in self._inflight_folders:
+                    waiting.append((path, self._inflight_folders[path]))
                 else:
-                    # Create folder
-                    folder_metadata = {
-                        'name': part,
-                        'mimeType': 'application/vnd.google-apps.folder',
-                        'parents': [current_parent_id]
-                    }
-                    
-                    folder = self.service.files().create(body=folder_metadata, fields='id').execute()
-                    current_parent_id = folder.get('id')
-                    self.logger.info(f"Created folder: {part}")
-                
-                # Cache folder ID
-                self.folder_cache[current_path] = current_parent_id
-            
-            return current_parent_id
-            
-        except HttpError as error:
-            self.logger.error(f"Error ensuring folder structure {folder_path}: {error}")
+                    self._inflight_folders[path] = threading.Event()
+                    claimed.append(path)
+        return claimed, waiting
+        
+    def _release_folders(self, folder_paths: List[str]):
+        """Lepas claim dan bangunkan worker yang menunggu"""
+        with self._inflight_lock:
+            for path in folder_paths:
+                event = self._inflight_folders.pop(path, None)
+                if event:
+                    event.set()
+        
+    def _create_missing_folders(self, pending: List[str], failed: set) -> Optional[str]:
+        """Batch lookup lalu batch create untuk satu level folder"""
+        if not pending:
             return None
+        
+        stale_parent = None
+        
+        # Batch lookup folder yang sudah ada
+        lookups = {}
+        for path in pending:
+            name = path.rsplit('/', 1)[-1]
+            parent_id = self._parent_folder_id(path)
+            query = (f"name='{self._escape_query_value(name)}' and "
+                     f"'{parent_id}' in parents and "
+                     f"mimeType='{FOLDER_MIME_TYPE}' and "
+                     f"trashed=false")
+            lookups[path] = self.service.files().list(q=query, fields='files(id, name)')
+        
+        to_create = []
+        for path, outcome in self.batch_manager.execute(lookups).items():
+            if outcome['error'] is not None:
+                self.logger.error(f"Error looking up folder {path}: {outcome['error']}")
+                failed.add(path)
+                continue
+            items = outcome['result'].get('files', [])
+            if items:
+                self._cache_folder(path, items[0]['id'])
+                self.logger.debug(f"Found existing folder: {path}")
+            else:
+                to_create.append(path)
+        
+        # Batch create folder yang belum ada
+        creates = {}
+        for path in to_create:
+            folder_metadata = {
+                'name': path.rsplit('/', 1)[-1],
+                'mimeType': FOLDER_MIME_TYPE,
+                'parents': [self._parent_folder_id(path)]
+            }
+            creates[path] = self.service.files().create(body=folder_metadata, fields='id')
+        
+        for path, outcome in self.batch_manager.execute(creates).items():
+            if outcome['error'] is not None:
+                self.logger.error(f"Error creating folder {path}: {outcome['error']}")
+                failed.add(path)
+                if self._is_not_found(outcome['error']):
+                    stale_parent = self._parent_folder_id(path)
+                continue
+            self._cache_folder(path, outcome['result'].get('id'))
+            self.created_folder_count += 1
+            self.mark_metadata_stale()
+            # Folder baru pasti kosong, tidak perlu listing query
+            self.folder_listing_cache[self.folder_cache[path]] = {}
+            self.logger.info(f"Created folder: {path}")
+        
+        return stale_parent
+        
+    def _parent_folder_id(self, folder_path: str) -> str:
+        """Folder ID parent dari sebuah path (root backup untuk level pertama)"""
+        if '/' not in folder_path:
+            return self.backup_root_folder_id
+        return self.folder_cache[folder_path.rsplit('/', 1)[0]]
             
     async def upload_file_to_folder(self, file_path: str, folder_id: str, 
-                                   remote_name: str = None) -> str:
-        """Upload file ke folder tertentu"""
+                                   remote_name: str = None, folder_path: str = None) -> str:
+        """Upload file ke folder tertentu, return Drive file ID"""
+        uploaded = await self.upload_file_with_metadata(file_path, folder_id, remote_name, folder_path)
+        return uploaded.get('id') if uploaded else None
+        
+    async def upload_file_with_metadata(self, file_path: str, folder_id: str,
+                                        remote_name: str = None, folder_path: str = None,
+                                        app_properties: Dict[str, str] = None,
+                                        token=None, file_id: str = None,
+                                        keep_revision_forever: bool = False) -> Optional[dict]:
+        """
+        Upload file ke folder tertentu, return metadata dari response upload
+        (id, name, md5Checksum, size, headRevisionId) untuk verifikasi tanpa re-download
+        
+        File dengan nama sama di folder yang sama di-update in-place.
+        keep_revision_forever men-set keepRevisionForever pada revision baru;
+        tanpa itu Drive membuang revision lama otomatis (30 hari / 100
+        revision), dengan itu maksimal 200 revision permanen per file.
+        
+        file_id (versioning_mode revisions): Drive file itu yang di-update
+        in-place, di folder mana pun dia berada. Jika sudah tidak ada (404),
+        file di-upload sebagai object baru di folder_id.
+        
+        app_properties disimpan sebagai appProperties (private untuk aplikasi ini).
+        
+        HTTP request berjalan di worker thread. File besar di-upload per chunk
+        (resumable); token (CancellationToken, opsional) dicek di antara chunk:
+        pause menahan upload, cancel menghentikannya dan return None.
+        
+        Jika folder_path diberikan dan folder ID dari cache ternyata sudah
+        tidak ada (404), cache di-invalidate, folder dibuat ulang dan upload
+        dicoba sekali lagi.
+        """
+        existing_file = None
         try:
             if not remote_name:
                 remote_name = Path(file_path).name
             
-            # Check if file already exists in folder
-            existing_file = await self._find_file_in_folder(remote_name, folder_id)
-            
-            file_metadata = {
-                'name': remote_name,
-                'parents': [folder_id]
-            }
+            # Check if file already exists in folder (served from the per-run listing)
+            if file_id:
+                existing_file = {'id': file_id}
+            else:
+                existing_file = await asyncio.to_thread(self._find_file_in_folder, remote_name, folder_id)
             
             # Determine media type
             file_size = os.path.getsize(file_path)
             resumable = file_size > 5 * 1024 * 1024  # Use resumable upload for files > 5MB
             
-            media = MediaFileUpload(file_path, resumable=resumable)
+            media = MediaFileUpload(file_path, resumable=resumable, chunksize=self.upload_chunk_size)
             
             if existing_file:
-                # Update existing file
-                file = self.service.files().update(
+                # Update existing file (parents tidak boleh di-set lewat update)
+                body = {'name': remote_name}
+                if app_properties:
+                    body['appProperties'] = app_properties
+                request = self.service.files().update(
                     fileId=existing_file['id'],
-                    body=file_metadata,
+                    body=body,
                     media_body=media,
-                    fields='id'
-                ).execute()
-                self.logger.info(f"Updated existing file: {remote_name}")
+                    keepRevisionForever=keep_revision_forever,
+                    fields='id, name, md5Checksum, size, headRevisionId'
+                )
             else:
                 # Create new file
-                file = self.service.files().create(
+                file_metadata = {
+                    'name': remote_name,
+                    'parents': [folder_id]
+                }
+                if app_properties:
+                    file_metadata['appProperties'] = app_properties
+                request = self.service.files().create(
                     body=file_metadata,
                     media_body=media,
-                    fields='id'
-                ).execute()
+                    keepRevisionForever=keep_revision_forever,
+                    fields='id, name, md5Checksum, size, headRevisionId'
+                )
+            
+            if resumable:
+                file = await self._upload_resumable(request, token)
+                if file is None:
+                    self.logger.info(f"Upload of {remote_name} cancelled")
+                    return None
+            else:
+                file = await asyncio.to_thread(self._execute, request, True)
+            if existing_file:
+                self.logger.info(f"Updated existing file: {remote_name}")
+            else:
                 self.logger.info(f"Uploaded new file: {remote_name}")
+            
+            # Keep the listing in sync so later uploads don't need a query
+            if not file_id:
+                self.folder_listing_cache.setdefault(folder_id, {})[remote_name] = file
+            self.mark_metadata_stale()
                 
-            return file.get('id')
+            return file
             
         except HttpError as error:
+            if self._is_not_found(error) and file_id:
+                # Drive copy sudah dihapus, mulai object baru (error lain: gagal, retry nanti)
+                self.logger.warning(f"Drive file {file_id} is gone, uploading {remote_name} as new file")
+                return await self.upload_file_with_metadata(
+                    file_path, folder_id, remote_name, folder_path,
+                    app_properties=app_properties, token=token,
+                    keep_revision_forever=keep_revision_forever
+                )
+            if self._is_not_found(error) and not existing_file:
+                self.invalidate_folder_id(folder_id)
+                if folder_path:
+                    new_folder_id = await self.ensure_folder_structure(folder_path)
+                    if new_folder_id and new_folder_id != folder_id:
+                        return await self.upload_file_with_metadata(
+                            file_path, new_folder_id, remote_name,
+                            app_properties=app_properties, token=token,
+                            keep_revision_forever=keep_revision_forever
+                        )
             self.logger.error(f"Error uploading file {file_path}: {error}")
             return None
         except Exception as error:
             self.logger.error(f"Unexpected error uploading file {file_path}: {error}")
             return None
             
-    async def _find_file_in_folder(self, filename: str, folder_id: str) -> dict:
+    async def _upload_resumable(self, request, token=None) -> Optional[dict]:
+        """Resumable upload chunk demi chunk; None jika token di-cancel di antara chunk"""
+        response = None
+        while response is None:
+            if token is not None and not await token.checkpoint():
+                return None
+            _, response = await asyncio.to_thread(self._next_chunk, request)
+        return response
+        
+    def _next_chunk(self, request):
+        """Upload satu chunk lewat pooled transport (health di-update per chunk)"""
+        with self.transport_pool.connection(upload=True) as http:
+            try:
+                result = request.next_chunk(http=http)
+            except Exception as error:
+                if self.health:
+                    self.health.record_failure(error)
+                raise
+        if self.health:
+            self.health.record_success(None)
+        return result
+        
+    def _find_file_in_folder(self, filename: str, folder_id: str) -> dict:
         """Cari file berdasarkan nama dalam folder tertentu"""
-        try:
-            query = f"name='{filename}' and parents in '{folder_id}' and trashed=false"
-            results = self.service.files().list(q=query, fields='files(id, name)').execute()
-            items = results.get('files', [])
-            return items[0] if items else None
-            
-        except HttpError as error:
-            self.logger.error(f"Error finding file {filename}: {error}")
+        listing = self.get_folder_listing(folder_id)
+        if listing is None:
             return None
+        return listing.get(filename)
+        
+    def get_folder_listing(self, folder_id: str) -> Optional[Dict[str, dict]]:
+        """
+        Listing folder (name -> {id, name, md5Checksum, size}), di-fetch sekali per run
+        
+        Returns:
+            dict atau None jika listing gagal di-fetch
+        """
+        if folder_id not in self.folder_listing_cache:
+            self.prefetch_folder_listings([folder_id])
+        return self.folder_listing_cache.get(folder_id)
+        
+    def prefetch_folder_listings(self, folder_ids: List[str]):
+        """Fetch listing beberapa folder sekaligus ke per-run listing cache"""
+        pending = [folder_id for folder_id in folder_ids if folder_id not in self.folder_listing_cache]
+        
+        for folder_id, items in self.list_folders_metadata(pending).items():
+            listing = {}
+            for item in items:
+                listing.setdefault(item['name'], item)
+            self.folder_listing_cache[folder_id] = listing
+            
+    def list_folders_metadata(self, folder_ids: List[str]) -> Dict[str, List[dict]]:
+        """
+        Metadata semua file di beberapa folder (id, name, md5Checksum, size)
+        
+        Halaman pertama setiap folder diambil dalam satu batch, halaman
+        berikutnya mengikuti nextPageToken per folder. Tidak ada byte file
+        yang di-download.
+        
+        Returns:
+            dict: folder_id -> list file (folder yang gagal tidak ada di hasil)
+        """
+        fields = 'nextPageToken, files(id, name, md5Checksum, size)'
+        
+        requests = {
+            folder_id: self.service.files().list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                fields=fields,
+                pageSize=1000
+            )
+            for folder_id in folder_ids
+        }
+        
+        listings = {}
+        for folder_id, outcome in self.batch_manager.execute(requests).items():
+            if outcome['error'] is not None:
+                self.logger.error(f"Error listing folder {folder_id}: {outcome['error']}")
+                continue
+            
+            items = []
+            response = outcome['result']
+            try:
+                while True:
+                    items.extend(response.get('files', []))
+                    page_token = response.get('nextPageToken')
+                    if not page_token:
+                        break
+                    response = self._execute(self.service.files().list(
+                        q=f"'{folder_id}' in parents and trashed=false",
+                        fields=fields,
+                        pageSize=1000,
+                        pageToken=page_token
+                    ))
+            except HttpError as error:
+                self.logger.error(f"Error listing folder {folder_id}: {error}")
+                continue
+            
+            listings[folder_id] = items
+        
+        return listings
+            
+    def reset_run_caches(self):
+        """Buang listing cache di awal setiap run agar perubahan dari luar terlihat"""
+        self.folder_listing_cache.clear()
+            
+    def find_files_in_folders(self, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[dict]]:
+        """
+        Duplicate check untuk banyak file sekaligus (batched)
+        
+        Args:
+            targets: List of (filename, folder_id)
+            
+        Returns:
+            dict: (filename, folder_id) -> file dict atau None
+        """
+        lookups = {}
+        for filename, folder_id in targets:
+            query = (f"name='{self._escape_query_value(filename)}' and "
+                     f"'{folder_id}' in parents and trashed=false")
+            lookups[(filename, folder_id)] = self.service.files().list(
+                q=query, fields='files(id, name, md5Checksum, size)'
+            )
+        
+        found = {}
+        for key, outcome in self.batch_manager.execute(lookups).items():
+            if outcome['error'] is not None:
+                self.logger.error(f"Error finding file {key[0]}: {outcome['error']}")
+                found[key] = None
+                continue
+            items = outcome['result'].get('files', [])
+            found[key] = items[0] if items else None
+        
+        return found
+        
+    def rename_files(self, renames: Dict[str, str]) -> Dict[str, bool]:
+        """
+        Rename banyak file sekaligus (batched)
+        
+        Args:
+            renames: file_id -> nama baru
+            
+        Returns:
+            dict: file_id -> success
+        """
+        requests = {
+            file_id: self.service.files().update(fileId=file_id, body={'name': new_name}, fields='id')
+            for file_id, new_name in renames.items()
+        }
+        return self._batch_success(requests, "renaming")
+        
+    def move_files(self, moves: Dict[str, Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Pindahkan banyak file sekaligus (batched)
+        
+        Args:
+            moves: file_id -> (old_parent_id, new_parent_id)
+            
+        Returns:
+            dict: file_id -> success
+        """
+        requests = {
+            file_id: self.service.files().update(
+                fileId=file_id, addParents=new_parent, removeParents=old_parent, fields='id'
+            )
+            for file_id, (old_parent, new_parent) in moves.items()
+        }
+        return self._batch_success(requests, "moving")
+        
+    def delete_files(self, file_ids: List[str]) -> Dict[str, bool]:
+        """
+        Hapus banyak file/folder sekaligus (batched)
+        
+        Returns:
+            dict: file_id -> success
+        """
+        requests = {file_id: self.service.files().delete(fileId=file_id) for file_id in file_ids}
+        results = self._batch_success(requests, "deleting")
+        
+        # Buang folder yang dihapus dari cache
+        deleted = {file_id for file_id, ok in results.items() if ok}
+        for path, folder_id in list(self.folder_cache.items()):
+            if folder_id in deleted:
+                del self.folder_cache[path]
+        for folder_id in deleted:
+            self.folder_listing_cache.pop(folder_id, None)
+        for listing in self.folder_listing_cache.values():
+            for name, item in list(listing.items()):
+                if item.get('id') in deleted:
+                    del listing[name]
+        
+        return results
+        
+    def set_revisions_keep_forever(self, revisions: List[Tuple[str, str]],
+                                   keep: bool) -> Dict[Tuple[str, str], bool]:
+        """
+        Pin / unpin banyak revision sekaligus (keepForever, batched)
+        
+        Drive menyimpan maksimal 200 revision keepForever per file, jadi
+        hanya revision yang masih dibutuhkan restore yang di-pin.
+        
+        Returns:
+            dict: (file_id, revision_id) -> success
+        """
+        requests = {
+            (file_id, revision_id): self.service.revisions().update(
+                fileId=file_id, revisionId=revision_id, body={'keepForever': keep}, fields='id'
+            )
+            for file_id, revision_id in revisions
+        }
+        return self._batch_success(requests, "pinning revision" if keep else "unpinning revision")
+        
+    def cleanup_old_backups(self, retention_days: int, protected: Optional[set] = None) -> List[dict]:
+        """
+        Hapus folder tanggal (YYYY-MM-DD) yang lebih tua dari retention_days
+        
+        Args:
+            protected: Nama date folder yang tidak boleh dihapus (masih menyimpan file live)
+        
+        Returns:
+            list: Folder yang berhasil dihapus
+        """
+        cutoff = (datetime.now() - timedelta(days=retention_days)).date()
+        expired = []
+        self.sync_metadata()  # Listing harus lengkap sebelum memutuskan apa yang dihapus
+        
+        for folder in self.list_backup_folders():
+            try:
+                folder_date = datetime.strptime(folder['name'], "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            if folder_date < cutoff and folder['name'] not in (protected or ()):
+                expired.append(folder)
+        
+        if not expired:
+            return []
+        
+        results = self.delete_files([folder['id'] for folder in expired])
+        deleted = [folder for folder in expired if results.get(folder['id'])]
+        self.logger.info(f"Retention cleanup removed {len(deleted)} backup folders older than {cutoff}")
+        return deleted
+        
+    def _batch_success(self, requests: Dict[str, object], action: str) -> Dict[str, bool]:
+        """Execute batch dan return status sukses per item"""
+        self.mark_metadata_stale()
+        results = {}
+        for key, outcome in self.batch_manager.execute(requests).items():
+            if outcome['error'] is not None:
+                self.logger.error(f"Error {action} {key}: {outcome['error']}")
+                results[key] = False
+            else:
+                results[key] = True
+        return results
             
     def get_storage_usage(self) -> dict:
         """Dapatkan informasi penggunaan storage"""
         try:
-            about = self.service.about().get(fields='storageQuota').execute()
+            about = self._execute(self.service.about().get(fields='storageQuota'))
             quota = about.get('storageQuota', {})
             
             total = int(quota.get('limit', 0))
@@ -220,20 +853,94 @@ class EnhancedGoogleDriveManager:
             self.logger.error(f"Error getting storage usage: {error}")
             return None
             
+    def mark_metadata_stale(self):
+        """Paksa sync mirror pada listing berikutnya (setelah write dari akun ini)"""
+        self._mirror_synced_at = 0.0
+        self._mirror_generation += 1
+        
+    def sync_metadata(self, force: bool = False) -> bool:
+        """
+        Sync mirror metadata lewat Changes API jika sudah lewat sync interval (blocking)
+        
+        Returns:
+            bool: True jika mirror bisa dipakai untuk listing
+        """
+        if not self.metadata_mirror:
+            return False
+        
+        with self._mirror_lock:
+            if not force and time.monotonic() - self._mirror_synced_at < self.metadata_sync_interval:
+                return True
+            generation = self._mirror_generation
+            if not self.metadata_mirror.sync(self):
+                return False
+            # Write selama sync mungkin belum ikut, biarkan tetap stale
+            if generation == self._mirror_generation:
+                self._mirror_synced_at = time.monotonic()
+            return True
+            
+    def _mirror_usable(self) -> bool:
+        """
+        Mirror bisa melayani listing tanpa menunggu sync
+        
+        Sync yang jatuh tempo jalan di background thread. Selama mirror
+        belum pernah sync (atau stale setelah write) listing memakai
+        files.list langsung.
+        """
+        if not self.metadata_mirror:
+            return False
+        
+        if time.monotonic() - self._mirror_synced_at >= self.metadata_sync_interval:
+            self._sync_metadata_in_background()
+        return self._mirror_synced_at > 0
+        
+    def _sync_metadata_in_background(self):
+        """Satu sync mirror sekaligus di daemon thread"""
+        with self._inflight_lock:
+            if self._mirror_syncing:
+                return
+            self._mirror_syncing = True
+        
+        def run():
+            try:
+                self.sync_metadata()
+            except Exception as e:
+                self.logger.error(f"Background metadata sync failed for {self.account_name}: {e}")
+            finally:
+                self._mirror_syncing = False
+        
+        threading.Thread(target=run, name=f"mirror-sync-{self.account_index}", daemon=True).start()
+            
+    def _list_all(self, **kwargs) -> List[dict]:
+        """files.list dengan semua halaman (nextPageToken)"""
+        items = []
+        page_token = None
+        while True:
+            response = self._execute(self.service.files().list(pageToken=page_token, **kwargs))
+            items.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items
+            
     def list_backup_folders(self) -> List[dict]:
-        """List semua folder backup"""
+        """List semua folder backup (terbaru dulu)"""
         try:
             if not self.backup_root_folder_id:
                 return []
+            
+            if self._mirror_usable():
+                return self.metadata_mirror.list_children(
+                    self.account_index, self.backup_root_folder_id,
+                    folders_only=True, order_by='created_desc'
+                )
                 
-            query = f"parents in '{self.backup_root_folder_id}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(
+            query = f"'{self.backup_root_folder_id}' in parents and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+            return self._list_all(
                 q=query, 
-                fields='files(id, name, createdTime, modifiedTime)',
-                orderBy='createdTime desc'
-            ).execute()
-            
-            return results.get('files', [])
+                fields='nextPageToken, files(id, name, createdTime, modifiedTime)',
+                orderBy='createdTime desc',
+                pageSize=1000
+            )
             
         except HttpError as error:
             self.logger.error(f"Error listing backup folders: {error}")
@@ -242,44 +949,46 @@ class EnhancedGoogleDriveManager:
     def download_file(self, file_id: str, local_path: str) -> bool:
         """Download file dari Google Drive"""
         try:
+            remote = remote_state(file_id, self._execute(
+                self.service.files().get(fileId=file_id, fields=FILE_FIELDS)
+            ))
             request = self.service.files().get_media(fileId=file_id)
-            file_io = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_io, request)
             
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                
-            # Write to local file
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                f.write(file_io.getvalue())
+            # Stream chunks to <local_path>.part, resuming a partial download of the same revision
+            with self.transport_pool.connection(upload=True) as http:
+                request.http = http
+                download_to_file(request, str(local_path), chunk_size=self.download_chunk_size,
+                                 remote=remote)
                 
             self.logger.info(f"Downloaded file to: {local_path}")
             return True
             
-        except HttpError as error:
+        except (HttpError, DownloadIntegrityError) as error:
             self.logger.error(f"Error downloading file: {error}")
             return False
             
-    def search_files(self, query: str, limit: int = 50) -> List[dict]:
-        """Search files dalam backup folder"""
+    def search_files(self, query: str, limit: int = None) -> List[dict]:
+        """Search files dalam backup folder dan semua subfolder-nya"""
         try:
             if not self.backup_root_folder_id:
                 return []
+            
+            if self._mirror_usable():
+                return self.metadata_mirror.search(
+                    self.account_index, query, self.backup_root_folder_id, limit
+                )
                 
-            # Search in backup folder and subfolders
-            search_query = (f"parents in '{self.backup_root_folder_id}' and "
-                          f"name contains '{query}' and "
+            # Fallback tanpa mirror: drive.file scope hanya melihat file backup
+            search_query = (f"name contains '{self._escape_query_value(query)}' and "
+                          f"mimeType != '{FOLDER_MIME_TYPE}' and "
                           f"trashed=false")
             
-            results = self.service.files().list(
+            results = self._list_all(
                 q=search_query,
-                fields='files(id, name, size, createdTime, parents)',
-                pageSize=limit
-            ).execute()
-            
-            return results.get('files', [])
+                fields='nextPageToken, files(id, name, size, createdTime, modifiedTime, parents)',
+                pageSize=1000
+            )
+            return results[:limit] if limit else results
             
         except HttpError as error:
             self.logger.error(f"Error searching files: {error}")
@@ -288,14 +997,16 @@ class EnhancedGoogleDriveManager:
     def get_folder_contents(self, folder_id: str) -> List[dict]:
         """Get contents of a folder"""
         try:
-            query = f"parents in '{folder_id}' and trashed=false"
-            results = self.service.files().list(
+            if self._mirror_usable():
+                return self.metadata_mirror.list_children(self.account_index, folder_id)
+                
+            query = f"'{folder_id}' in parents and trashed=false"
+            return self._list_all(
                 q=query,
-                fields='files(id, name, size, mimeType, createdTime, modifiedTime)',
-                orderBy='name'
-            ).execute()
-            
-            return results.get('files', [])
+                fields='nextPageToken, files(id, name, size, mimeType, createdTime, modifiedTime)',
+                orderBy='name',
+                pageSize=1000
+            )
             
         except HttpError as error:
             self.logger.error(f"Error getting folder contents: {error}")
@@ -3,13 +3,20 @@ File Recovery Manager untuk restore file dari Google Drive
 """
 
 import os
+import hashlib
 import sqlite3
 from pathlib import Path
 from datetime import datetime
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from src.google_drive_manager import GoogleDriveManager
-from config.settings import DATABASE_CONFIG
+from src.multiple_account_manager import MultipleAccountManager
+from src.account_pool import LazyAccount
+from src.restore_engine import RestoreEngine
+from src.utils.compression_manager import CompressionManager
+from src.chunk_store import ChunkStore
+from src.snapshot_index import SnapshotIndex
+from config.settings import DATABASE_CONFIG, BACKUP_CONFIG
 
 class FileRecoveryManager:
     """Class untuk mengelola recovery/restore file dari backup"""
@@ -17,23 +24,40 @@ class FileRecoveryManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.db_path = DATABASE_CONFIG["db_file"]
-        self.google_accounts: List[GoogleDriveManager] = []
+        self.google_accounts: Dict[int, GoogleDriveManager] = {}  # account_index -> account
+        self.compression_manager = CompressionManager()
+        self.chunk_store = ChunkStore(self.db_path)
+        self.snapshot_index = SnapshotIndex(self.db_path)
         self._load_google_accounts()
         
     def _load_google_accounts(self):
-        """Load semua akun Google yang tersedia"""
+        """Load semua akun Google yang tersedia (authenticate saat dipakai)"""
         try:
-            account = GoogleDriveManager(account_index=0)
-            self.google_accounts.append(account)
-            self.logger.info(f"Loaded Google account 0 for recovery")
+            account_manager = MultipleAccountManager()
+            for account in account_manager.accounts:
+                self.google_accounts[account.account_index] = account
         except Exception as e:
-            self.logger.error(f"Failed to load Google account 0: {e}")
+            self.logger.error(f"Failed to load Google accounts: {e}")
+        
+        if not self.google_accounts:
+            # Setup lama tanpa config/accounts.json: hanya akun 0
+            self.google_accounts[0] = LazyAccount(lambda: GoogleDriveManager(account_index=0), 0)
+        
+        self.logger.info(f"Loaded {len(self.google_accounts)} Google accounts for recovery")
+        
+    def _get_account(self, account_index: int) -> Optional[GoogleDriveManager]:
+        """Akun berdasarkan account_index, None jika tidak tersedia"""
+        account = self.google_accounts.get(account_index)
+        if account is None:
+            self.logger.error(f"Google account {account_index} not available")
+        return account
             
     def search_backed_files(self, filename_pattern: str = None, 
                            date_from: datetime = None, 
                            date_to: datetime = None) -> List[Dict]:
         """Search file yang sudah di-backup"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         query = "SELECT * FROM backed_files WHERE 1=1"
@@ -57,42 +81,93 @@ class FileRecoveryManager:
         results = cursor.fetchall()
         conn.close()
         
-        files = []
-        for result in results:
-            files.append({
-                'id': result[0],
-                'file_path': result[1],
-                'file_hash': result[2],
-                'file_size': result[3],
-                'backup_date': result[4],
-                'google_account_index': result[5],
-                'google_file_id': result[6]
-            })
+        return [self._row_to_record(result) for result in results]
+        
+    def _row_to_record(self, row: sqlite3.Row) -> Dict:
+        """Convert row backed_files ke dict (legacy dan enhanced schema)"""
+        columns = row.keys()
+        return {
+            'id': row['id'],
+            'file_path': row['file_path'],
+            'file_hash': row['file_hash'],
+            'file_size': row['file_size'],
+            'backup_date': row['backup_date'],
+            'google_account_index': row['google_account_index'],
+            'google_file_id': row['google_file_id'],
+            'compression': row['compression'] if 'compression' in columns else None,
+            'chunk_manifest_id': row['chunk_manifest_id'] if 'chunk_manifest_id' in columns else None
+        }
+        
+    def is_restored(self, backup_record: Dict, restore_path: str = None) -> bool:
+        """
+        Cek apakah file di restore_path sudah identik dengan backup
+        
+        Size dibandingkan dulu (murah), md5 hanya dihitung jika size sama.
+        Record tanpa file_hash dianggap berbeda.
+        """
+        restore_path = restore_path or backup_record['file_path']
+        expected_hash = backup_record.get('file_hash')
+        if not expected_hash:
+            return False
+        
+        try:
+            if os.path.getsize(restore_path) != backup_record.get('file_size'):
+                return False
+            return self._calculate_file_hash(restore_path) == expected_hash
+        except OSError:
+            return False  # Belum ada / tidak bisa dibaca
             
-        return files
+    def _calculate_file_hash(self, file_path: str) -> str:
+        """Calculate MD5 hash of file"""
+        hash_md5 = hashlib.md5()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hash_md5.update(chunk)
+        return hash_md5.hexdigest()
         
-    def restore_file(self, backup_record: Dict, restore_path: str = None) -> bool:
-        """Restore file dari Google Drive"""
+    def restore_file(self, backup_record: Dict, restore_path: str = None,
+                     differential: bool = False) -> bool:
+        """
+        Restore file dari Google Drive
+        
+        Args:
+            differential: Lewati download jika file di restore_path sudah identik
+        """
         try:
             account_index = backup_record['google_account_index']
             google_file_id = backup_record['google_file_id']
             original_path = backup_record['file_path']
             
-            if account_index >= len(self.google_accounts):
-                self.logger.error(f"Google account {account_index} not available")
-                return False
-                
-            account = self.google_accounts[account_index]
-            
             # Tentukan path restore
             if restore_path is None:
                 restore_path = original_path
                 
+            if differential and self.is_restored(backup_record, restore_path):
+                self.logger.info(f"File already up to date, skipping: {restore_path}")
+                return True
+                
+            account = self._get_account(account_index)
+            if account is None:
+                return False
+            
             # Buat direktori jika belum ada
             os.makedirs(os.path.dirname(restore_path), exist_ok=True)
             
-            # Download file
-            success = account.download_file(google_file_id, restore_path)
+            # Download file, decompressing transparently if it was compressed at backup
+            compression = backup_record.get('compression')
+            chunk_manifest_id = backup_record.get('chunk_manifest_id')
+            if chunk_manifest_id:
+                success = self.chunk_store.restore_file(account, chunk_manifest_id, restore_path)
+            elif compression:
+                download_path = f"{restore_path}.download"
+                success = self._download(account, backup_record, download_path)
+                if success:
+                    success = self.compression_manager.decompress_file(
+                        Path(download_path), Path(restore_path), compression
+                    )
+                self.compression_manager.cleanup(Path(download_path))
+            else:
+                success = self._download(account, backup_record, restore_path)
             
             if success:
                 self.logger.info(f"File restored to: {restore_path}")
@@ -105,39 +180,134 @@ class FileRecoveryManager:
             self.logger.error(f"Error restoring file: {e}")
             return False
             
+    @staticmethod
+    def _download(account, backup_record: Dict, local_path: str) -> bool:
+        """
+        Download object record ini
+        
+        Record snapshot menyimpan revision_id: overwrite di hari yang sama
+        memakai Drive file yang sama, jadi versi lama ada di revision-nya.
+        """
+        revision_id = backup_record.get('revision_id')
+        if revision_id:
+            return account.download_revision(backup_record['google_file_id'], revision_id, local_path)
+        return account.download_file(backup_record['google_file_id'], local_path)
+        
+    def list_file_versions(self, file_path: str) -> List[Dict]:
+        """List versi (Drive revision) sebuah file dari snapshot index, terbaru dulu"""
+        return self.snapshot_index.file_revisions(file_path)
+        
+    def restore_file_version(self, version: Dict, restore_path: str = None) -> bool:
+        """Restore versi tertentu dari list_file_versions"""
+        return self.restore_file(version, restore_path)
+            
     def restore_multiple_files(self, backup_records: List[Dict], 
-                              restore_base_path: str = None) -> Dict:
-        """Restore multiple files"""
-        successful = 0
-        failed = 0
+                              restore_base_path: str = None,
+                              progress_callback: Callable[[Dict], None] = None,
+                              differential: bool = None) -> Dict:
+        """
+        Restore multiple files secara paralel
+        
+        File dikelompokkan per akun dan di-download dengan concurrency
+        terbatas per akun, jadi beberapa akun berjalan bersamaan.
+        Dalam mode differential (default: BACKUP_CONFIG restore_differential)
+        file yang sudah identik di lokal dilewati, jadi restore yang terputus
+        cukup dijalankan ulang.
+        
+        Dengan restore_base_path struktur subfolder dipertahankan relatif
+        terhadap parent bersama semua file (seperti restore_snapshot).
+        
+        Returns:
+            dict: total_files, successful, failed, skipped, restored_bytes,
+                  throughput_mbps, per_account, ...
+        """
+        common_parent = None
+        if restore_base_path and backup_records:
+            common_parent = os.path.commonpath([
+                str(Path(record['file_path']).parent) for record in backup_records
+            ])
         
+        jobs, seen = [], set()
         for record in backup_records:
-            try:
-                if restore_base_path:
-                    # Restore ke directory baru
-                    original_path = Path(record['file_path'])
-                    restore_path = Path(restore_base_path) / original_path.name
-                else:
-                    restore_path = record['file_path']
-                    
-                if self.restore_file(record, str(restore_path)):
-                    successful += 1
-                else:
-                    failed += 1
-                    
-            except Exception as e:
-                self.logger.error(f"Error restoring file {record['file_path']}: {e}")
-                failed += 1
-                
-        summary = {
-            'total_files': len(backup_records),
-            'successful': successful,
-            'failed': failed
+            if common_parent is not None:
+                # Restore ke directory baru
+                relative = Path(record['file_path']).relative_to(common_parent)
+                restore_path = str(Path(restore_base_path) / relative)
+            else:
+                restore_path = record['file_path']
+            
+            # Dua record ke path yang sama akan berebut <path>.part, ambil yang pertama
+            if restore_path in seen:
+                self.logger.warning(f"Skipping duplicate restore target: {restore_path}")
+                continue
+            seen.add(restore_path)
+            jobs.append((record, restore_path))
+        
+        return self._run_restore(jobs, progress_callback, differential)
+        
+    def list_snapshots(self, limit: int = 50) -> List[Dict]:
+        """Run backup yang bisa di-restore sebagai snapshot, terbaru dulu"""
+        return self.snapshot_index.list_runs(limit)
+        
+    def get_snapshot(self, folder_path: str, at) -> Optional[Dict]:
+        """
+        Isi folder pada titik waktu tertentu
+        
+        Args:
+            at: run_id, datetime atau date
+            
+        Returns:
+            dict: run dan records (None jika tidak ada run pada/sebelum `at`)
+        """
+        run = self.snapshot_index.resolve_run(at)
+        if not run:
+            return None
+        return {
+            'run': run,
+            'records': self.snapshot_index.snapshot(str(Path(folder_path)), run['id'])
         }
         
-        self.logger.info(f"Restore completed: {summary}")
+    def restore_snapshot(self, folder_path: str, at, restore_base_path: str = None,
+                         progress_callback: Callable[[Dict], None] = None,
+                         differential: bool = None) -> Dict:
+        """
+        Restore folder persis seperti pada snapshot `at`
+        
+        Struktur subfolder dipertahankan relatif terhadap folder_path.
+        Tanpa restore_base_path file kembali ke lokasi aslinya.
+        """
+        snapshot = self.get_snapshot(folder_path, at)
+        if not snapshot:
+            self.logger.error(f"No snapshot of {folder_path} at {at}")
+            return {'total_files': 0, 'successful': 0, 'failed': 0}
+        
+        jobs = []
+        for record in snapshot['records']:
+            if restore_base_path:
+                relative = Path(record['file_path']).relative_to(folder_path)
+                restore_path = Path(restore_base_path) / relative
+            else:
+                restore_path = record['file_path']
+            jobs.append((record, str(restore_path)))
+        
+        self.logger.info(f"Restoring snapshot {snapshot['run']['run_id']} of {folder_path}: {len(jobs)} files")
+        summary = self._run_restore(jobs, progress_callback, differential)
+        summary['run_id'] = snapshot['run']['run_id']
         return summary
         
+    def _run_restore(self, jobs: List, progress_callback: Callable[[Dict], None] = None,
+                     differential: bool = None) -> Dict:
+        """Jalankan job (record, restore_path) lewat RestoreEngine"""
+        if differential is None:
+            differential = BACKUP_CONFIG.get("restore_differential", True)
+            
+        engine = RestoreEngine(
+            self.restore_file,
+            per_account_concurrency=BACKUP_CONFIG.get("restore_concurrency_per_account", 2),
+            is_current=self.is_restored if differential else None
+        )
+        return engine.run(jobs, progress_callback)
+        
     def list_available_files(self) -> List[Dict]:
         """List semua file yang tersedia untuk restore"""
         return self.search_backed_files()
@@ -145,6 +315,7 @@ class FileRecoveryManager:
     def get_file_versions(self, original_path: str) -> List[Dict]:
         """Dapatkan semua versi backup dari file tertentu"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -156,16 +327,4 @@ class FileRecoveryManager:
         results = cursor.fetchall()
         conn.close()
         
-        versions = []
-        for result in results:
-            versions.append({
-                'id': result[0],
-                'file_path': result[1],
-                'file_hash': result[2],
-                'file_size': result[3],
-                'backup_date': result[4],
-                'google_account_index': result[5],
-                'google_file_id': result[6]
-            })
-            
-        return versions
+        return [self._row_to_record(result) for result in results]
@@ -10,11 +10,14 @@ from pathlib import Path
 import os
 import sys
 import logging
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import httplib2
+import google_auth_httplib2
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 
@@ -22,7 +25,11 @@ from googleapiclient.errors import HttpError
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from config.settings import GOOGLE_DRIVE_CONFIG
+from config.settings import GOOGLE_DRIVE_CONFIG, BACKUP_CONFIG
+from src.drive_service_factory import drive_service_factory
+from src.drive_download import (
+    download_to_file, remote_state, DownloadIntegrityError, FILE_FIELDS, REVISION_FIELDS
+)
 
 class GoogleDriveManager:
     """Class untuk mengelola operasi Google Drive"""
@@ -30,7 +37,9 @@ class GoogleDriveManager:
     def __init__(self, account_index=0):
         self.account_index = account_index
         self.service = None
+        self.credentials = None
         self.backup_folder_id = None
+        self._local = threading.local()  # Transport per thread untuk download paralel
         self.logger = logging.getLogger(__name__)
         self._authenticate()
         
@@ -59,9 +68,26 @@ class GoogleDriveManager:
             with open(token_path, 'w') as token:
                 token.write(creds.to_json())
         
-        self.service = build('drive', 'v3', credentials=creds)
+        self.credentials = creds
+        self.service = drive_service_factory.build_service(credentials=creds)
         self._create_backup_folder()
         
+    def refresh_credentials_if_expiring(self, margin_seconds: int = 600) -> bool:
+        """Refresh access token sebelum expired"""
+        creds = self.credentials
+        if not creds or not creds.refresh_token:
+            return False
+        
+        # google-auth menyimpan expiry sebagai naive UTC datetime
+        if creds.expiry and creds.expiry - datetime.utcnow() > timedelta(seconds=margin_seconds):
+            return False
+        
+        creds.refresh(Request())
+        token_path = Path(GOOGLE_DRIVE_CONFIG["credentials_file"]).parent / f"token_account_{self.account_index}.json"
+        with open(token_path, 'w') as token:
+            token.write(creds.to_json())
+        return True
+        
     def _create_backup_folder(self):
         """Buat folder backup di Google Drive jika belum ada"""
         try:
@@ -104,10 +130,10 @@ class GoogleDriveManager:
             media = MediaFileUpload(file_path, resumable=True)
             
             if existing_file:
-                # Update existing file
+                # Update existing file (parents tidak boleh di-set lewat update)
                 file = self.service.files().update(
                     fileId=existing_file['id'],
-                    body=file_metadata,
+                    body={'name': remote_name},
                     media_body=media
                 ).execute()
                 self.logger.info(f"Updated file: {remote_name}")
@@ -126,28 +152,74 @@ class GoogleDriveManager:
             self.logger.error(f"Error uploading file {file_path}: {error}")
             raise
             
+    def list_revisions(self, file_id):
+        """List revision sebuah file (terlama dulu)"""
+        try:
+            revisions = []
+            page_token = None
+            while True:
+                results = self.service.revisions().list(
+                    fileId=file_id,
+                    fields='nextPageToken, revisions(id, modifiedTime, size, md5Checksum, keepForever)',
+                    pageToken=page_token
+                ).execute()
+                revisions.extend(results.get('revisions', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    return revisions
+                    
+        except HttpError as error:
+            self.logger.error(f"Error listing revisions of {file_id}: {error}")
+            return []
+            
+    def download_revision(self, file_id, revision_id, local_path):
+        """Download satu revision tertentu dari sebuah file"""
+        revisions = self.service.revisions()
+        return self._download_request(
+            lambda: remote_state(file_id, revisions.get(
+                fileId=file_id, revisionId=revision_id, fields=REVISION_FIELDS
+            ).execute(http=self._thread_http()), revision_id),
+            revisions.get_media(fileId=file_id, revisionId=revision_id),
+            local_path
+        )
+        
     def download_file(self, file_id, local_path):
         """Download file dari Google Drive"""
+        files = self.service.files()
+        return self._download_request(
+            lambda: remote_state(file_id, files.get(
+                fileId=file_id, fields=FILE_FIELDS
+            ).execute(http=self._thread_http())),
+            files.get_media(fileId=file_id),
+            local_path
+        )
+        
+    def _download_request(self, get_remote, request, local_path):
+        """Stream media download request ke local_path (memory konstan, bisa resume, md5 dicek)"""
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            file_io = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_io, request)
+            chunk_size = BACKUP_CONFIG.get("chunk_size_mb", 8) * 1024 * 1024
+            remote = get_remote()
+            request.http = self._thread_http()
+            download_to_file(request, str(local_path), chunk_size=chunk_size, remote=remote)
             
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                
-            # Write to local file
-            with open(local_path, 'wb') as f:
-                f.write(file_io.getvalue())
-                
             self.logger.info(f"Downloaded file to: {local_path}")
             return True
             
-        except HttpError as error:
+        except (HttpError, DownloadIntegrityError) as error:
             self.logger.error(f"Error downloading file: {error}")
             return False
             
+    def _thread_http(self):
+        """AuthorizedHttp milik thread ini (httplib2.Http tidak thread-safe)"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials,
+                http=httplib2.Http(timeout=BACKUP_CONFIG.get("timeout_seconds", 300))
+            )
+            self._local.http = http
+        return http
+        
     def find_file(self, filename):
         """Cari file berdasarkan nama"""
         try:
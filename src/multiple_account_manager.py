@@ -16,16 +16,21 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.google_drive_manager import GoogleDriveManager
+from src.account_pool import LazyAccount, AccountPool
+from src.quota_tracker import QuotaTracker, quota_tracker as shared_quota_tracker
 from config.settings import GOOGLE_DRIVE_CONFIG, BACKUP_CONFIG
 
 class MultipleAccountManager:
     """Manager untuk handle unlimited Google Drive accounts"""
     
-    def __init__(self, max_accounts: int = 50):  # Support up to 50 accounts
+    def __init__(self, max_accounts: int = 50,  # Support up to 50 accounts
+                 quota_tracker: Optional[QuotaTracker] = None):
         self.max_accounts = max_accounts
         self.accounts: List[GoogleDriveManager] = []
         self.logger = logging.getLogger(__name__)
         self.accounts_config_file = Path("config/accounts.json")
+        self.account_pool: Optional[AccountPool] = None
+        self.quota_tracker = quota_tracker or shared_quota_tracker
         self._load_accounts()
         
     def _load_accounts(self):
@@ -34,6 +39,8 @@ class MultipleAccountManager:
         
         # Load account configuration
         accounts_config = self._load_accounts_config()
+        self.accounts = []
+        self.quota_tracker.invalidate()
         
         for account_info in accounts_config.get('accounts', []):
             try:
@@ -44,10 +51,13 @@ class MultipleAccountManager:
                 token_file = credentials_dir / f"token_account_{account_index}.json"
                 
                 if token_file.exists():
-                    account = GoogleDriveManager(account_index=account_index)
-                    account.account_name = account_name  # Add custom name
+                    # Authenticate saat pertama dipakai (atau saat warm-up di background)
+                    account = LazyAccount(
+                        lambda index=account_index, name=account_name: self._create_account(index, name),
+                        account_index, account_name
+                    )
                     self.accounts.append(account)
-                    self.logger.info(f"Loaded Google account {account_index}: {account_name}")
+                    self.logger.info(f"Registered Google account {account_index}: {account_name}")
                 else:
                     self.logger.warning(f"Token not found for account {account_index}: {account_name}")
                     
@@ -56,6 +66,19 @@ class MultipleAccountManager:
                 
         if not self.accounts:
             self.logger.warning("No Google accounts could be loaded")
+            return
+        
+        if self.account_pool:
+            self.account_pool.stop()
+        self.account_pool = AccountPool(self.accounts)
+        self.account_pool.warm_up()
+        self.account_pool.start_token_refresher()
+            
+    def _create_account(self, account_index: int, account_name: str) -> GoogleDriveManager:
+        """Buat dan authenticate GoogleDriveManager untuk satu akun"""
+        account = GoogleDriveManager(account_index=account_index)
+        account.account_name = account_name  # Add custom name
+        return account
             
     def _load_accounts_config(self) -> dict:
         """Load accounts configuration from JSON file"""
@@ -200,42 +223,32 @@ class MultipleAccountManager:
             self.logger.error(f"Error completing account setup: {e}")
             return False
             
-    def get_account_with_most_space(self) -> Optional[GoogleDriveManager]:
+    def get_account_with_most_space(self, required_bytes: int = 0) -> Optional[GoogleDriveManager]:
         """Dapatkan akun dengan storage paling banyak"""
-        best_account = None
-        max_available = 0
+        return self.quota_tracker.best_account(self.accounts, required_bytes)
         
-        for account in self.accounts:
-            try:
-                storage_info = account.get_storage_usage()
-                if storage_info and storage_info['available_gb'] > max_available:
-                    max_available = storage_info['available_gb']
-                    best_account = account
-            except Exception as e:
-                self.logger.error(f"Error checking storage for account {account.account_index}: {e}")
-                
-        return best_account
+    def record_upload(self, account_index: int, size_bytes: int):
+        """Update quota lokal setelah upload berhasil"""
+        self.quota_tracker.record_upload(account_index, size_bytes)
         
     def get_storage_summary(self) -> List[Dict]:
         """Dapatkan ringkasan storage semua akun"""
         summary = []
         
         for account in self.accounts:
-            try:
-                storage_info = account.get_storage_usage()
-                if storage_info:
-                    summary.append({
-                        'account_index': account.account_index,
-                        'total_gb': storage_info['total_gb'],
-                        'used_gb': storage_info['used_gb'],
-                        'available_gb': storage_info['available_gb'],
-                        'usage_percentage': (storage_info['used_gb'] / storage_info['total_gb']) * 100
-                    })
-            except Exception as e:
-                self.logger.error(f"Error getting storage for account {account.account_index}: {e}")
+            storage_info = self.quota_tracker.get_storage_info(account)
+            if storage_info:
                 summary.append({
                     'account_index': account.account_index,
-                    'error': str(e)
+                    'total_gb': storage_info['total_gb'],
+                    'used_gb': storage_info['used_gb'],
+                    'available_gb': storage_info['available_gb'],
+                    'usage_percentage': storage_info['usage_percentage']
+                })
+            else:
+                summary.append({
+                    'account_index': account.account_index,
+                    'error': 'Storage info unavailable'
                 })
                 
         return summary
@@ -247,14 +260,4 @@ class MultipleAccountManager:
         
     def get_total_available_storage(self) -> float:
         """Dapatkan total storage yang tersedia di semua akun"""
-        total = 0
-        
-        for account in self.accounts:
-            try:
-                storage_info = account.get_storage_usage()
-                if storage_info:
-                    total += storage_info['available_gb']
-            except Exception as e:
-                self.logger.error(f"Error getting storage for account {account.account_index}: {e}")
-                
-        return total
+        return self.quota_tracker.get_total_available_gb(self.accounts)
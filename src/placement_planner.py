@@ -0,0 +1,114 @@
+"""
+Placement Planner untuk membagi file satu run ke beberapa akun Google Drive
+- File dikelompokkan per remote folder supaya file terkait tetap di satu akun
+- Bin packing first-fit-decreasing terhadap sisa quota tiap akun
+- Beban upload diseimbangkan selama quota masih longgar
+- File hanya diterima selama kapasitas masih cukup
+"""
+
+import logging
+from typing import Dict, Hashable, List, Tuple
+
+class PlacementPlan:
+    """Hasil planning: file -> account_index"""
+
+    def __init__(self):
+        self.assignments: Dict[Hashable, int] = {}
+        self.unplaced: List[Hashable] = []
+        self.planned_bytes: Dict[int, int] = {}
+
+    def account_for(self, key: Hashable):
+        """Account index untuk sebuah file, atau None jika tidak kebagian tempat"""
+        return self.assignments.get(key)
+
+    def summary(self) -> Dict:
+        return {
+            'placed_files': len(self.assignments),
+            'unplaced_files': len(self.unplaced),
+            'planned_bytes': dict(self.planned_bytes)
+        }
+
+class PlacementPlanner:
+    """
+    Assign file ke akun sebelum upload dimulai
+
+    Setiap grup (satu remote folder) diletakkan utuh di satu akun jika
+    memungkinkan. Selama total run kecil dibanding kapasitas bebas, grup
+    diletakkan di akun dengan beban run paling kecil supaya upload paralel
+    tersebar. Jika run mulai menekan kapasitas, planner pindah ke best-fit
+    (akun dengan sisa terkecil yang masih muat) supaya ruang kosong tidak
+    terpecah-pecah. Grup yang tidak muat di akun mana pun dipecah per file.
+    """
+
+    def __init__(self, reserve_ratio: float = 0.01, pressure_ratio: float = 0.5):
+        self.reserve_ratio = reserve_ratio  # Sisakan sebagian quota sebagai safety margin
+        self.pressure_ratio = pressure_ratio  # Run > ratio x kapasitas bebas = mode best-fit
+        self.logger = logging.getLogger(__name__)
+
+    def plan(self, items: List[Tuple[Hashable, str, int]], capacities: Dict[int, int]) -> PlacementPlan:
+        """
+        Buat placement plan
+
+        Args:
+            items: List (key, group, size_bytes); group = remote folder path
+            capacities: account_index -> bytes tersedia
+
+        Returns:
+            PlacementPlan
+        """
+        plan = PlacementPlan()
+        remaining = {
+            index: int(capacity * (1 - self.reserve_ratio))
+            for index, capacity in capacities.items() if capacity > 0
+        }
+        plan.planned_bytes = {index: 0 for index in remaining}
+
+        groups: Dict[str, List[Tuple[Hashable, int]]] = {}
+        for key, group, size in items:
+            groups.setdefault(group, []).append((key, size))
+
+        total_bytes = sum(size for _, _, size in items)
+        total_free = sum(remaining.values())
+        best_fit = total_free == 0 or total_bytes > total_free * self.pressure_ratio
+
+        # Grup terbesar dulu (first-fit-decreasing)
+        ordered = sorted(groups.items(), key=lambda g: sum(size for _, size in g[1]), reverse=True)
+
+        for group, files in ordered:
+            group_size = sum(size for _, size in files)
+            account_index = self._choose(remaining, plan.planned_bytes, group_size, best_fit)
+
+            if account_index is not None:
+                for key, size in files:
+                    self._assign(plan, remaining, key, size, account_index)
+                continue
+
+            # Grup tidak muat utuh: pecah, file terbesar dulu
+            for key, size in sorted(files, key=lambda f: f[1], reverse=True):
+                account_index = self._choose(remaining, plan.planned_bytes, size, True)
+                if account_index is None:
+                    plan.unplaced.append(key)
+                else:
+                    self._assign(plan, remaining, key, size, account_index)
+
+        if plan.unplaced:
+            self.logger.warning(f"{len(plan.unplaced)} files exceed remaining quota on all accounts")
+        return plan
+
+    def _choose(self, remaining: Dict[int, int], planned: Dict[int, int],
+                size: int, best_fit: bool):
+        """Pilih akun untuk size bytes, None jika tidak ada yang muat"""
+        candidates = [index for index, free in remaining.items() if free >= size]
+        if not candidates:
+            return None
+
+        if best_fit:
+            return min(candidates, key=lambda index: remaining[index] - size)
+        # Beban run paling kecil, tie-break sisa quota terbanyak
+        return min(candidates, key=lambda index: (planned[index], -remaining[index]))
+
+    def _assign(self, plan: PlacementPlan, remaining: Dict[int, int],
+                key: Hashable, size: int, account_index: int):
+        plan.assignments[key] = account_index
+        plan.planned_bytes[account_index] += size
+        remaining[account_index] -= size
@@ -0,0 +1,179 @@
+"""
+Quota Tracker untuk pemilihan akun Google Drive tanpa API call per file
+- storageQuota di-refresh dari about() per TTL
+- Dikurangi secara lokal sebesar bytes yang di-upload
+- Pemilihan akun = heap lookup in-memory
+"""
+
+import time
+import heapq
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+GB = 1024 ** 3
+
+class QuotaTracker:
+    """Model quota per akun, dipakai bersama oleh semua pemilih akun"""
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._entries: Dict[int, dict] = {}  # account_index -> {'total', 'used', 'fetched_at', 'error'}
+        self._accounts: Dict[int, object] = {}
+        self._heap: List[tuple] = []  # (-available, version, account_index)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    def _is_stale(self, account_index: int) -> bool:
+        entry = self._entries.get(account_index)
+        return entry is None or time.monotonic() - entry['fetched_at'] > self.ttl_seconds
+
+    def refresh(self, account, force: bool = False) -> Optional[dict]:
+        """
+        Ambil storageQuota dari about() jika cache sudah lewat TTL
+
+        Returns:
+            dict: Entry quota, atau None jika akun tidak bisa dicek
+        """
+        account_index = account.account_index
+        with self._lock:
+            self._accounts[account_index] = account
+            if not force and not self._is_stale(account_index):
+                entry = self._entries[account_index]
+                return None if entry['error'] else entry
+
+        error = None
+        storage_info = None
+        try:
+            storage_info = account.get_storage_usage()
+            if not storage_info:
+                error = "storage usage unavailable"
+        except Exception as e:
+            error = str(e)
+            self.logger.error(f"Error checking storage for account {account_index}: {e}")
+
+        with self._lock:
+            # Akun yang gagal dicek tidak di-retry sampai TTL habis
+            entry = {
+                'total': int(storage_info['total_gb'] * GB) if storage_info else 0,
+                'used': int(storage_info['used_gb'] * GB) if storage_info else 0,
+                'fetched_at': time.monotonic(),
+                'error': error
+            }
+            self._entries[account_index] = entry
+            self._push(account_index)
+            return None if error else entry
+
+    def refresh_all(self, accounts: List, force: bool = False):
+        """Refresh semua akun yang cache-nya sudah lewat TTL"""
+        for account in accounts:
+            self.refresh(account, force=force)
+
+    def _push(self, account_index: int):
+        """Masukkan nilai available terbaru ke heap (entry lama jadi stale)"""
+        version = self._versions.get(account_index, 0) + 1
+        self._versions[account_index] = version
+
+        entry = self._entries[account_index]
+        if entry['error']:
+            return
+        available = entry['total'] - entry['used']
+        heapq.heappush(self._heap, (-available, version, account_index))
+
+        # Entry stale hanya dibuang saat sampai di puncak heap; upload ke akun
+        # yang bukan puncak menumpuk entry, jadi heap di-compact secara berkala
+        if len(self._heap) > 2 * len(self._versions) + 8:
+            self._compact()
+
+    def _compact(self):
+        """Sisakan satu entry live per akun"""
+        self._heap = [entry for entry in self._heap if entry[1] == self._versions.get(entry[2])]
+        heapq.heapify(self._heap)
+
+    def record_upload(self, account_index: int, size_bytes: int):
+        """Kurangi quota lokal setelah upload berhasil"""
+        with self._lock:
+            entry = self._entries.get(account_index)
+            if not entry or entry['error']:
+                return
+            entry['used'] += size_bytes
+            self._push(account_index)
+
+    def invalidate(self, account_index: int = None):
+        """Paksa refresh dari about() pada pemakaian berikutnya"""
+        with self._lock:
+            indexes = [account_index] if account_index is not None else list(self._entries)
+            for index in indexes:
+                self._entries.pop(index, None)
+                self._versions[index] = self._versions.get(index, 0) + 1
+
+    def best_account(self, accounts: List, required_bytes: int = 0,
+                     is_available: Callable[[int], bool] = None):
+        """
+        Akun dengan storage tersedia terbanyak
+
+        Args:
+            accounts: Semua akun yang boleh dipilih
+            required_bytes: Minimal space yang harus tersedia
+            is_available: Filter account_index (misalnya circuit breaker)
+        """
+        self.refresh_all(accounts)
+
+        with self._lock:
+            # Buang entry heap yang sudah tidak berlaku
+            while self._heap:
+                neg_available, version, account_index = self._heap[0]
+                if version == self._versions.get(account_index):
+                    break
+                heapq.heappop(self._heap)
+
+            if is_available is None:
+                candidates = self._heap[:1]
+            else:
+                # Urut dari available terbesar, lewati akun yang ditolak filter
+                # (heap di-compact, jadi ukurannya sebanding jumlah akun)
+                candidates = sorted(
+                    entry for entry in self._heap
+                    if entry[1] == self._versions.get(entry[2])
+                )
+
+            for neg_available, _, account_index in candidates:
+                if -neg_available <= 0 or -neg_available < required_bytes:
+                    return None
+                if is_available is None or is_available(account_index):
+                    return self._accounts.get(account_index)
+            return None
+
+    def available_bytes(self, account) -> int:
+        """Sisa quota (bytes) menurut model, 0 jika akun tidak bisa dicek"""
+        entry = self.refresh(account)
+        if not entry:
+            return 0
+        return max(0, entry['total'] - entry['used'])
+
+    def get_storage_info(self, account) -> Optional[dict]:
+        """Storage info dengan format sama seperti get_storage_usage()"""
+        entry = self.refresh(account)
+        if not entry:
+            return None
+
+        total, used = entry['total'], entry['used']
+        return {
+            'total_gb': total / GB,
+            'used_gb': used / GB,
+            'available_gb': (total - used) / GB,
+            'usage_percentage': (used / total * 100) if total > 0 else 0
+        }
+
+    def get_total_available_gb(self, accounts: List) -> float:
+        """Total storage tersedia di semua akun"""
+        total = 0
+        for account in accounts:
+            storage_info = self.get_storage_info(account)
+            if storage_info:
+                total += storage_info['available_gb']
+        return total
+
+# Global instance: satu model quota untuk backup, restore dan pemilihan akun
+quota_tracker = QuotaTracker()
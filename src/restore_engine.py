@@ -0,0 +1,132 @@
+"""
+Restore Engine untuk restore banyak file dari banyak akun sekaligus
+- Record dikelompokkan per akun Google Drive
+- Download paralel dengan batas concurrency per akun
+- Progress dan throughput agregat
+- Opsional: lewati file yang sudah identik di lokal (differential restore)
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+class RestoreEngine:
+    """
+    Jalankan restore per akun secara paralel
+
+    restore_one(record, restore_path) -> bool melakukan restore satu file
+    (download, dekompresi, reassembly chunk) dan harus thread-safe untuk
+    akun yang sama. is_current(record, restore_path) -> bool (opsional)
+    dicek dulu di worker; jika True file dihitung skipped tanpa download.
+    """
+
+    def __init__(self, restore_one: Callable[[Dict, str], bool],
+                 per_account_concurrency: int = 2,
+                 is_current: Optional[Callable[[Dict, str], bool]] = None):
+        self.restore_one = restore_one
+        self.is_current = is_current
+        self.per_account_concurrency = max(1, per_account_concurrency)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def run(self, jobs: List[Tuple[Dict, str]],
+            progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Restore semua job
+
+        Args:
+            jobs: List (backup_record, restore_path)
+            progress_callback: Dipanggil (dari worker thread) setiap file selesai
+
+        Returns:
+            dict: Ringkasan restore
+        """
+        by_account: Dict[int, List[Tuple[Dict, str]]] = {}
+        for record, restore_path in jobs:
+            by_account.setdefault(record['google_account_index'], []).append((record, restore_path))
+
+        self._progress = {
+            'total_files': len(jobs),
+            'total_bytes': sum(record.get('file_size') or 0 for record, _ in jobs),
+            'completed_files': 0,
+            'successful': 0,
+            'failed': 0,
+            'skipped': 0,
+            'restored_bytes': 0,
+            'skipped_bytes': 0,
+            'per_account': {
+                index: {'files': len(items), 'successful': 0, 'failed': 0, 'skipped': 0}
+                for index, items in by_account.items()
+            }
+        }
+        self._start = time.monotonic()
+        self._callback = progress_callback
+
+        # Satu pool per akun supaya akun lambat tidak memakan slot akun lain
+        executors = [
+            ThreadPoolExecutor(max_workers=self.per_account_concurrency,
+                               thread_name_prefix=f"restore-{index}")
+            for index in by_account
+        ]
+        try:
+            futures = [
+                executor.submit(self._restore_job, account_index, record, restore_path)
+                for executor, (account_index, items) in zip(executors, by_account.items())
+                for record, restore_path in items
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        summary = self._snapshot()
+        self.logger.info(f"Restore completed: {summary}")
+        return summary
+
+    def _restore_job(self, account_index: int, record: Dict, restore_path: str):
+        skipped = False
+        try:
+            skipped = bool(self.is_current and self.is_current(record, restore_path))
+            success = skipped or self.restore_one(record, restore_path)
+        except Exception as e:
+            self.logger.error(f"Error restoring file {record['file_path']}: {e}")
+            success = False
+
+        with self._lock:
+            progress = self._progress
+            account_progress = progress['per_account'][account_index]
+            progress['completed_files'] += 1
+            if skipped:
+                # Sudah identik di lokal: dihitung berhasil, tapi bukan throughput
+                progress['successful'] += 1
+                progress['skipped'] += 1
+                progress['skipped_bytes'] += record.get('file_size') or 0
+                account_progress['successful'] += 1
+                account_progress['skipped'] += 1
+            elif success:
+                progress['successful'] += 1
+                progress['restored_bytes'] += record.get('file_size') or 0
+                account_progress['successful'] += 1
+            else:
+                progress['failed'] += 1
+                account_progress['failed'] += 1
+            snapshot = self._snapshot()
+
+        if self._callback:
+            try:
+                self._callback(snapshot)
+            except Exception as e:
+                self.logger.debug(f"Restore progress callback failed: {e}")
+
+    def _snapshot(self) -> Dict:
+        elapsed = time.monotonic() - self._start
+        progress = dict(self._progress)
+        progress['per_account'] = {k: dict(v) for k, v in self._progress['per_account'].items()}
+        progress['duration_seconds'] = elapsed
+        progress['throughput_mbps'] = (
+            progress['restored_bytes'] / (1024 * 1024) / elapsed if elapsed > 0 else 0
+        )
+        return progress
@@ -0,0 +1,81 @@
+"""
+Retry Scheduler untuk backup run
+- File yang gagal masuk delayed queue dengan backoff timer sendiri
+- Worker tetap memproses file lain selama timer berjalan
+- Run selesai saat semua file sukses atau retry-nya habis
+"""
+
+import time
+import heapq
+import random
+import asyncio
+from collections import deque
+from typing import Any, List, Optional
+
+class RetryScheduler:
+    """Ready queue + delayed queue (min-heap berdasarkan waktu siap)"""
+
+    def __init__(self, base_delay: float, max_delay: float = None, jitter: float = 0.1):
+        self.base_delay = base_delay  # seconds
+        self.max_delay = max_delay if max_delay is not None else base_delay * 8
+        self.jitter = jitter
+        self._ready = deque()
+        self._delayed = []  # (ready_at, seq, item)
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._ready) + len(self._delayed)
+
+    def add(self, item: Any):
+        """Tambahkan item yang langsung siap diproses"""
+        self._ready.append(item)
+
+    def defer(self, item: Any, attempt: int, immediate: bool = False) -> float:
+        """
+        Jadwalkan ulang item setelah gagal
+
+        Args:
+            attempt: Nomor retry (1 = retry pertama)
+            immediate: True untuk failover ke akun lain tanpa menunggu
+
+        Returns:
+            float: Delay dalam detik
+        """
+        if immediate:
+            self._ready.appendleft(item)
+            return 0.0
+
+        delay = min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+        delay += delay * self.jitter * random.random()
+
+        self._seq += 1
+        heapq.heappush(self._delayed, (time.monotonic() + delay, self._seq, item))
+        return delay
+
+    def _promote_due(self):
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, item = heapq.heappop(self._delayed)
+            self._ready.append(item)
+
+    def drain(self) -> List[Any]:
+        """Keluarkan semua item yang tersisa (ready dan delayed)"""
+        items = list(self._ready) + [item for _, _, item in sorted(self._delayed)]
+        self._ready.clear()
+        self._delayed.clear()
+        return items
+
+    async def next(self) -> Optional[Any]:
+        """
+        Item berikutnya yang siap diproses
+
+        Menunggu timer retry terdekat hanya jika tidak ada pekerjaan lain.
+        Return None jika semua item sudah selesai.
+        """
+        while True:
+            self._promote_due()
+            if self._ready:
+                return self._ready.popleft()
+            if not self._delayed:
+                return None
+            await asyncio.sleep(max(0.0, self._delayed[0][0] - time.monotonic()))
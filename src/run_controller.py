@@ -0,0 +1,282 @@
+"""
+Run Controller - satu backup run pada satu waktu
+- Lock eksklusif: in-process + lock file (proses lain, mis. CLI)
+- Pause/resume/cancel lewat cancellation token yang dicek di antara file/chunk
+- Cancel berlaku di batas chunk: upload besar berhenti di antara chunk, file berikutnya tidak dimulai
+- Request berikutnya ikut (join) run yang aktif, atau digabung ke satu run antrian
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+class CancellationToken:
+    """Token cooperative: pipeline memanggil checkpoint() di antara unit kerja"""
+
+    def __init__(self):
+        self._cancelled = asyncio.Event()
+        self._running = asyncio.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # Run yang di-pause harus bangun untuk berhenti
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    async def checkpoint(self) -> bool:
+        """
+        Tunggu selama di-pause
+
+        Returns:
+            bool: False jika run harus berhenti (cancelled)
+        """
+        await self._running.wait()
+        return not self.cancelled
+
+    async def until_cancelled(self, awaitable: Awaitable):
+        """Await sesuatu yang aman dibatalkan (sleep/wait); None jika token di-cancel duluan"""
+        task = asyncio.ensure_future(awaitable)
+        cancel_wait = asyncio.ensure_future(self._cancelled.wait())
+        try:
+            await asyncio.wait({task, cancel_wait}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel_wait.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        return None
+
+class BackupRun:
+    """Satu run (aktif atau antrian) beserta semua request yang ikut"""
+
+    def __init__(self, folders: Optional[Iterable[str]], source: str, force: bool):
+        self.folders = None if folders is None else set(folders)  # None = semua folder
+        self.sources: List[str] = [source]
+        self.force = force
+        self.token = CancellationToken()
+        self.requested_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.last_progress: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str], Awaitable]] = []
+
+    def covers(self, folders: Optional[Iterable[str]]) -> bool:
+        if self.folders is None:
+            return True
+        return folders is not None and set(folders) <= self.folders
+
+    def merge(self, folders: Optional[Iterable[str]], source: str, force: bool):
+        """Gabungkan request ke run yang belum mulai"""
+        self.folders = None if self.folders is None or folders is None else self.folders | set(folders)
+        self.sources.append(source)
+        self.force = self.force or force
+
+    def add_listener(self, callback: Optional[Callable[[str], Awaitable]]):
+        if callback:
+            self._listeners.append(callback)
+
+    async def notify(self, message: str):
+        """Progress callback run: simpan pesan terakhir dan teruskan ke semua request"""
+        self.last_progress = message
+        for callback in list(self._listeners):
+            try:
+                await callback(message)
+            except Exception as e:
+                logging.getLogger(__name__).debug(f"Progress listener failed: {e}")
+
+    async def wait(self) -> Dict:
+        return await asyncio.shield(self.task)
+
+    def status(self) -> Dict:
+        return {
+            'state': 'paused' if self.token.paused else (
+                'cancelling' if self.token.cancelled else (
+                    'running' if self.started_at else 'queued')),
+            'folders': sorted(self.folders) if self.folders is not None else None,
+            'sources': list(self.sources),
+            'requested_at': self.requested_at,
+            'started_at': self.started_at,
+            'last_progress': self.last_progress
+        }
+
+class RunController:
+    """
+    Jalankan backup run secara eksklusif
+
+    runner(token, folders, progress_callback, force) -> dict adalah pipeline
+    backup (EnhancedBackupManager.run_backup_with_progress).
+    """
+
+    def __init__(self, runner: Callable[..., Awaitable[Dict]], lock_path: str = "config/backup.lock"):
+        self.runner = runner
+        self.lock_path = Path(lock_path)
+        self.logger = logging.getLogger(__name__)
+        self.active: Optional[BackupRun] = None
+        self.pending: Optional[BackupRun] = None
+
+    def start(self, folders: Optional[Iterable[str]] = None, source: str = 'manual',
+              progress_callback: Optional[Callable[[str], Awaitable]] = None,
+              force: bool = False, join_active: bool = True) -> Tuple[BackupRun, bool]:
+        """
+        Mulai run, atau ikut run yang sudah ada
+
+        Args:
+            join_active: False jika request butuh scan baru (mis. file yang
+                di-queue setelah run aktif selesai scan); request diantrikan
+
+        Returns:
+            (run, joined): joined True jika request menempel ke run aktif/antrian
+        """
+        if folders is not None:
+            folders = [str(folder) for folder in folders]
+
+        if (join_active and self.active and not self.active.token.cancelled and
+                self.active.covers(folders)):
+            self.active.sources.append(source)
+            self.active.add_listener(progress_callback)
+            self.logger.info(f"Backup request '{source}' joined the active run")
+            return self.active, True
+
+        if self.pending and not self.pending.token.cancelled:
+            self.pending.merge(folders, source, force)
+            self.pending.add_listener(progress_callback)
+            self.logger.info(f"Backup request '{source}' merged into the queued run")
+            return self.pending, True
+
+        run = BackupRun(folders, source, force)
+        run.add_listener(progress_callback)
+        previous = self.active.task if self.active else None
+        if previous:
+            # Run aktif tidak mencakup folder ini: jalan tepat setelahnya
+            self.pending = run
+        else:
+            self.active = run
+        run.task = asyncio.create_task(self._execute(run, previous))
+        return run, False
+
+    async def _execute(self, run: BackupRun, previous: Optional[asyncio.Task]) -> Dict:
+        if previous:
+            await asyncio.wait({previous})
+            if self.pending is run:
+                self.pending = None
+            self.active = run
+
+        lock_file = None
+        try:
+            if run.token.cancelled:
+                return self._result('cancelled', 'Backup cancelled before it started')
+
+            lock_file = self._acquire_file_lock()
+            if lock_file is False:
+                self.logger.warning("Another process holds the backup lock, skipping run")
+                return self._result('locked', 'Another backup process is running')
+
+            run.started_at = datetime.now()
+            folders = sorted(run.folders) if run.folders is not None else None
+            return await self.runner(run.token, folders, run.notify, run.force)
+        except Exception as e:
+            self.logger.error(f"Backup run failed: {e}")
+            return self._result('error', str(e))
+        finally:
+            if self.active is run:
+                self.active = None
+            self._release_file_lock(lock_file)
+
+    def _acquire_file_lock(self):
+        """
+        Lock file untuk proses lain
+
+        Returns:
+            file object (lock dipegang), None (fcntl tidak tersedia) atau
+            False (proses lain memegang lock)
+        """
+        if not FCNTL_AVAILABLE:
+            return None
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        return lock_file
+
+    @staticmethod
+    def _release_file_lock(lock_file):
+        if lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    @staticmethod
+    def _result(status: str, message: str) -> Dict:
+        return {
+            'status': status,
+            'message': message,
+            'total_files': 0,
+            'successful_files': 0,
+            'failed_files': 0,
+            'uploaded_files': 0,
+            'deleted_files': 0,
+            'folders_created': 0,
+            'total_size_mb': 0,
+            'duration_seconds': 0
+        }
+
+    def is_running(self) -> bool:
+        return self.active is not None or self.pending is not None
+
+    def pause(self) -> bool:
+        if not self.active:
+            return False
+        self.active.token.pause()
+        self.logger.info("Backup run paused")
+        return True
+
+    def resume(self) -> bool:
+        if not self.active:
+            return False
+        self.active.token.resume()
+        self.logger.info("Backup run resumed")
+        return True
+
+    def cancel(self) -> bool:
+        """Cancel run aktif dan antrian; upload yang sedang jalan diselesaikan dulu"""
+        runs = [run for run in (self.active, self.pending) if run]
+        for run in runs:
+            run.token.cancel()
+        if runs:
+            self.logger.info("Backup run cancellation requested")
+        return bool(runs)
+
+    def status(self) -> Dict:
+        return {
+            'active': self.active.status() if self.active else None,
+            'pending': self.pending.status() if self.pending else None
+        }
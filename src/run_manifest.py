@@ -0,0 +1,294 @@
+"""
+Run Manifest - katalog backup per run yang ikut disimpan di Drive
+- Di akhir run: semua file run tersebut (path, hash, size, mtime, Drive ID, akun)
+  ditulis sebagai JSON lines + gzip dan di-upload ke folder _manifests
+- Di device baru: manifest di-download paralel dan di-replay ke tracking DB
+"""
+
+import os
+import gzip
+import asyncio
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_FOLDER = '_manifests'
+MANIFEST_SUFFIX = '.jsonl.gz'
+MANIFEST_VERSION = 1
+
+# Batas Drive: key + value appProperties maksimal 124 byte (UTF-8)
+APP_PROPERTY_LIMIT = 124
+
+def app_property(key: str, value: str) -> str:
+    """Potong value (dari kiri, ujung path paling informatif) agar muat di appProperties"""
+    budget = APP_PROPERTY_LIMIT - len(key.encode('utf-8'))
+    encoded = value.encode('utf-8')
+    if len(encoded) <= budget:
+        return value
+    return encoded[-budget:].decode('utf-8', errors='ignore')
+
+def manifest_name(run_id: str) -> str:
+    return f"{run_id}{MANIFEST_SUFFIX}"
+
+def write_manifest(path: Path, run_id: str, entries: List[Dict]):
+    """Header di baris pertama, lalu satu entry per baris"""
+    header = {
+        'version': MANIFEST_VERSION,
+        'run_id': run_id,
+        'created_at': datetime.now().isoformat(),
+        'file_count': len(entries)
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(header) + '\n')
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+def read_manifest(path: Path) -> Tuple[Dict, List[Dict]]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        entries = [json.loads(line) for line in f if line.strip()]
+    return header, entries
+
+class ManifestCatalog:
+    """Publish manifest per run dan rebuild tracking DB dari manifest"""
+
+    def __init__(self, db_path: str, temp_dir: str = "temp/manifests", max_workers: int = 4):
+        self.db_path = db_path
+        self.temp_dir = Path(temp_dir)
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    def build_entries(self, since: datetime) -> List[Dict]:
+        """Semua file yang di-backup sejak `since` (satu run)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM backed_files
+            WHERE upload_status = 'completed' AND backup_date >= ?
+            ORDER BY id
+        ''', (since,))
+        rows = cursor.fetchall()
+
+        entries = []
+        for row in rows:
+            entry = {
+                'path': row['file_path'],
+                'hash': row['file_hash'],
+                'size': row['file_size'],
+                'mtime': row['file_mtime'],
+                'type': row['file_type'],
+                'date': str(row['backup_date']),
+                'account': row['google_account_index'],
+                'id': row['google_file_id'],
+                'folder': row['google_folder_id'],
+                'backup_folder': row['backup_folder'],
+                'compression': row['compression'],
+                'remote_md5': row['remote_md5'],
+                'verification': row['verification_status'],
+            }
+            if row['chunk_manifest_id']:
+                # Chunk list ikut disimpan supaya file chunked bisa di-restore di device baru
+                cursor.execute('''
+                    SELECT e.chunk_hash, e.chunk_size, s.google_file_id
+                    FROM chunk_manifest_entries e
+                    JOIN chunk_store s ON s.chunk_hash = e.chunk_hash AND s.account_index = ?
+                    WHERE e.manifest_id = ?
+                    ORDER BY e.seq
+                ''', (row['google_account_index'], row['chunk_manifest_id']))
+                entry['chunks'] = [list(chunk) for chunk in cursor.fetchall()]
+            entries.append(entry)
+
+        conn.close()
+        return entries
+
+    async def publish_run(self, accounts: List, run_id: str, since: datetime) -> int:
+        """
+        Tulis manifest run ini dan upload ke _manifests di setiap akun yang siap
+
+        Returns:
+            int: Jumlah akun yang menerima manifest
+        """
+        entries = await asyncio.to_thread(self.build_entries, since)
+        if not entries:
+            return 0
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        local_path = self.temp_dir / manifest_name(run_id)
+        await asyncio.to_thread(write_manifest, local_path, run_id, entries)
+
+        published = 0
+        try:
+            for account in accounts:
+                if not account.is_ready:
+                    continue
+                try:
+                    folder_id = await account.ensure_folder_structure(MANIFEST_FOLDER)
+                    uploaded = folder_id and await account.upload_file_with_metadata(
+                        str(local_path), folder_id, manifest_name(run_id), MANIFEST_FOLDER,
+                        app_properties={'backup_manifest': run_id}
+                    )
+                except Exception as e:
+                    self.logger.error(f"Failed to publish manifest to {account.account_name}: {e}")
+                    continue
+                if uploaded:
+                    published += 1
+        finally:
+            local_path.unlink(missing_ok=True)
+
+        self.logger.info(f"Published manifest {run_id} ({len(entries)} files) to {published} accounts")
+        return published
+
+    def expire_manifests(self, account, date_folders: List[str]) -> int:
+        """Hapus manifest run yang date folder-nya sudah dihapus retention"""
+        folder_id = account.folder_cache.get(MANIFEST_FOLDER)
+        if not folder_id or not date_folders:
+            return 0
+
+        expired = [
+            item['id'] for item in account.get_folder_contents(folder_id)
+            if item['name'][:10] in date_folders
+        ]
+        if not expired:
+            return 0
+        results = account.delete_files(expired)
+        return sum(1 for ok in results.values() if ok)
+
+    async def rebuild(self, accounts: List) -> Dict:
+        """
+        Rebuild tracking DB dari semua manifest di semua akun
+
+        Manifest di-download paralel lalu di-replay urut waktu run, jadi
+        entry terbaru untuk setiap path yang menang.
+        """
+        downloads = {}  # manifest name -> (account, file_id)
+        for account in accounts:
+            try:
+                folder_id = await account.ensure_folder_structure(MANIFEST_FOLDER)
+                items = []
+                if folder_id:
+                    await asyncio.to_thread(account.sync_metadata)
+                    items = await asyncio.to_thread(account.get_folder_contents, folder_id)
+            except Exception as e:
+                self.logger.error(f"Failed to list manifests on {account.account_name}: {e}")
+                continue
+            for item in items:
+                # Manifest yang sama ada di setiap akun, cukup download sekali
+                if item['name'].endswith(MANIFEST_SUFFIX):
+                    downloads.setdefault(item['name'], (account, item['id']))
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        manifests = await asyncio.to_thread(self._fetch_manifests, downloads)
+        files = await asyncio.to_thread(self._replay_manifests, manifests)
+
+        summary = {
+            'manifests_found': len(downloads),
+            'manifests_applied': len(manifests),
+            'file_entries': files
+        }
+        self.logger.info(f"Catalog rebuilt from manifests: {summary}")
+        return summary
+
+    def _fetch_manifests(self, downloads: Dict[str, Tuple]) -> List[Tuple[Dict, List[Dict]]]:
+        """Download dan parse manifest secara paralel"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [
+                manifest for manifest in executor.map(self._fetch_manifest, downloads.items())
+                if manifest
+            ]
+
+    def _replay_manifests(self, manifests: List[Tuple[Dict, List[Dict]]]) -> int:
+        """Replay manifest urut waktu run ke tracking DB; return jumlah entry"""
+        manifests.sort(key=lambda manifest: manifest[0]['created_at'])
+        files = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            for header, entries in manifests:
+                for entry in entries:
+                    self._apply_entry(cursor, entry)
+                files += len(entries)
+            conn.commit()
+        finally:
+            conn.close()
+        return files
+
+    def _fetch_manifest(self, item: Tuple[str, Tuple]) -> Optional[Tuple[Dict, List[Dict]]]:
+        name, (account, file_id) = item
+        local_path = self.temp_dir / name
+        try:
+            if not account.download_file(file_id, str(local_path)):
+                return None
+            return read_manifest(local_path)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Unreadable manifest {name}: {e}")
+            return None
+        finally:
+            if local_path.exists():
+                os.remove(local_path)
+
+    def _apply_entry(self, cursor, entry: Dict):
+        cursor.execute("SELECT backup_date FROM backed_files WHERE file_path = ?", (entry['path'],))
+        row = cursor.fetchone()
+        if row and str(row[0]) > entry['date']:
+            return  # Sudah ada versi yang lebih baru
+
+        chunk_manifest_id = None
+        if entry.get('chunks'):
+            chunk_manifest_id = self._restore_chunk_manifest(cursor, entry)
+
+        cursor.execute('''
+            INSERT INTO backed_files
+            (file_path, original_path, file_hash, file_size, file_mtime, file_type, backup_date,
+             google_account_index, google_file_id, google_folder_id, upload_status,
+             compression, remote_md5, verification_status, chunk_manifest_id, backup_folder)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'completed', ?, ?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                file_hash = excluded.file_hash,
+                file_size = excluded.file_size,
+                file_mtime = excluded.file_mtime,
+                file_type = excluded.file_type,
+                backup_date = excluded.backup_date,
+                google_account_index = excluded.google_account_index,
+                google_file_id = excluded.google_file_id,
+                google_folder_id = excluded.google_folder_id,
+                upload_status = 'completed',
+                compression = excluded.compression,
+                remote_md5 = excluded.remote_md5,
+                verification_status = excluded.verification_status,
+                chunk_manifest_id = excluded.chunk_manifest_id,
+                backup_folder = excluded.backup_folder
+        ''', (
+            entry['path'], entry['path'], entry['hash'], entry['size'], entry.get('mtime'),
+            entry.get('type'), entry['date'], entry['account'], entry['id'], entry.get('folder'),
+            entry.get('compression'), entry.get('remote_md5'),
+            entry.get('verification') or 'unverified', chunk_manifest_id,
+            entry.get('backup_folder')
+        ))
+
+    def _restore_chunk_manifest(self, cursor, entry: Dict) -> int:
+        """Buat ulang chunk_manifests/entries/chunk_store untuk satu file chunked"""
+        now = datetime.now()
+        cursor.execute('''
+            INSERT INTO chunk_manifests
+            (file_path, account_index, file_hash, file_size, chunk_count, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (entry['path'], entry['account'], entry['hash'], entry['size'], len(entry['chunks']), now))
+        manifest_id = cursor.lastrowid
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO chunk_manifest_entries (manifest_id, seq, chunk_hash, chunk_size)
+            VALUES (?, ?, ?, ?)
+        ''', [(manifest_id, seq, chunk_hash, size)
+              for seq, (chunk_hash, size, _) in enumerate(entry['chunks'])])
+        cursor.executemany('''
+            INSERT OR IGNORE INTO chunk_store
+            (account_index, chunk_hash, google_file_id, chunk_size, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(entry['account'], chunk_hash, file_id, size, now)
+              for chunk_hash, size, file_id in entry['chunks']])
+        return manifest_id
@@ -1,82 +1,300 @@
 """
 Scheduler untuk menjalankan backup otomatis
+- Jadwal pakai cron expression (5 field), bisa per folder dengan priority
+- Waktu fire berikutnya dihitung langsung dari expression, tanpa polling
+- Run yang terlewat (device sleep / bot mati) dijalankan sekali saat bangun
+- Run dijalankan lewat RunController, jadi tidak pernah overlap dengan backup manual
 """
 
-import time
-import threading
-from datetime import datetime, time as dt_time
+import sqlite3
+import asyncio
 import logging
-from src.backup_manager import BackupManager
-from config.settings import BACKUP_CONFIG
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.run_controller import RunController
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+}
+
+class CronExpression:
+    """Cron expression standar: minute hour day-of-month month day-of-week"""
+
+    # (min, max) per field
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = CRON_ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Minggu boleh 0 atau 7; disimpan sebagai weekday Python (Senin = 0)
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # Seperti cron: jika day-of-month dan day-of-week sama-sama dibatasi, cukup salah satu cocok.
+        # Field yang diawali '*' (termasuk */2) tidak dihitung sebagai pembatas.
+        self._dom_restricted = not fields[2].startswith('*')
+        self._dow_restricted = not fields[4].startswith('*')
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step: '{field}'")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field out of range: '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day: datetime) -> bool:
+        dom = day.day in self.days
+        dow = day.weekday() in self.weekdays
+        if self._dom_restricted and self._dow_restricted:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, after: datetime) -> datetime:
+        """Waktu fire pertama yang > after (resolusi menit)"""
+        current = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        hours = sorted(self.hours)
+        minutes = sorted(self.minutes)
+
+        # Lompat per bulan/hari; paling lama beberapa tahun untuk jadwal seperti 29 Feb
+        for _ in range(366 * 8):
+            if current.month not in self.months:
+                year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+                current = datetime(year, month, 1)
+                continue
+            if not self._day_matches(current):
+                current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+                continue
+
+            # Hari cocok: cari jam/menit pertama >= current di hari ini
+            for hour in hours:
+                if hour < current.hour:
+                    continue
+                start_minute = current.minute if hour == current.hour else 0
+                minute = next((m for m in minutes if m >= start_minute), None)
+                if minute is not None:
+                    return current.replace(hour=hour, minute=minute)
+            current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+
+        raise ValueError(f"Cron expression never fires: '{self.expression}'")
+
+    def __str__(self):
+        return self.expression
+
+class Schedule:
+    """Satu jadwal backup (semua folder atau sebagian)"""
+
+    def __init__(self, name: str, cron: str, folders: Optional[List[str]] = None,
+                 priority: int = 0, catch_up: bool = True):
+        self.name = name
+        self.cron = CronExpression(cron)
+        self.folders = folders or None  # None = semua source folder
+        self.priority = priority  # Lebih tinggi = jalan lebih dulu jika jatuh tempo bersamaan
+        self.catch_up = catch_up
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Schedule':
+        return cls(
+            data['name'], data['cron'], data.get('folders'),
+            data.get('priority', 0), data.get('catch_up', True)
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'cron': str(self.cron),
+            'folders': self.folders,
+            'priority': self.priority,
+            'catch_up': self.catch_up
+        }
+
+def load_schedules(settings) -> List[Schedule]:
+    """
+    Jadwal dari settings 'schedule.entries'
+
+    Tanpa entry, backup.auto_schedule + backup.schedule_time menjadi satu
+    jadwal harian (perilaku lama).
+    """
+    schedules = []
+    for entry in settings.get('schedule.entries', []) or []:
+        try:
+            schedules.append(Schedule.from_dict(entry))
+        except (KeyError, ValueError) as e:
+            logging.getLogger(__name__).error(f"Invalid schedule {entry}: {e}")
+
+    if not schedules and settings.get('backup.auto_schedule', True):
+        hour, minute = map(int, settings.get('backup.schedule_time', '00:00').split(':'))
+        schedules.append(Schedule('daily', f"{minute} {hour} * * *"))
+    return schedules
 
 class BackupScheduler:
-    """Class untuk menjadwalkan backup otomatis"""
-    
-    def __init__(self, backup_manager: BackupManager):
-        self.backup_manager = backup_manager
+    """Scheduler asyncio yang berjalan di event loop bot"""
+
+    def __init__(self, controller: RunController, schedules: List[Schedule], db_path: str,
+                 max_sleep: float = 900.0,
+                 default_folders: Optional[Callable[[], Optional[List[str]]]] = None):
+        self.controller = controller
+        self.schedules = schedules
+        self.db_path = db_path
+        # Folder untuk jadwal tanpa folders (mis. folder yang dipilih di bot)
+        self.default_folders = default_folders
+        # Clock monotonic berhenti saat device sleep: bangun paling lambat
+        # setiap max_sleep detik untuk membandingkan lagi dengan jam dinding
+        self.max_sleep = max_sleep
         self.logger = logging.getLogger(__name__)
-        self.running = False
-        self.scheduler_thread = None
-        
-        # Parse backup time
-        backup_time_str = BACKUP_CONFIG["backup_time"]
-        hour, minute = map(int, backup_time_str.split(":"))
-        self.backup_time = dt_time(hour, minute)
-        
+        self._last_fire: Dict[str, Tuple[datetime, Optional[str]]] = {}  # name -> (last fire, cron)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._init_table()
+        self._load_state()
+
+    def _init_table(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schedule_state (
+                name TEXT PRIMARY KEY,
+                last_fire TEXT,
+                cron TEXT
+            )
+        ''')
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(schedule_state)")]
+        if 'cron' not in columns:
+            conn.execute("ALTER TABLE schedule_state ADD COLUMN cron TEXT")
+        conn.commit()
+        conn.close()
+
+    def _load_state(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT name, last_fire, cron FROM schedule_state").fetchall()
+        conn.close()
+        self._last_fire = {name: (datetime.fromisoformat(last_fire), cron) for name, last_fire, cron in rows}
+
+    def _save_state(self, schedule: Schedule, fired_at: datetime):
+        self._last_fire[schedule.name] = (fired_at, str(schedule.cron))
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO schedule_state (name, last_fire, cron) VALUES (?, ?, ?)",
+            (schedule.name, fired_at.isoformat(), str(schedule.cron))
+        )
+        conn.commit()
+        conn.close()
+
     def start(self):
-        """Start scheduler"""
-        if self.running:
+        """Start scheduler di event loop yang sedang berjalan"""
+        if self._task and not self._task.done():
             self.logger.warning("Scheduler is already running")
             return
-            
-        self.running = True
-        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self.scheduler_thread.start()
-        self.logger.info(f"Backup scheduler started. Will backup daily at {self.backup_time}")
-        
-    def stop(self):
-        """Stop scheduler"""
-        self.running = False
-        if self.scheduler_thread:
-            self.scheduler_thread.join()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._scheduler_loop())
+        for schedule, fire_at in self.next_runs():
+            self.logger.info(f"Schedule '{schedule.name}' ({schedule.cron}) next run at {fire_at}")
+
+    async def stop(self):
+        """Stop scheduler (run yang sedang jalan tidak ikut dihentikan)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
         self.logger.info("Backup scheduler stopped")
-        
-    def _scheduler_loop(self):
+
+    def reload(self, schedules: List[Schedule]):
+        """Ganti jadwal dan hitung ulang fire time berikutnya"""
+        self.schedules = schedules
+        if self._wake:
+            self._wake.set()
+
+    def _next_fire(self, schedule: Schedule, now: datetime) -> datetime:
+        last, cron = self._last_fire.get(schedule.name, (None, None))
+        # Cron diganti (mis. lewat set_schedule): last fire milik jadwal lama, jangan dikejar
+        if last is None or (cron is not None and cron != str(schedule.cron)):
+            # Jadwal baru: mulai dari sekarang, bukan mengejar masa lalu
+            self._save_state(schedule, now)
+            return schedule.cron.next_after(now)
+        fire_at = schedule.cron.next_after(last)
+        if not schedule.catch_up and fire_at < now - timedelta(minutes=1):
+            # Run terlewat dan jadwal ini tidak mau catch-up: lompat ke slot berikutnya
+            self._save_state(schedule, now)
+            return schedule.cron.next_after(now)
+        return fire_at
+
+    def next_runs(self) -> List[tuple]:
+        """(schedule, waktu fire berikutnya), terdekat dulu"""
+        now = datetime.now()
+        runs = [(schedule, self._next_fire(schedule, now)) for schedule in self.schedules]
+        return sorted(runs, key=lambda run: run[1])
+
+    async def _scheduler_loop(self):
         """Main scheduler loop"""
-        last_backup_date = None
-        
-        while self.running:
+        while True:
             try:
-                current_time = datetime.now()
-                current_date = current_time.date()
-                current_time_only = current_time.time()
-                
-                # Check if it's time to backup and we haven't backed up today
-                if (current_time_only >= self.backup_time and 
-                    last_backup_date != current_date):
-                    
-                    self.logger.info("Starting scheduled backup...")
-                    try:
-                        summary = self.backup_manager.run_backup()
-                        self.logger.info(f"Scheduled backup completed: {summary}")
-                        last_backup_date = current_date
-                    except Exception as e:
-                        self.logger.error(f"Error during scheduled backup: {e}")
-                        
-                # Sleep for 60 seconds before next check
-                time.sleep(60)
-                
+                now = datetime.now()
+                upcoming = [(schedule, self._next_fire(schedule, now)) for schedule in self.schedules]
+
+                # Beberapa run terlewat untuk satu jadwal digabung menjadi satu run
+                due = [schedule for schedule, fire_at in upcoming if fire_at <= now]
+                for schedule in sorted(due, key=lambda s: -s.priority):
+                    self._fire(schedule, now)
+
+                pending = [fire_at for _, fire_at in upcoming if fire_at > now]
+                delay = (min(pending) - datetime.now()).total_seconds() if pending else self.max_sleep
+                if due:
+                    delay = 0
+                # asyncio.wait (bukan wait_for) supaya stop() tidak hilang saat reload() bersamaan
+                self._wake.clear()
+                wake = asyncio.ensure_future(self._wake.wait())
+                try:
+                    await asyncio.wait({wake}, timeout=max(0.0, min(delay, self.max_sleep)))
+                finally:
+                    wake.cancel()
+
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)
-                
-    def force_backup(self):
-        """Force backup sekarang juga"""
-        self.logger.info("Forcing immediate backup...")
-        try:
-            summary = self.backup_manager.run_backup()
-            self.logger.info(f"Forced backup completed: {summary}")
-            return summary
-        except Exception as e:
-            self.logger.error(f"Error during forced backup: {e}")
-            return None
+                await asyncio.sleep(60)
+
+    def _fire(self, schedule: Schedule, now: datetime):
+        self._save_state(schedule, now)
+        folders = schedule.folders
+        if folders is None and self.default_folders:
+            folders = self.default_folders()
+        run, joined = self.controller.start(
+            folders=folders, source=f"schedule:{schedule.name}", force=True
+        )
+        if joined:
+            self.logger.info(f"Scheduled backup '{schedule.name}' joined an existing run")
+        else:
+            self.logger.info(f"Starting scheduled backup '{schedule.name}'")
+            run.task.add_done_callback(lambda task: self._log_result(schedule, task))
+
+    def _log_result(self, schedule: Schedule, task: asyncio.Task):
+        if task.cancelled():
+            return
+        summary = task.result()
+        self.logger.info(f"Scheduled backup '{schedule.name}' finished: {summary.get('status')}")
@@ -0,0 +1,316 @@
+"""
+Snapshot Index - point-in-time view dari file yang di-backup
+- Setiap versi file punya interval run [valid_from, valid_to)
+- Run hanya mencatat perubahan (versi baru / file hilang), bukan semua file
+- Snapshot folder pada run tertentu = satu range query di index (file_path, valid_from)
+"""
+
+import sqlite3
+import logging
+from datetime import date, datetime, time as dt_time
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+# Date folder sebuah versi; row lama tanpa backup_folder memakai tanggal backup_date.
+# Versi chunked tidak ada di date folder, jadi tidak pernah cocok.
+BACKUP_FOLDER_SQL = "(CASE WHEN chunk_manifest_id IS NULL THEN COALESCE(backup_folder, DATE(backup_date)) END)"
+
+class SnapshotIndex:
+    """Version history per path + daftar run"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._init_tables()
+
+    def _init_tables(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS backup_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT UNIQUE,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                changed_files INTEGER DEFAULT 0,
+                removed_files INTEGER DEFAULT 0
+            )
+        ''')
+
+        # valid_to NULL = versi masih live; deleted_locally = dihapus oleh
+        # auto-delete setelah upload (bukan oleh user), jadi tetap bagian snapshot
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS file_versions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT,
+                file_hash TEXT,
+                file_size INTEGER,
+                file_mtime REAL,
+                backup_date TIMESTAMP,
+                google_account_index INTEGER,
+                google_file_id TEXT,
+                google_folder_id TEXT,
+                revision_id TEXT,
+                backup_folder TEXT,
+                pinned BOOLEAN DEFAULT 0,
+                compression TEXT,
+                chunk_manifest_id INTEGER,
+                valid_from INTEGER,
+                valid_to INTEGER,
+                deleted_locally BOOLEAN DEFAULT 0,
+                expired BOOLEAN DEFAULT 0
+            )
+        ''')
+        # Overwrite di hari yang sama memakai Drive file yang sama: versi dibedakan lewat revision
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(file_versions)")]
+        if 'revision_id' not in columns:
+            cursor.execute("ALTER TABLE file_versions ADD COLUMN revision_id TEXT")
+        # Date folder run tempat versi di-upload, dipakai retention
+        if 'backup_folder' not in columns:
+            cursor.execute("ALTER TABLE file_versions ADD COLUMN backup_folder TEXT")
+        # Revision di-set keepForever, harus di-unpin saat versinya expired
+        if 'pinned' not in columns:
+            cursor.execute("ALTER TABLE file_versions ADD COLUMN pinned BOOLEAN DEFAULT 0")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_file_versions_path
+            ON file_versions (file_path, valid_from)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_file_versions_open
+            ON file_versions (valid_to, file_path)
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def begin_run(self, run_id: str, started_at: datetime) -> int:
+        """
+        Daftarkan run baru
+
+        Run pertama men-seed versi dari backed_files, supaya backup sebelum
+        snapshot index ada tetap terlihat.
+
+        Returns:
+            int: Run sequence (dipakai sebagai valid_from/valid_to)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM backup_runs")
+        first_run = cursor.fetchone()[0] == 0
+
+        cursor.execute(
+            "INSERT INTO backup_runs (run_id, started_at) VALUES (?, ?)", (run_id, started_at)
+        )
+        run_seq = cursor.lastrowid
+
+        if first_run:
+            cursor.execute('''
+                INSERT INTO file_versions
+                (file_path, file_hash, file_size, file_mtime, backup_date, google_account_index,
+                 google_file_id, google_folder_id, backup_folder, compression, chunk_manifest_id, valid_from)
+                SELECT file_path, file_hash, file_size, file_mtime, backup_date, google_account_index,
+                       google_file_id, google_folder_id, backup_folder, compression, chunk_manifest_id, ?
+                FROM backed_files WHERE upload_status = 'completed'
+            ''', (run_seq,))
+            if cursor.rowcount:
+                self.logger.info(f"Seeded snapshot index with {cursor.rowcount} existing backups")
+
+        conn.commit()
+        conn.close()
+        return run_seq
+
+    def record_version(self, run_seq: int, file_path: str, file_hash: str, file_size: int,
+                       file_mtime: Optional[float], backup_date: datetime, account_index: int,
+                       google_file_id: str, folder_id: Optional[str], compression: Optional[str] = None,
+                       chunk_manifest_id: Optional[int] = None, revision_id: Optional[str] = None,
+                       backup_folder: Optional[str] = None, pinned: bool = False):
+        """Tutup versi live sebelumnya dan buka versi baru mulai run ini"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE file_versions SET valid_to = ? WHERE file_path = ? AND valid_to IS NULL",
+            (run_seq, file_path)
+        )
+        cursor.execute('''
+            INSERT INTO file_versions
+            (file_path, file_hash, file_size, file_mtime, backup_date, google_account_index,
+             google_file_id, google_folder_id, revision_id, backup_folder, pinned, compression,
+             chunk_manifest_id, valid_from)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (file_path, file_hash, file_size, file_mtime, backup_date, account_index,
+              google_file_id, folder_id, revision_id, backup_folder, pinned, compression,
+              chunk_manifest_id, run_seq))
+        cursor.execute(
+            "UPDATE backup_runs SET changed_files = changed_files + 1 WHERE id = ?", (run_seq,)
+        )
+        conn.commit()
+        conn.close()
+
+    def mark_deleted_locally(self, file_path: str):
+        """File live dihapus auto-delete setelah upload: tetap bagian dari snapshot"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "UPDATE file_versions SET deleted_locally = 1 WHERE file_path = ? AND valid_to IS NULL",
+            (file_path,)
+        )
+        conn.commit()
+        conn.close()
+
+    def finish_run(self, run_seq: int, source_folders: Iterable[str], present_paths: Iterable[str]):
+        """
+        Tutup run: versi live di source_folders yang tidak ada lagi di
+        present_paths (dihapus user) berakhir di run ini
+        """
+        present = set(present_paths)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        removed = []
+        for folder in source_folders:
+            low, high = self._prefix_range(folder)
+            cursor.execute('''
+                SELECT id, file_path FROM file_versions
+                WHERE valid_to IS NULL AND deleted_locally = 0
+                  AND file_path >= ? AND file_path < ?
+            ''', (low, high))
+            removed.extend(version_id for version_id, path in cursor.fetchall() if path not in present)
+
+        cursor.executemany(
+            "UPDATE file_versions SET valid_to = ? WHERE id = ?",
+            [(run_seq, version_id) for version_id in removed]
+        )
+        cursor.execute(
+            "UPDATE backup_runs SET finished_at = ?, removed_files = ? WHERE id = ?",
+            (datetime.now(), len(removed), run_seq)
+        )
+        conn.commit()
+        conn.close()
+
+    def expire_versions(self, account_index: int, backup_folders: List[str]):
+        """Versi di date folder yang dihapus retention tidak bisa di-restore lagi"""
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(f'''
+            UPDATE file_versions SET expired = 1
+            WHERE google_account_index = ? AND {BACKUP_FOLDER_SQL} = ?
+        ''', [(account_index, folder) for folder in backup_folders])
+        conn.commit()
+        conn.close()
+
+    def live_backup_folders(self, account_index: int) -> Set[str]:
+        """Date folder yang masih menyimpan versi live (satu-satunya copy file yang masih ada)"""
+        rows = self._query(f'''
+            SELECT DISTINCT {BACKUP_FOLDER_SQL} AS folder FROM file_versions
+            WHERE google_account_index = ? AND valid_to IS NULL AND expired = 0
+              AND chunk_manifest_id IS NULL
+        ''', (account_index,))
+        return {row['folder'] for row in rows if row['folder']}
+
+    def live_revision(self, file_path: str, google_file_id: str) -> Optional[Dict]:
+        """Versi live file_path yang tersimpan sebagai revision dari Drive file google_file_id"""
+        rows = self._query('''
+            SELECT id, revision_id, pinned FROM file_versions
+            WHERE file_path = ? AND google_file_id = ? AND valid_to IS NULL
+              AND revision_id IS NOT NULL AND expired = 0
+        ''', (file_path, google_file_id))
+        return rows[0] if rows else None
+
+    def mark_pinned(self, version_ids: List[int], pinned: bool = True):
+        """Catat status keepForever revision dari versi-versi ini"""
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "UPDATE file_versions SET pinned = ? WHERE id = ?",
+            [(pinned, version_id) for version_id in version_ids]
+        )
+        conn.commit()
+        conn.close()
+
+    def expire_superseded_revisions(self, account_index: int, before: datetime) -> List[Dict]:
+        """
+        Expire versi lama dari Drive file yang di-update in-place dan sudah
+        digantikan sebelum before (object-nya tetap ada, hanya revision-nya)
+
+        Returns:
+            list: Versi yang revision-nya masih di-pin (harus di-unpin)
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT v.id, v.google_file_id, v.revision_id, v.pinned FROM file_versions v
+            JOIN backup_runs r ON r.id = v.valid_to
+            WHERE v.google_account_index = ? AND v.expired = 0
+              AND v.revision_id IS NOT NULL AND r.started_at < ?
+              AND EXISTS (SELECT 1 FROM file_versions n
+                          WHERE n.google_file_id = v.google_file_id AND n.id > v.id)
+        ''', (account_index, before))
+        expired = [dict(row) for row in cursor.fetchall()]
+        cursor.executemany(
+            "UPDATE file_versions SET expired = 1 WHERE id = ?", [(row['id'],) for row in expired]
+        )
+        conn.commit()
+        conn.close()
+        return [row for row in expired if row['pinned']]
+
+    def file_revisions(self, file_path: str) -> List[Dict]:
+        """Versi sebuah file yang tersimpan sebagai Drive revision, terbaru dulu"""
+        return self._query('''
+            SELECT * FROM file_versions
+            WHERE file_path = ? AND revision_id IS NOT NULL AND expired = 0
+            ORDER BY id DESC
+        ''', (file_path,))
+
+    @staticmethod
+    def _prefix_range(folder: str):
+        """Range [low, high) untuk semua path di bawah folder (index-friendly)"""
+        prefix = folder.rstrip('/') + '/'
+        return prefix, prefix[:-1] + chr(ord('/') + 1)
+
+    def list_runs(self, limit: int = 50) -> List[Dict]:
+        """Run yang bisa dipilih sebagai snapshot, terbaru dulu"""
+        return self._query(
+            "SELECT * FROM backup_runs WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+
+    def resolve_run(self, at: Union[str, date, datetime]) -> Optional[Dict]:
+        """
+        Run untuk sebuah titik waktu
+
+        Args:
+            at: run_id, datetime (run terakhir yang mulai sebelumnya) atau
+                date (run terakhir pada/sebelum hari itu)
+        """
+        if isinstance(at, str):
+            rows = self._query("SELECT * FROM backup_runs WHERE run_id = ?", (at,))
+        else:
+            if not isinstance(at, datetime):
+                at = datetime.combine(at, dt_time.max)
+            rows = self._query('''
+                SELECT * FROM backup_runs
+                WHERE started_at <= ? AND finished_at IS NOT NULL
+                ORDER BY id DESC LIMIT 1
+            ''', (at,))
+        return rows[0] if rows else None
+
+    def snapshot(self, folder: str, run_seq: int) -> List[Dict]:
+        """
+        Versi file di bawah folder yang live pada run run_seq
+
+        Record-nya kompatibel dengan FileRecoveryManager.restore_file.
+        """
+        low, high = self._prefix_range(folder)
+        return self._query('''
+            SELECT * FROM file_versions
+            WHERE file_path >= ? AND file_path < ?
+              AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+              AND expired = 0
+            ORDER BY file_path
+        ''', (low, high, run_seq, run_seq))
+
+    def _query(self, query: str, params: tuple = ()) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
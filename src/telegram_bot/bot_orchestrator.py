@@ -16,6 +16,7 @@ from .handlers.backup import BackupHandler
 from .handlers.settings import SettingsHandler
 from .handlers.logs import LogsHandler
 from .handlers.help import HelpHandler
+from .services.backup_service import backup_service
 
 # Configure logging
 logging.basicConfig(
@@ -44,6 +45,7 @@ class TermuxTelegramBot:
         app.add_handler(CommandHandler("add_folder", self.add_folder_command))
         app.add_handler(CommandHandler("create_folder", self.create_folder_command))
         app.add_handler(CommandHandler("add_existing", self.add_existing_command))
+        app.add_handler(CommandHandler("schedule", self.schedule_command))
         
         # Main navigation callback handlers
         app.add_handler(CallbackQueryHandler(self.main_menu_callback, pattern="^back_to_main$"))
@@ -67,7 +69,14 @@ class TermuxTelegramBot:
         app.add_handler(CallbackQueryHandler(self.quick_backup_callback, pattern="^quick_backup$"))
         app.add_handler(CallbackQueryHandler(self.schedule_backup_callback, pattern="^schedule_backup$"))
         app.add_handler(CallbackQueryHandler(self.manual_backup_callback, pattern="^manual_backup$"))
-        app.add_handler(CallbackQueryHandler(self.stop_backup_callback, pattern="^stop_backup$"))
+        app.add_handler(CallbackQueryHandler(self.single_folder_backup_callback, pattern="^do_single_folder$"))
+        app.add_handler(CallbackQueryHandler(self.backup_folder_now_callback, pattern="^backup_now_"))
+        app.add_handler(CallbackQueryHandler(self.stop_backup_callback, pattern="^(stop|cancel)_backup$"))
+        app.add_handler(CallbackQueryHandler(self.pause_backup_callback, pattern="^pause_backup$"))
+        app.add_handler(CallbackQueryHandler(self.resume_backup_callback, pattern="^resume_backup$"))
+        app.add_handler(CallbackQueryHandler(self.schedule_preset_callback, pattern="^schedule_(hourly|daily|weekly)$"))
+        app.add_handler(CallbackQueryHandler(self.schedule_custom_callback, pattern="^schedule_custom$"))
+        app.add_handler(CallbackQueryHandler(self.schedule_disable_callback, pattern="^schedule_disable$"))
         
         # Account management handlers
         app.add_handler(CallbackQueryHandler(self.manage_accounts_callback, pattern="^manage_accounts$"))
@@ -509,10 +518,46 @@ class TermuxTelegramBot:
         """Wrapper for manual backup callback"""
         await BackupHandler.manual_backup_menu(update.callback_query)
     
+    async def single_folder_backup_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for single folder backup menu"""
+        await BackupHandler.do_single_folder(update.callback_query)
+    
+    async def backup_folder_now_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for backing up one folder now"""
+        callback_data = update.callback_query.data
+        # Extract folder name from callback_data "backup_now_{folder_name}"
+        folder_name = callback_data.replace("backup_now_", "", 1)
+        await BackupHandler.backup_folder_now(update.callback_query, folder_name)
+    
     async def stop_backup_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Wrapper for stop backup callback"""
         await BackupHandler.stop_backup(update.callback_query)
     
+    async def pause_backup_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for pause backup callback"""
+        await BackupHandler.pause_backup(update.callback_query)
+    
+    async def resume_backup_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for resume backup callback"""
+        await BackupHandler.resume_backup(update.callback_query)
+    
+    async def schedule_preset_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for hourly/daily/weekly schedule callback"""
+        preset = update.callback_query.data.replace("schedule_", "", 1)
+        await BackupHandler.schedule_preset(update.callback_query, preset)
+    
+    async def schedule_custom_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for custom schedule callback"""
+        await BackupHandler.schedule_custom(update.callback_query)
+    
+    async def schedule_disable_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Wrapper for disable schedule callback"""
+        await BackupHandler.schedule_disable(update.callback_query)
+    
+    async def schedule_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /schedule command"""
+        await BackupHandler.schedule_command(update, context)
+    
     async def manage_accounts_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Wrapper for manage accounts callback"""
         await GoogleDriveHandler.manage_accounts(update.callback_query)
@@ -658,12 +703,27 @@ class TermuxTelegramBot:
     
     async def backup_progress_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Wrapper for backup progress callback"""
-        await GoogleDriveHandler.backup_progress(update.callback_query)
+        await update.callback_query.answer("📊 Checking progress...")
+        await BackupHandler.backup_progress(update.callback_query)
+    
+    async def post_init(self, application: Application):
+        """Start backup scheduler di event loop bot"""
+        await backup_service.start_scheduler()
+    
+    async def post_shutdown(self, application: Application):
+        """Stop backup scheduler"""
+        await backup_service.stop_scheduler()
     
     def create_application(self):
         """Create and configure the bot application"""
         # Create application
-        self.application = Application.builder().token(self.token).build()
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
         
         # Setup all handlers
         self.setup_handlers()
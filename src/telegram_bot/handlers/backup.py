@@ -5,8 +5,16 @@
 from datetime import datetime
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
 
 from ..config.manager import config_manager
+from ..services.backup_service import backup_service, ALL_FOLDERS_SCHEDULE
+
+# Preset tombol schedule menu -> cron expression (daily memakai backup.schedule_time)
+SCHEDULE_PRESETS = {
+    'hourly': '0 * * * *',
+    'weekly': '0 0 * * 0',
+}
 
 class BackupHandler:
     """💾 Handle backup operations"""
@@ -105,26 +113,37 @@ class BackupHandler:
             )
             return
         
-        # Start backup process
+        # Start backup process (atau ikut run yang sedang berjalan)
+        try:
+            run, joined = backup_service.start_backup(source='manual')
+        except Exception as e:
+            await query.edit_message_text(
+                f"❌ *BACKUP FAILED*\n\n⚠️ {escape_markdown(str(e))}",
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=InlineKeyboardMarkup([
+                    [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
+                ])
+            )
+            return
+        
+        title = "🔄 *BACKUP ALREADY RUNNING*" if joined else "🚀 *QUICK BACKUP STARTED*"
+        note = ("💡 *Your request joined the current run, no duplicate upload.*" if joined
+                else "💡 *Backup runs in background. Use View Progress to follow it.*")
         backup_text = f"""
-🚀 *QUICK BACKUP STARTED*
+{title}
 
 📊 *Configuration:*
 • Accounts: {status['credentials_count']} Google Drive
 • Folders: {status['folder_count']} monitored
 • Auto-Delete: {'✅ Enabled' if status['auto_delete'] else '❌ Disabled'}
-• Started: {datetime.now().strftime('%H:%M:%S')}
-
-🔄 *Progress:*
-• Scanning: ⏳ In progress...
-• Upload: ⏳ Waiting...
-• Cleanup: ⏳ Waiting...
+• Requested: {run.requested_at.strftime('%H:%M:%S')}
 
-*This is a demo. Full implementation ready!*
+{note}
         """
         
         keyboard = [
-            [InlineKeyboardButton("⏸️ Stop Backup", callback_data="stop_backup")],
+            [InlineKeyboardButton("⏸️ Pause", callback_data="pause_backup"),
+             InlineKeyboardButton("⏹️ Stop Backup", callback_data="stop_backup")],
             [InlineKeyboardButton("📊 View Progress", callback_data="backup_progress")],
             [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
         ]
@@ -136,23 +155,108 @@ class BackupHandler:
             reply_markup=reply_markup
         )
     
+    @staticmethod
+    async def do_single_folder(query):
+        """📱 Pilih satu folder untuk di-backup sekarang"""
+        folders = [f for f in config_manager.get_folders() if f.get('active', True)]
+        
+        if not folders:
+            text = """
+📱 *SINGLE FOLDER BACKUP*
+
+⚠️ *No active folders configured*
+
+💡 *Add folders from main menu.*
+            """
+            keyboard = [
+                [InlineKeyboardButton("📁 Add Folders", callback_data="manage_folders")],
+                [InlineKeyboardButton("🔙 Back", callback_data="manual_backup")]
+            ]
+        else:
+            text = """
+📱 *SINGLE FOLDER BACKUP*
+
+🎯 *Choose folder to back up now:*
+
+💡 *Files from this folder are uploaded before anything else in the queue.*
+            """
+            keyboard = [
+                [InlineKeyboardButton(f"📁 {folder['name']}", callback_data=f"backup_now_{folder['name']}")]
+                for folder in folders
+            ]
+            keyboard.append([InlineKeyboardButton("🔙 Back", callback_data="manual_backup")])
+        
+        await query.edit_message_text(
+            text,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    
+    @staticmethod
+    async def backup_folder_now(query, folder_name: str):
+        """📁 Backup satu folder sekarang (priority upload)"""
+        await query.answer(f"🚀 Backing up {folder_name}...")
+        
+        try:
+            run, joined = backup_service.backup_folder_now(folder_name)
+        except Exception as e:
+            await query.edit_message_text(
+                f"❌ *BACKUP FAILED*\n\n⚠️ {escape_markdown(str(e))}",
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=InlineKeyboardMarkup([
+                    [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
+                ])
+            )
+            return
+        
+        title = "🔄 *BACKUP ALREADY RUNNING*" if joined else "🚀 *FOLDER BACKUP STARTED*"
+        note = ("💡 *Folder is queued first for the next run.*" if joined
+                else "💡 *Backup runs in background. Use View Progress to follow it.*")
+        backup_text = f"""
+{title}
+
+📁 *Folder:* {escape_markdown(folder_name)}
+• Requested: {run.requested_at.strftime('%H:%M:%S')}
+
+{note}
+        """
+        
+        keyboard = [
+            [InlineKeyboardButton("⏸️ Pause", callback_data="pause_backup"),
+             InlineKeyboardButton("⏹️ Stop Backup", callback_data="stop_backup")],
+            [InlineKeyboardButton("📊 View Progress", callback_data="backup_progress")],
+            [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
+        ]
+        
+        await query.edit_message_text(
+            backup_text,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    
     @staticmethod
     async def stop_backup(query):
-        """⏸️ Stop backup operation"""
-        await query.answer("⏸️ Stopping backup...")
+        """⏹️ Stop backup operation"""
+        await query.answer("⏹️ Stopping backup...")
         
-        stop_text = """
-⏸️ *BACKUP STOPPED*
+        if backup_service.cancel():
+            stop_text = """
+⏹️ *STOPPING BACKUP*
 
-📊 *Final Status:*
+📊 *Status:*
 • Operation: Cancelled by user
-• Files processed: 0
-• Time elapsed: 0 seconds
-• Status: ✅ Clean stop
+• Upload in progress: stops at the next chunk
+• Remaining files: picked up by the next run
 
 🎯 *You can restart backup anytime from the main menu.*
-        """
-        
+            """
+        else:
+            stop_text = """
+⏹️ *NO BACKUP RUNNING*
+
+🎯 *You can start a backup anytime from the main menu.*
+            """
+
         keyboard = [
             [InlineKeyboardButton("🚀 Start New Backup", callback_data="quick_backup")],
             [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
@@ -165,10 +269,97 @@ class BackupHandler:
             reply_markup=reply_markup
         )
     
+    @staticmethod
+    async def pause_backup(query):
+        """⏸️ Pause backup (di batas chunk/file berikutnya)"""
+        if backup_service.pause():
+            await query.answer("⏸️ Backup paused")
+        else:
+            await query.answer("No backup running")
+        await BackupHandler.backup_progress(query)
+    
+    @staticmethod
+    async def resume_backup(query):
+        """▶️ Resume backup"""
+        if backup_service.resume():
+            await query.answer("▶️ Backup resumed")
+        else:
+            await query.answer("No backup running")
+        await BackupHandler.backup_progress(query)
+    
+    @staticmethod
+    async def backup_progress(query):
+        """📊 Status run aktif dan antrian"""
+        status = backup_service.status()
+        active = status['active']
+        pending = status['pending']
+        
+        if not active and not pending:
+            progress_text = """
+📊 *BACKUP PROGRESS*
+
+✅ *No backup running*
+
+💡 *Start a backup from the main menu or wait for the next schedule.*
+            """
+            keyboard = [
+                [InlineKeyboardButton("🚀 Start Backup", callback_data="quick_backup")],
+                [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
+            ]
+        else:
+            progress_text = "\n📊 *BACKUP PROGRESS*\n"
+            for label, run in (("Current run", active), ("Queued run", pending)):
+                if not run:
+                    continue
+                started = run['started_at'].strftime('%H:%M:%S') if run['started_at'] else '-'
+                folders = len(run['folders']) if run['folders'] is not None else 'all'
+                progress_text += f"""
+🔄 *{label}:* {run['state']}
+• Started: {started}
+• Folders: {folders}
+• Requested by: {escape_markdown(', '.join(run['sources']))}
+• Last update: {escape_markdown(run['last_progress'] or 'Scanning...')}
+"""
+            pause_button = (
+                InlineKeyboardButton("▶️ Resume", callback_data="resume_backup")
+                if active and active['state'] == 'paused'
+                else InlineKeyboardButton("⏸️ Pause", callback_data="pause_backup")
+            )
+            keyboard = [
+                [InlineKeyboardButton("🔄 Refresh", callback_data="backup_progress")],
+                [pause_button, InlineKeyboardButton("⏹️ Stop Backup", callback_data="stop_backup")],
+                [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_main")]
+            ]
+        
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        try:
+            await query.edit_message_text(
+                progress_text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=reply_markup
+            )
+        except Exception:
+            pass  # Telegram menolak edit jika isi pesan tidak berubah (Refresh)
+    
+    @staticmethod
+    def _schedule_summary() -> str:
+        """📅 Daftar jadwal aktif dan waktu run berikutnya"""
+        next_runs = backup_service.next_runs()
+        if not next_runs:
+            return "⚡ *Current Status:* Manual only"
+        
+        summary = "⚡ *Active schedules:*\n"
+        for schedule, fire_at in next_runs:
+            target = "all folders" if schedule.name == ALL_FOLDERS_SCHEDULE else schedule.name.split(':', 1)[-1]
+            summary += (f"• `{schedule.cron}` - {escape_markdown(target)}\n"
+                        f"  next: {fire_at.strftime('%Y-%m-%d %H:%M')}\n")
+        return summary
+    
     @staticmethod
     async def schedule_backup_menu(query):
         """⏰ Schedule backup menu"""
-        schedule_text = """
+        schedule_text = f"""
 ⏰ *SCHEDULE BACKUP*
 
 📅 *Automatic backup scheduling:*
@@ -178,12 +369,11 @@ class BackupHandler:
 📅 *Weekly* - Once per week
 🗓️ *Custom* - Set your own schedule
 
-⚡ *Current Status:* Manual only
-🔔 *Notifications:* Enabled
+{BackupHandler._schedule_summary()}
 
-💡 *Scheduled backups run in background automatically.*
+💡 *Missed runs (phone asleep) run once as soon as the bot is back.*
         """
-        
+
         keyboard = [
             [InlineKeyboardButton("🕐 Hourly Backup", callback_data="schedule_hourly")],
             [InlineKeyboardButton("🌅 Daily Backup", callback_data="schedule_daily")],
@@ -199,3 +389,81 @@ class BackupHandler:
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
+    
+    @staticmethod
+    async def schedule_preset(query, preset: str):
+        """⏰ Terapkan preset hourly/daily/weekly untuk semua folder"""
+        if preset == 'daily':
+            time_str = backup_service.manager.settings.get('backup.schedule_time', '00:00')
+            hour, minute = map(int, time_str.split(':'))
+            cron = f"{minute} {hour} * * *"
+        else:
+            cron = SCHEDULE_PRESETS[preset]
+        
+        backup_service.set_schedule(cron)
+        await query.answer(f"⏰ {preset.capitalize()} backup scheduled")
+        await BackupHandler.schedule_backup_menu(query)
+    
+    @staticmethod
+    async def schedule_disable(query):
+        """⏸️ Matikan semua jadwal"""
+        backup_service.disable_schedules()
+        await query.answer("⏸️ Schedule disabled")
+        await BackupHandler.schedule_backup_menu(query)
+    
+    @staticmethod
+    async def schedule_custom(query):
+        """🗓️ Petunjuk jadwal custom (cron)"""
+        await query.answer("🗓️ Custom schedule")
+        
+        custom_text = """
+🗓️ *CUSTOM SCHEDULE*
+
+🎯 Usage: `/schedule <minute> <hour> <day> <month> <weekday> [folder name]`
+
+📋 Examples:
+• `/schedule 30 2 * * *` - every day at 02:30
+• `/schedule 0 */6 * * *` - every 6 hours
+• `/schedule 0 21 * * 1-5 WhatsApp` - WhatsApp folder, weekdays at 21:00
+• `/schedule off` - disable all schedules
+
+💡 *A folder schedule only backs up that folder.*
+        """
+        
+        keyboard = [
+            [InlineKeyboardButton("🔙 Back", callback_data="schedule_backup")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(
+            custom_text,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=reply_markup
+        )
+    
+    @staticmethod
+    async def schedule_command(update, context):
+        """⏰ /schedule <cron> [folder], /schedule off, /schedule (lihat jadwal)"""
+        args = context.args or []
+        
+        if not args:
+            text = f"⏰ *BACKUP SCHEDULE*\n\n{BackupHandler._schedule_summary()}"
+        elif args == ['off']:
+            backup_service.disable_schedules()
+            text = "⏸️ *All backup schedules disabled*"
+        elif len(args) < 5:
+            text = "❌ Usage: `/schedule <minute> <hour> <day> <month> <weekday> [folder name]`"
+        else:
+            cron = ' '.join(args[:5])
+            folder_name = ' '.join(args[5:]) or None
+            try:
+                schedule = backup_service.set_schedule(cron, folder_name)
+            except ValueError as e:
+                text = f"❌ {escape_markdown(str(e))}"
+            else:
+                next_run = schedule.cron.next_after(datetime.now())
+                target = escape_markdown(folder_name) if folder_name else "all folders"
+                text = (f"✅ *Schedule saved*\n\n• Cron: `{schedule.cron}`\n• Folders: {target}\n"
+                        f"• Next run: {next_run.strftime('%Y-%m-%d %H:%M')}")
+        
+        await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
@@ -4,8 +4,20 @@
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
 
 from ...config.manager import config_manager
+from ....drive_metadata_mirror import DriveMetadataMirror
+
+
+def _format_size(size_bytes: int) -> str:
+    """Format file size in human readable format"""
+    size = float(size_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
 
 
 class GoogleDriveFileHandler:
@@ -195,45 +207,51 @@ class GoogleDriveFileHandler:
     
     @staticmethod
     async def list_drive_files(query):
-        """📋 List Google Drive files"""
+        """📋 List Google Drive files (dari mirror metadata lokal)"""
         await query.answer("📋 Loading files...")
         
-        credentials_count = config_manager.count_credentials()
-        active_account = config_manager.get_active_account() or 1
+        db_path = config_manager.config_dir / "backup_tracking.db"
+        accounts = []
+        if db_path.exists():
+            mirror = DriveMetadataMirror(str(db_path))
+            accounts = mirror.synced_accounts()
         
-        # TODO: Implement actual Google Drive API call to list files
-        # For now, show demo structure
-        
-        files_text = f"""
+        if not accounts:
+            files_text = """
 📋 *GOOGLE DRIVE FILES*
 
-🔄 *Account: {active_account}*
-📊 *Storage: 15GB available*
-
-📁 *Files & Folders:*
+⚠️ *No file index yet*
 
-**Recent Files:**
-• 📄 backup_2024-09-18.zip (25MB)
-• 📷 IMG_20240918_001.jpg (3.2MB)
-• 📝 documents_backup.zip (12MB)
-• 🎵 music_collection.mp3 (8.5MB)
-
-**Folders:**
-• 📁 Backups/ (45 files)
-• 📁 Photos/ (128 files)
-• 📁 Documents/ (23 files)
-• 📁 Archives/ (8 files)
-
-💡 *Total Files: 204*
-💽 *Used Space: ~2.1GB*
-📊 *Available: ~12.9GB*
-
-⚡ *Actions Available:*
-• Download individual files
-• Share files via link
-• Delete old backups
-• Organize folders
-        """
+💡 The file list is built during the first backup run.
+Run a backup, then refresh this list.
+            """
+        else:
+            files_text = "📋 *GOOGLE DRIVE FILES*\n"
+            for state in accounts:
+                index = state['account_index']
+                summary = mirror.get_summary(index)
+                files_text += (
+                    f"\n🔄 *Account {index}*\n"
+                    f"📊 {summary['file_count']} files in {summary['folder_count']} folders "
+                    f"({_format_size(summary['total_bytes'])})\n"
+                    f"🕐 Synced: {str(state['synced_at'])[:16]}\n"
+                )
+                
+                if state['root_folder_id']:
+                    folders = mirror.list_children(
+                        index, state['root_folder_id'], folders_only=True, order_by='created_desc'
+                    )
+                    if folders:
+                        files_text += "\n*Latest Backups:*\n"
+                        for folder in folders[:5]:
+                            files_text += f"• 📁 {escape_markdown(folder['name'])}/\n"
+                
+                recent = mirror.recent_files(index, limit=5)
+                if recent:
+                    files_text += "\n*Recent Files:*\n"
+                    for item in recent:
+                        size = _format_size(int(item.get('size', 0)))
+                        files_text += f"• 📄 {escape_markdown(item['name'])} ({size})\n"
         
         keyboard = [
             [InlineKeyboardButton("🔄 Refresh List", callback_data="list_drive_files")],
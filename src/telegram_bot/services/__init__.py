@@ -2,5 +2,6 @@
 🔧 Services Package - Core services
 """
 
-# Services akan ditambahkan nanti saat diperlukan
-__all__ = []
+from .backup_service import BackupService, backup_service
+
+__all__ = ['BackupService', 'backup_service']
@@ -0,0 +1,158 @@
+"""
+🔄 Backup Service - Backup pipeline, run controller dan scheduler di proses bot
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from ..config.manager import config_manager
+from ...scheduler import BackupScheduler, Schedule, load_schedules
+
+logger = logging.getLogger(__name__)
+
+# Nama jadwal untuk semua folder (preset hourly/daily/weekly menggantikan satu sama lain)
+ALL_FOLDERS_SCHEDULE = 'all_folders'
+
+class BackupService:
+    """🔄 Satu EnhancedBackupManager + scheduler untuk semua handler bot"""
+
+    def __init__(self):
+        self._manager = None
+        self.scheduler: Optional[BackupScheduler] = None
+        self._audit_task: Optional[asyncio.Task] = None
+
+    @property
+    def manager(self):
+        """EnhancedBackupManager dibuat saat pertama dipakai (load akun cukup berat)"""
+        if self._manager is None:
+            from ...enhanced_backup_manager import EnhancedBackupManager
+            self._manager = EnhancedBackupManager()
+        return self._manager
+
+    @staticmethod
+    def monitored_folders() -> Optional[List[str]]:
+        """📁 Folder aktif dari bot (None = source_folders di settings)"""
+        folders = [
+            folder['path'] for folder in config_manager.get_folders()
+            if folder.get('active', True) and folder.get('path')
+        ]
+        return folders or None
+
+    def start_backup(self, folders: Optional[List[str]] = None, source: str = 'manual',
+                     progress_callback=None):
+        """
+        🚀 Mulai backup, atau ikut run yang sedang berjalan
+
+        Returns:
+            (BackupRun, joined)
+        """
+        return self.manager.run_controller.start(
+            folders or self.monitored_folders(), source, progress_callback, force=True
+        )
+
+    def backup_folder_now(self, folder_name: str):
+        """
+        📁 Backup satu folder bot sekarang, file-nya di-upload lebih dulu
+
+        Returns:
+            (BackupRun, joined)
+
+        Raises:
+            ValueError: Nama folder tidak dikenal
+        """
+        path = self._folder_path(folder_name)
+        self.manager.request_priority_backup(path)
+        return self.start_backup([path], source=f"manual:{folder_name}")
+
+    @staticmethod
+    def _folder_path(folder_name: str) -> str:
+        match = next((f for f in config_manager.get_folders() if f.get('name') == folder_name), None)
+        if not match:
+            raise ValueError(f"Unknown folder: {folder_name}")
+        return match['path']
+
+    def is_running(self) -> bool:
+        return self._manager is not None and self._manager.run_controller.is_running()
+
+    def status(self) -> Dict:
+        if self._manager is None:
+            return {'active': None, 'pending': None}
+        return self._manager.run_controller.status()
+
+    def pause(self) -> bool:
+        return self._manager is not None and self._manager.run_controller.pause()
+
+    def resume(self) -> bool:
+        return self._manager is not None and self._manager.run_controller.resume()
+
+    def cancel(self) -> bool:
+        return self._manager is not None and self._manager.run_controller.cancel()
+
+    # Scheduling
+
+    async def start_scheduler(self):
+        """⏰ Start connectivity monitor, scheduler dan audit verifikasi berkala di event loop bot"""
+        try:
+            manager = self.manager
+        except Exception as e:
+            logger.error(f"Backup scheduler not started: {e}")
+            return
+
+        await manager.network_manager.start()
+        self.scheduler = BackupScheduler(
+            manager.run_controller, load_schedules(manager.settings), manager.db_path,
+            max_sleep=manager.settings.get('schedule.max_sleep_seconds', 900),
+            default_folders=self.monitored_folders
+        )
+        self.scheduler.start()
+        self._audit_task = asyncio.create_task(manager.run_verification_audit_loop())
+
+    async def stop_scheduler(self):
+        if self._audit_task:
+            self._audit_task.cancel()
+            self._audit_task = None
+        if self.scheduler:
+            await self.scheduler.stop()
+            self.scheduler = None
+
+    def next_runs(self) -> List[tuple]:
+        """(Schedule, waktu fire berikutnya)"""
+        if self.scheduler:
+            return self.scheduler.next_runs()
+        return []
+
+    def set_schedule(self, cron: str, folder_name: Optional[str] = None, priority: int = 0) -> Schedule:
+        """
+        💾 Simpan jadwal (semua folder atau satu folder bot)
+
+        Raises:
+            ValueError: Cron expression atau nama folder tidak valid
+        """
+        folders = None
+        name = ALL_FOLDERS_SCHEDULE
+        if folder_name:
+            folders = [self._folder_path(folder_name)]
+            name = f"folder:{folder_name}"
+
+        schedule = Schedule(name, cron, folders, priority)
+        settings = self.manager.settings
+        entries = [entry for entry in settings.get('schedule.entries', []) or [] if entry.get('name') != name]
+        entries.append(schedule.to_dict())
+        self._save_entries(entries, auto_schedule=True)
+        return schedule
+
+    def disable_schedules(self):
+        """⏸️ Hapus semua jadwal (termasuk jadwal harian default)"""
+        self._save_entries([], auto_schedule=False)
+
+    def _save_entries(self, entries: List[Dict], auto_schedule: bool):
+        settings = self.manager.settings
+        settings.set('schedule.entries', entries)
+        settings.set('backup.auto_schedule', auto_schedule)
+        settings.save_settings()
+        if self.scheduler:
+            self.scheduler.reload(load_schedules(settings))
+
+# Global instance
+backup_service = BackupService()
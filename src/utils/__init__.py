@@ -3,13 +3,22 @@ Utilities package for the backup system
 """
 
 from .network_manager import NetworkManager
+from .connectivity_monitor import ConnectivityMonitor
 from .folder_manager import FolderManager
 from .file_organizer import FileOrganizer
 from .enhanced_settings import EnhancedSettings
+from .compression_manager import CompressionManager
+from .offline_spool import OfflineSpool
+from .upload_ordering import UploadCandidate, order_candidates
 
 __all__ = [
     'NetworkManager',
+    'ConnectivityMonitor',
     'FolderManager', 
     'FileOrganizer',
-    'EnhancedSettings'
+    'EnhancedSettings',
+    'CompressionManager',
+    'OfflineSpool',
+    'UploadCandidate',
+    'order_candidates'
 ]
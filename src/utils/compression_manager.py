@@ -0,0 +1,232 @@
+"""
+Compression Manager for type-aware streaming compression before upload
+"""
+
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+from .folder_manager import FolderManager
+
+logger = logging.getLogger(__name__)
+
+class CompressionManager:
+    # Categories (from FolderManager.supported_extensions) that shrink well
+    COMPRESSIBLE_CATEGORIES = ('documents', 'configs', 'code', 'databases', 'logs')
+
+    # Container formats that are already zip/deflate internally
+    ALREADY_COMPRESSED_EXTENSIONS = {
+        '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp',
+        '.pages', '.numbers', '.key', '.pdf'
+    }
+
+    CODEC_EXTENSIONS = {'gzip': '.gz'}
+    CANDIDATE_LEVELS = (1, 6, 9)
+
+    def __init__(self, folder_manager: FolderManager = None, temp_dir: str = "temp/compression",
+                 chunk_size: int = 1024 * 1024, min_size: int = 4096,
+                 default_link_speed: float = 1024 * 1024):
+        self.folder_manager = folder_manager or FolderManager()
+        self.temp_dir = Path(temp_dir)
+        self.chunk_size = chunk_size
+        self.min_size = min_size
+        self.min_ratio_gain = 0.05  # Skip compression if it saves less than 5%
+        self.sample_size = 256 * 1024
+
+        # Upload throughput in bytes/second (EWMA), updated after each upload
+        self.link_speed = default_link_speed
+        self._link_samples = 0
+
+        # Per-category benchmark: {category: {level: (bytes_per_second, ratio)}}
+        self._level_profiles: Dict[str, Dict[int, tuple]] = {}
+
+    def should_compress(self, file_path: Path) -> bool:
+        """
+        Check if a file belongs to a category where compression pays off
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            bool: True if the file should be compressed before upload
+        """
+        if file_path.suffix.lower() in self.ALREADY_COMPRESSED_EXTENSIONS:
+            return False
+
+        category = self.folder_manager.get_file_category(file_path)
+        if category not in self.COMPRESSIBLE_CATEGORIES:
+            return False
+
+        try:
+            return file_path.stat().st_size >= self.min_size
+        except OSError:
+            return False
+
+    def record_link_speed(self, bytes_sent: int, seconds: float):
+        """
+        Update the observed upload throughput
+
+        Args:
+            bytes_sent: Number of bytes uploaded
+            seconds: Time the upload took
+        """
+        if bytes_sent <= 0 or seconds <= 0:
+            return
+
+        speed = bytes_sent / seconds
+        if self._link_samples == 0:
+            self.link_speed = speed
+        else:
+            self.link_speed = 0.7 * self.link_speed + 0.3 * speed
+        self._link_samples += 1
+
+    def select_level(self, file_path: Path) -> int:
+        """
+        Pick the compression level with the lowest estimated total time
+
+        Total time is CPU time to compress plus time to push the compressed
+        bytes through the link. On a slow link higher levels win, on a fast
+        link the cheapest level wins.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            int: zlib compression level
+        """
+        category = self.folder_manager.get_file_category(file_path)
+        profile = self._level_profiles.get(category)
+
+        if profile is None:
+            profile = self._benchmark_levels(file_path)
+            if profile:
+                self._level_profiles[category] = profile
+
+        if not profile:
+            return 6
+
+        best_level = 6
+        best_cost = None
+        for level, (cpu_speed, ratio) in profile.items():
+            cost = 1.0 / cpu_speed + ratio / self.link_speed
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best_level = level
+
+        return best_level
+
+    def _benchmark_levels(self, file_path: Path) -> Dict[int, tuple]:
+        """Measure compression speed and ratio on a sample of the file"""
+        try:
+            with open(file_path, 'rb') as f:
+                sample = f.read(self.sample_size)
+        except OSError as e:
+            logger.debug(f"Failed to sample {file_path}: {e}")
+            return {}
+
+        if not sample:
+            return {}
+
+        profile = {}
+        for level in self.CANDIDATE_LEVELS:
+            start = time.perf_counter()
+            compressed = zlib.compress(sample, level)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            profile[level] = (len(sample) / elapsed, len(compressed) / len(sample))
+
+        return profile
+
+    def compress_file(self, file_path: Path) -> Optional[Dict]:
+        """
+        Stream-compress a file into the temp directory
+
+        Args:
+            file_path: Path to the source file
+
+        Returns:
+            dict: Compressed file info, or None if compression is not worth it
+        """
+        level = self.select_level(file_path)
+        codec = 'gzip'
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        target = self.temp_dir / f"{file_path.name}.{os.getpid()}.{time.time_ns()}{self.CODEC_EXTENSIONS[codec]}"
+
+        original_size = 0
+        compressed_size = 0
+        # wbits=31 writes a standard gzip container
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+        try:
+            with open(file_path, 'rb') as src, open(target, 'wb') as dst:
+                for chunk in iter(lambda: src.read(self.chunk_size), b""):
+                    original_size += len(chunk)
+                    data = compressor.compress(chunk)
+                    if data:
+                        dst.write(data)
+                        compressed_size += len(data)
+                data = compressor.flush()
+                dst.write(data)
+                compressed_size += len(data)
+        except Exception as e:
+            logger.error(f"Failed to compress {file_path}: {e}")
+            self.cleanup(target)
+            return None
+
+        if original_size == 0 or compressed_size > original_size * (1 - self.min_ratio_gain):
+            logger.debug(f"Compression not worth it for {file_path.name}, uploading as-is")
+            self.cleanup(target)
+            return None
+
+        logger.info(f"Compressed {file_path.name}: {original_size} -> {compressed_size} bytes "
+                    f"({codec} level {level})")
+
+        return {
+            'path': target,
+            'codec': codec,
+            'level': level,
+            'remote_suffix': self.CODEC_EXTENSIONS[codec],
+            'original_size': original_size,
+            'compressed_size': compressed_size
+        }
+
+    def decompress_file(self, source_path: Path, target_path: Path, codec: str) -> bool:
+        """
+        Stream-decompress a downloaded file
+
+        Args:
+            source_path: Path to the compressed file
+            target_path: Path to write the original content to
+            codec: Codec recorded at backup time
+
+        Returns:
+            bool: Success status
+        """
+        if codec != 'gzip':
+            logger.error(f"Unsupported compression codec: {codec}")
+            return False
+
+        decompressor = zlib.decompressobj(31)
+
+        try:
+            Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(self.chunk_size), b""):
+                    dst.write(decompressor.decompress(chunk))
+                dst.write(decompressor.flush())
+            return True
+        except Exception as e:
+            logger.error(f"Failed to decompress {source_path}: {e}")
+            return False
+
+    def cleanup(self, path: Path):
+        """Remove a temporary compressed file"""
+        try:
+            Path(path).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to remove temp file {path}: {e}")
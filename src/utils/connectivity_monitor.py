@@ -0,0 +1,172 @@
+"""
+Connectivity Monitor - satu background thread yang menyimpan status koneksi
+- Probe murah (TCP connect, tanpa HTTP) dengan interval berbeda saat up/down
+- Hysteresis: status baru berganti setelah beberapa probe berturut-turut
+- Subscriber dipanggil saat transisi up/down; caller membaca status cached O(1)
+"""
+
+import socket
+import asyncio
+import threading
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'unknown'
+UP = 'up'
+DOWN = 'down'
+
+DEFAULT_PROBE_TARGETS: List[Tuple[str, int]] = [
+    ('www.googleapis.com', 443),
+    ('oauth2.googleapis.com', 443),
+    ('8.8.8.8', 53),
+]
+
+class ConnectivityMonitor:
+    """Status koneksi internet yang di-update di background"""
+
+    def __init__(self, probe_targets: List[Tuple[str, int]] = None, probe_timeout: float = 5.0,
+                 up_interval: float = 30.0, down_interval: float = 5.0,
+                 fail_threshold: int = 2, recover_threshold: int = 2):
+        self.probe_targets = probe_targets or DEFAULT_PROBE_TARGETS
+        self.probe_timeout = probe_timeout
+        self.up_interval = up_interval  # seconds antar probe saat up
+        self.down_interval = down_interval  # lebih sering saat down supaya resume cepat
+        self.fail_threshold = fail_threshold
+        self.recover_threshold = recover_threshold
+
+        self.state = UNKNOWN
+        self.last_change: Optional[float] = None  # time.monotonic()
+        self.last_probe: Optional[float] = None
+        self._streak = 0  # Probe berturut-turut yang berlawanan dengan state sekarang
+        self._subscribers: List[Callable[[bool], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_up(self) -> bool:
+        """Status cached (UNKNOWN dianggap up supaya tidak memblokir)"""
+        return self.state != DOWN
+
+    def start(self):
+        """Start background thread; probe pertama jalan sinkron agar status langsung valid"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="connectivity-monitor", daemon=True)
+
+        if self.state == UNKNOWN:
+            self._apply(self.probe(), initial=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def report_failure(self):
+        """Pipeline melihat error jaringan: probe sekarang, jangan tunggu interval"""
+        self._wake.set()
+
+    def subscribe(self, callback: Callable[[bool], None]):
+        """callback(is_up) dipanggil dari thread monitor saat status berganti"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[bool], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def probe(self) -> bool:
+        """Satu probe: TCP connect ke salah satu target"""
+        self.last_probe = time.monotonic()
+        for host, port in self.probe_targets:
+            try:
+                with socket.create_connection((host, port), timeout=self.probe_timeout):
+                    return True
+            except OSError as e:
+                logger.debug(f"Connectivity probe {host}:{port} failed: {e}")
+        return False
+
+    def probe_now(self) -> bool:
+        """Probe langsung dan terapkan hasilnya (force check)"""
+        self._apply(self.probe())
+        return self.is_up()
+
+    def _run(self):
+        while not self._stop.is_set():
+            interval = self.down_interval if self.state == DOWN else self.up_interval
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._apply(self.probe())
+            except Exception as e:
+                logger.error(f"Connectivity monitor error: {e}")
+
+    def _apply(self, reachable: bool, initial: bool = False):
+        with self._lock:
+            if initial or self.state == UNKNOWN:
+                new_state = UP if reachable else DOWN
+            elif reachable == (self.state == UP):
+                self._streak = 0
+                return
+            else:
+                # Hysteresis: satu probe gagal/sukses belum mengubah status
+                self._streak += 1
+                threshold = self.recover_threshold if reachable else self.fail_threshold
+                if self._streak < threshold:
+                    return
+                new_state = UP if reachable else DOWN
+
+            self._streak = 0
+            changed = new_state != self.state
+            self.state = new_state
+            if changed:
+                self.last_change = time.monotonic()
+            subscribers = list(self._subscribers)
+
+        if not changed:
+            return
+        if new_state == UP:
+            logger.info("Network connectivity is up")
+        else:
+            logger.warning("Network connectivity lost")
+        for callback in subscribers:
+            try:
+                callback(new_state == UP)
+            except Exception as e:
+                logger.error(f"Connectivity subscriber failed: {e}")
+
+    async def wait_until_up(self, timeout: float = None) -> bool:
+        """
+        Tunggu (tanpa polling) sampai koneksi kembali
+
+        Returns:
+            bool: True jika up, False jika timeout
+        """
+        if self.is_up():
+            return True
+
+        loop = asyncio.get_running_loop()
+        restored = loop.create_future()
+
+        def on_change(is_up: bool):
+            if is_up:
+                loop.call_soon_threadsafe(lambda: restored.done() or restored.set_result(True))
+
+        self.subscribe(on_change)
+        try:
+            if self.is_up():  # Berubah sebelum subscribe
+                return True
+            await asyncio.wait_for(restored, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.unsubscribe(on_change)
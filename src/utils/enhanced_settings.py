@@ -36,7 +36,25 @@ class EnhancedSettings:
                 'retry_delay': 60,  # seconds
                 'delete_after_upload': False,
                 'compress_files': False,
-                'verify_uploads': True
+                'versioning_mode': 'revisions',  # revisions = update Drive file in-place, copies = object baru per date folder
+                'keep_revision_forever': False,  # Pin setiap revision; False = hanya revision yang ditimpa (maks 200 per file)
+                'verify_uploads': True,
+                'audit_interval_hours': 24,  # Background re-verification of old backups (0 = off)
+                'audit_sample_size': 50,
+                'audit_min_age_days': 1,
+                'chunked_backend': False,  # Content-defined chunk store untuk file besar
+                'chunked_min_size_mb': 64,
+                'upload_order': 'user_first',  # walk, small_first, newest_first, folder_priority, user_first
+                'folder_priorities': {},  # {folder path: priority}, lebih tinggi = lebih dulu
+                'publish_manifests': True,  # Upload run manifest ke _manifests untuk rebuild katalog
+                'spool_max_mb': 512,  # Batas spool untuk copy file volatile saat offline
+                'volatile_patterns': None  # None = default (WhatsApp databases, *.db-wal)
+            },
+            'schedule': {
+                # [{'name', 'cron', 'folders' (None = semua), 'priority', 'catch_up'}]
+                # Kosong = satu jadwal harian dari backup.schedule_time
+                'entries': [],
+                'max_sleep_seconds': 900  # Cek ulang jam dinding (device sleep) paling lambat tiap 15 menit
             },
             'telegram': {
                 'send_progress_updates': True,
@@ -49,7 +67,10 @@ class EnhancedSettings:
                 'max_storage_per_account': 15 * 1024 * 1024 * 1024,  # 15GB
                 'storage_warning_threshold': 0.9,  # 90%
                 'auto_rotate_accounts': True,
-                'preferred_account_order': []
+                'preferred_account_order': [],
+                'retention_days': None,  # None = keep backups forever
+                'quota_refresh_seconds': 300,  # TTL cache storageQuota per akun
+                'metadata_sync_seconds': 60  # Interval sync mirror metadata (Changes API)
             },
             'file_organization': {
                 'organize_by_date': True,
@@ -61,9 +82,13 @@ class EnhancedSettings:
             'network': {
                 'connection_timeout': 30,
                 'upload_timeout': 300,
-                'max_concurrent_uploads': 3,
+                'max_concurrent_uploads': 3,  # Upload worker paralel per run (= ukuran transport pool)
                 'bandwidth_limit': None,  # bytes per second, None = unlimited
-                'use_resumable_uploads': True
+                'use_resumable_uploads': True,
+                'download_chunk_mb': 8,  # Ukuran Range request saat restore
+                'upload_chunk_mb': 8,  # Ukuran chunk resumable upload (pause/cancel dicek per chunk)
+                'probe_interval': 30,  # Interval probe connectivity monitor (detik)
+                'outage_wait_seconds': 600  # Lama menunggu koneksi kembali sebelum run dihentikan
             },
             'logging': {
                 'level': 'INFO',
@@ -426,6 +451,7 @@ class EnhancedSettings:
         summary += "📱 Backup Configuration:\n"
         summary += f"  • Auto Schedule: {self.get('backup.auto_schedule')}\n"
         summary += f"  • Schedule Time: {self.get('backup.schedule_time')}\n"
+        summary += f"  • Custom Schedules: {len(self.get('schedule.entries') or [])}\n"
         summary += f"  • Max File Size: {self._format_size(self.get('backup.max_file_size'))}\n"
         summary += f"  • Retry Attempts: {self.get('backup.retry_attempts')}\n"
         summary += f"  • Delete After Upload: {self.get('backup.delete_after_upload')}\n\n"
@@ -25,7 +25,8 @@ class FolderManager:
             'archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'],
             'code': ['.py', '.js', '.html', '.css', '.cpp', '.java', '.php', '.rb'],
             'configs': ['.json', '.xml', '.yaml', '.yml', '.ini', '.cfg', '.conf'],
-            'databases': ['.db', '.sqlite', '.sql', '.mdb']
+            'databases': ['.db', '.sqlite', '.sql', '.mdb'],
+            'logs': ['.log']
         }
     
     def get_file_category(self, file_path: Path) -> str:
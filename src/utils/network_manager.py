@@ -7,77 +7,88 @@ import logging
 from typing import Tuple, Optional, Dict
 from datetime import datetime, timedelta
 
+from .connectivity_monitor import ConnectivityMonitor
+
 try:
     import aiohttp
     AIOHTTP_AVAILABLE = True
 except ImportError:
     AIOHTTP_AVAILABLE = False
-    # Fallback untuk basic connectivity check
-    import urllib.request
-    import urllib.error
 
 logger = logging.getLogger(__name__)
 
 class NetworkManager:
-    def __init__(self):
+    def __init__(self, timeout: int = 10, probe_interval: float = 30):
         self.last_check = None
-        self.check_interval = 300  # 5 minutes
-        self.timeout = 10
+        self.timeout = timeout
+        # Satu background monitor; check_network/check_connectivity membaca status cached
+        self.monitor = ConnectivityMonitor(probe_timeout=min(timeout, 5), up_interval=probe_interval)
+        self._session = None
+        self._session_loop = None
         self.test_urls = [
             'https://www.google.com',
             'https://www.googleapis.com',
             'https://api.telegram.org'
         ]
     
+    async def _get_session(self):
+        """
+        Shared aiohttp session dengan keep-alive connection pool
+        
+        Session terikat ke event loop, jadi dibuat ulang jika loop berganti.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """Tutup shared session dan stop monitor"""
+        self.monitor.stop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
+    async def start(self):
+        """Start background monitor (sekali); probe pertama jalan di worker thread"""
+        await asyncio.to_thread(self.monitor.start)
+    
+    def is_connected(self) -> bool:
+        """
+        Status koneksi cached dari background monitor (tanpa network I/O)
+        
+        Sebelum start() status masih UNKNOWN dan dianggap connected.
+        """
+        return self.monitor.is_up()
+    
+    def report_failure(self):
+        """Laporkan error jaringan dari pipeline supaya monitor langsung re-probe"""
+        self.monitor.report_failure()
+    
     async def check_connectivity(self, force_check: bool = False) -> bool:
         """
         Check internet connectivity
         
         Args:
-            force_check: Force a new check regardless of cache
+            force_check: Probe sekarang, bukan membaca status cached
             
         Returns:
             bool: True if connected, False otherwise
         """
-        now = datetime.now()
-        
-        # Use cached result if recent
-        if (not force_check and 
-            self.last_check and 
-            (now - self.last_check).seconds < self.check_interval):
-            return True
+        if force_check:
+            await self.start()
+            connected = await asyncio.to_thread(self.monitor.probe_now)
+        else:
+            connected = self.is_connected()
         
-        try:
-            if AIOHTTP_AVAILABLE:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                    for url in self.test_urls:
-                        try:
-                            async with session.get(url) as response:
-                                if response.status == 200:
-                                    self.last_check = now
-                                    logger.info("Network connectivity confirmed")
-                                    return True
-                        except Exception as e:
-                            logger.debug(f"Failed to reach {url}: {e}")
-                            continue
-            else:
-                # Fallback using urllib
-                for url in self.test_urls:
-                    try:
-                        urllib.request.urlopen(url, timeout=self.timeout)
-                        self.last_check = now
-                        logger.info("Network connectivity confirmed (fallback)")
-                        return True
-                    except (urllib.error.URLError, Exception) as e:
-                        logger.debug(f"Failed to reach {url}: {e}")
-                        continue
-                
-                logger.warning("No network connectivity detected")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Network check failed: {e}")
-            return False
+        if connected:
+            self.last_check = datetime.now()
+        return connected
     
     async def wait_for_connectivity(self, max_wait_time: int = 300) -> bool:
         """
@@ -89,15 +100,9 @@ class NetworkManager:
         Returns:
             bool: True if connectivity restored, False if timeout
         """
-        start_time = datetime.now()
-        check_interval = 30  # Check every 30 seconds
-        
-        while (datetime.now() - start_time).seconds < max_wait_time:
-            if await self.check_connectivity(force_check=True):
-                return True
-            
-            logger.info(f"Waiting for network connectivity... ({check_interval}s)")
-            await asyncio.sleep(check_interval)
+        await self.start()
+        if await self.monitor.wait_until_up(max_wait_time):
+            return True
         
         logger.error(f"Network connectivity not restored after {max_wait_time} seconds")
         return False
@@ -115,20 +120,20 @@ class NetworkManager:
         ]
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                for url in google_urls:
-                    try:
-                        async with session.get(url) as response:
-                            # We expect 401 for unauthorized, which means the service is up
-                            if response.status in [200, 401, 403]:
-                                logger.info("Google Drive API connectivity confirmed")
-                                return True
-                    except Exception as e:
-                        logger.debug(f"Failed to reach Google API {url}: {e}")
-                        continue
-                
-                logger.warning("Google Drive API not accessible")
-                return False
+            session = await self._get_session()
+            for url in google_urls:
+                try:
+                    async with session.get(url) as response:
+                        # We expect 401 for unauthorized, which means the service is up
+                        if response.status in [200, 401, 403]:
+                            logger.info("Google Drive API connectivity confirmed")
+                            return True
+                except Exception as e:
+                    logger.debug(f"Failed to reach Google API {url}: {e}")
+                    continue
+            
+            logger.warning("Google Drive API not accessible")
+            return False
                 
         except Exception as e:
             logger.error(f"Google Drive connectivity check failed: {e}")
@@ -147,19 +152,19 @@ class NetworkManager:
         ]
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                for url in telegram_urls:
-                    try:
-                        async with session.get(url) as response:
-                            if response.status in [200, 401, 404]:  # 404 is expected for base API
-                                logger.info("Telegram API connectivity confirmed")
-                                return True
-                    except Exception as e:
-                        logger.debug(f"Failed to reach Telegram API {url}: {e}")
-                        continue
-                
-                logger.warning("Telegram API not accessible")
-                return False
+            session = await self._get_session()
+            for url in telegram_urls:
+                try:
+                    async with session.get(url) as response:
+                        if response.status in [200, 401, 404]:  # 404 is expected for base API
+                            logger.info("Telegram API connectivity confirmed")
+                            return True
+                except Exception as e:
+                    logger.debug(f"Failed to reach Telegram API {url}: {e}")
+                    continue
+            
+            logger.warning("Telegram API not accessible")
+            return False
                 
         except Exception as e:
             logger.error(f"Telegram connectivity check failed: {e}")
@@ -239,21 +244,6 @@ class NetworkManager:
         Synchronous network check for compatibility
         
         Returns:
-            dict: Network status with 'connected' key
+            dict: Network status with 'connected' key (cached, O(1))
         """
-        try:
-            if AIOHTTP_AVAILABLE:
-                # For async environments, we'll do a simple check
-                import socket
-                socket.create_connection(("8.8.8.8", 53), timeout=5)
-                return {'connected': True}
-            else:
-                # Use urllib fallback
-                try:
-                    urllib.request.urlopen('https://www.google.com', timeout=self.timeout)
-                    return {'connected': True}
-                except:
-                    return {'connected': False}
-        except Exception as e:
-            logger.debug(f"Network check failed: {e}")
-            return {'connected': False}
+        return {'connected': self.is_connected(), 'state': self.monitor.state}
@@ -0,0 +1,149 @@
+"""
+Offline Spool for staging copies of volatile files while the network is down
+"""
+
+import os
+import shutil
+import sqlite3
+import hashlib
+import fnmatch
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Files that apps rotate or rewrite in place (e.g. WhatsApp's rolling backups)
+DEFAULT_VOLATILE_PATTERNS = [
+    '*/WhatsApp/Databases/*',
+    '*/WhatsApp Business/Databases/*',
+    '*msgstore*.db*',
+    '*.db-wal',
+]
+
+class OfflineSpool:
+    def __init__(self, db_path: str, spool_dir: str = "temp/spool",
+                 max_bytes: int = 512 * 1024 * 1024, volatile_patterns: List[str] = None):
+        self.db_path = db_path
+        self.spool_dir = Path(spool_dir)
+        self.max_bytes = max_bytes
+        self.volatile_patterns = volatile_patterns or DEFAULT_VOLATILE_PATTERNS
+        self._init_table()
+
+    def _init_table(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS spool_entries (
+                source_path TEXT PRIMARY KEY,
+                spool_path TEXT,
+                file_size INTEGER,
+                staged_at TIMESTAMP,
+                last_used TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def is_volatile(self, file_path: Path) -> bool:
+        """Check if a file may be rotated/overwritten before the next upload"""
+        path = str(file_path)
+        return any(fnmatch.fnmatch(path, pattern) for pattern in self.volatile_patterns)
+
+    def stage(self, file_path: Path) -> Optional[Path]:
+        """
+        Copy a file into the spool, evicting least recently used copies to stay under max_bytes
+
+        Returns:
+            Path: Spooled copy, or None if it does not fit
+        """
+        try:
+            size = file_path.stat().st_size
+        except OSError:
+            return None
+        if size > self.max_bytes:
+            logger.warning(f"File too large for offline spool: {file_path}")
+            return None
+
+        self.release(str(file_path))  # Replace an older copy of the same file
+        self._evict(self.max_bytes - size)
+
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha1(str(file_path).encode('utf-8')).hexdigest()[:16]
+        target = self.spool_dir / f"{key}_{file_path.name}"
+        try:
+            shutil.copy2(file_path, target)
+        except OSError as e:
+            logger.error(f"Failed to stage {file_path}: {e}")
+            return None
+
+        now = datetime.now()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT OR REPLACE INTO spool_entries (source_path, spool_path, file_size, staged_at, last_used)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (str(file_path), str(target), size, now, now))
+        conn.commit()
+        conn.close()
+        return target
+
+    def _evict(self, budget: int):
+        """Remove least recently used copies until the spool uses at most budget bytes"""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT source_path, spool_path, file_size FROM spool_entries ORDER BY last_used"
+        ).fetchall()
+        used = sum(row[2] for row in rows)
+        for source_path, spool_path, file_size in rows:
+            if used <= budget:
+                break
+            self._remove_file(spool_path)
+            conn.execute("DELETE FROM spool_entries WHERE source_path = ?", (source_path,))
+            used -= file_size
+            logger.info(f"Evicted spooled copy of {source_path}")
+        conn.commit()
+        conn.close()
+
+    def staged_path(self, source_path: str) -> Optional[Path]:
+        """Spooled copy of a source file (marks it as recently used)"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT spool_path FROM spool_entries WHERE source_path = ?", (source_path,)
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE spool_entries SET last_used = ? WHERE source_path = ?",
+                (datetime.now(), source_path)
+            )
+            conn.commit()
+        conn.close()
+
+        if row and os.path.exists(row[0]):
+            return Path(row[0])
+        return None
+
+    def orphaned_sources(self) -> List[str]:
+        """Spooled files whose original has since disappeared (rotated or deleted)"""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT source_path FROM spool_entries").fetchall()
+        conn.close()
+        return [row[0] for row in rows if not os.path.exists(row[0])]
+
+    def release(self, source_path: str):
+        """Drop the spooled copy after a successful upload"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT spool_path FROM spool_entries WHERE source_path = ?", (source_path,)
+        ).fetchone()
+        if row:
+            self._remove_file(row[0])
+            conn.execute("DELETE FROM spool_entries WHERE source_path = ?", (source_path,))
+            conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,75 @@
+"""
+Upload ordering policies - urutan file dalam satu backup run
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Priority backup_queue: permintaan user > sisa offline > file baru (0) > retry gagal
+PRIORITY_USER = 10
+PRIORITY_OFFLINE = 1
+PRIORITY_RETRY = -1
+
+class UploadCandidate:
+    """File yang akan di-upload beserta atribut untuk ordering"""
+
+    def __init__(self, path: Path, size: int = 0, mtime: float = 0.0,
+                 queue_priority: int = 0, folder_priority: int = 0):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.queue_priority = queue_priority
+        self.folder_priority = folder_priority
+
+    @classmethod
+    def from_path(cls, path: Path, queue_priorities: Dict[str, int] = None,
+                  folder_priorities: Dict[str, int] = None,
+                  queue_folders: Dict[str, int] = None) -> 'UploadCandidate':
+        try:
+            stat = path.stat()
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = 0, 0.0
+
+        queue_priority = (queue_priorities or {}).get(str(path), 0)
+        return cls(
+            path, size, mtime,
+            queue_priority=max(queue_priority, folder_priority_for(path, queue_folders or {}, queue_priority)),
+            folder_priority=folder_priority_for(path, folder_priorities or {})
+        )
+
+def folder_priority_for(path: Path, folder_priorities: Dict[str, int], default: int = 0) -> int:
+    """Priority dari prefix folder terpanjang yang cocok (default kalau tidak ada)"""
+    best_length, priority = -1, default
+    path_str = str(path)
+    for folder, folder_priority in folder_priorities.items():
+        prefix = str(Path(folder).expanduser())
+        if (path_str == prefix or path_str.startswith(prefix.rstrip('/') + '/')) and len(prefix) > best_length:
+            best_length, priority = len(prefix), folder_priority
+    return priority
+
+# Sort key per policy (ascending = diproses lebih dulu)
+ORDERING_POLICIES: Dict[str, Optional[Callable[[UploadCandidate], tuple]]] = {
+    # Urutan directory walk (perilaku lama)
+    'walk': None,
+    # File kecil dulu: paling banyak file terlindungi per menit koneksi
+    'small_first': lambda c: (c.size,),
+    'newest_first': lambda c: (-c.mtime,),
+    'folder_priority': lambda c: (-c.folder_priority, c.size),
+    # Permintaan user dan antrian offline dulu, retry gagal setelah file baru; lalu folder priority, lalu kecil dulu
+    'user_first': lambda c: (-c.queue_priority, -c.folder_priority, c.size),
+}
+
+def order_candidates(candidates: List[UploadCandidate], policy: str = 'user_first') -> List[UploadCandidate]:
+    """Urutkan candidate sesuai policy (stable, jadi urutan walk jadi tie-break)"""
+    if policy not in ORDERING_POLICIES:
+        logger.warning(f"Unknown upload ordering policy '{policy}', using 'user_first'")
+        policy = 'user_first'
+
+    key = ORDERING_POLICIES[policy]
+    if key is None:
+        return list(candidates)
+    return sorted(candidates, key=key)